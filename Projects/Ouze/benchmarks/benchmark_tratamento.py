@@ -0,0 +1,238 @@
+"""
+Benchmark das funções tratar_* em volume de produção, com dados sintéticos
+
+Uso (a partir de Projects/Ouze):
+    python -m benchmarks.benchmark_tratamento                       # 1M, 10M e 50M linhas
+    python -m benchmarks.benchmark_tratamento --tamanhos 1M 10M
+    python -m benchmarks.benchmark_tratamento --gravar-baseline     # grava benchmarks/baseline.json
+    python -m benchmarks.benchmark_tratamento --processos 8         # src.paralelo.executar_por_dia
+
+Cada caso (função x tamanho) roda em um processo novo, para que o pico de RSS
+medido seja só daquele caso. Com baseline gravado, o processo termina com
+código 1 se algum caso ficar mais lento ou usar mais memória que o baseline
+além da tolerância.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import psutil
+
+from benchmarks import dados_sinteticos
+from src.instrumentacao import AmostradorRSS, configurar_logs
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+CAMINHO_BASELINE_PADRAO = os.path.join(DIRETORIO_BENCHMARKS, 'baseline.json')
+TAMANHOS_PADRAO = ['1M', '10M', '50M']
+TOLERANCIA_TEMPO_PADRAO = 0.20
+TOLERANCIA_MEMORIA_PADRAO = 0.20
+# Folga absoluta para casos muito rápidos/pequenos, onde a variação relativa é só ruído
+FOLGA_TEMPO_S = 0.05
+FOLGA_MEMORIA_MB = 16
+INTERVALO_AMOSTRAGEM_RSS = 0.01
+
+# ============================================
+# CASOS
+# ============================================
+# Cada caso gera as entradas (fora da medição) e devolve (função, args, kwargs)
+
+def _caso_discagens_expert(n_linhas):
+    from src.data_wrangling_discagens_expert import tratar_base_discagens
+    df = dados_sinteticos.gerar_discagens_expert(n_linhas)
+    return tratar_base_discagens, (df,), {}
+
+
+def _caso_mailing_hist(n_linhas):
+    from src.data_wrangling_mailingHist import tratar_base_mailing_hist
+    df = dados_sinteticos.gerar_mailing_hist(n_linhas)
+    df_cad_devf = dados_sinteticos.gerar_cad_devf(max(1, n_linhas // dados_sinteticos.DIAS_PADRAO))
+    return tratar_base_mailing_hist, (df,), {'df_cad_devf': df_cad_devf}
+
+
+def _caso_discagens_trestto(n_linhas):
+    from src.data_wrangling_discagens_trestto import tratar_discagens_trestto
+    from src.data_wrangling_mailingHist import adicionar_faixa_atraso, adicionar_produto
+    df = dados_sinteticos.gerar_discagens_trestto(n_linhas)
+    df_mailing_hist = adicionar_faixa_atraso(adicionar_produto(dados_sinteticos.gerar_mailing_hist(n_linhas)))
+    return tratar_discagens_trestto, (df, df_mailing_hist), {}
+
+
+def _caso_acionamentos(n_linhas):
+    from src.data_wrangling_acionamentos import tratar_acionamentos
+    df = dados_sinteticos.gerar_tabulacao_aciona(n_linhas)
+    return tratar_acionamentos, (df,), {}
+
+
+# Sem coluna DATA: sempre executam no processo do caso, mesmo com --processos
+CASOS_SEM_DATA = {'tratar_acionamentos'}
+# Devolvem uma linha por linha de entrada (executar_por_dia(..., preserva_linhas=True))
+CASOS_POR_LINHA = {'tratar_base_discagens', 'tratar_base_mailing_hist'}
+
+CASOS = {
+    'tratar_base_discagens': _caso_discagens_expert,
+    'tratar_base_mailing_hist': _caso_mailing_hist,
+    'tratar_discagens_trestto': _caso_discagens_trestto,
+    'tratar_acionamentos': _caso_acionamentos,
+}
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+
+def converter_tamanho(texto):
+    """'1M' -> 1_000_000, '500K' -> 500_000, '2500' -> 2500"""
+    texto = texto.strip().upper()
+    multiplicador = {'K': 1_000, 'M': 1_000_000}.get(texto[-1:], 1)
+    numero = texto[:-1] if multiplicador > 1 else texto
+    return int(float(numero) * multiplicador)
+
+
+def _montar_chamada(nome, n_linhas, processos):
+    funcao, args, kwargs = CASOS[nome](n_linhas)
+    if processos > 1 and nome not in CASOS_SEM_DATA:
+        from src.paralelo import executar_por_dia
+        return lambda: executar_por_dia(funcao, *args, max_processos=processos,
+                                        preserva_linhas=nome in CASOS_POR_LINHA, **kwargs)
+    return lambda: funcao(*args, **kwargs)
+
+
+def _executar_caso(nome, n_linhas, repeticoes, processos=1):
+    """Roda um caso no processo atual (chamado em um processo novo pelo harness)"""
+    # Os logs JSON das próprias funções não entram na saída do benchmark
+    configurar_logs(os.devnull)
+    tempos, picos, deltas = [], [], []
+    for _ in range(repeticoes):
+        # As funções alteram a entrada, então cada repetição gera os dados de novo
+        with contextlib.redirect_stdout(io.StringIO()):
+            chamada = _montar_chamada(nome, n_linhas, processos)
+            with AmostradorRSS(INTERVALO_AMOSTRAGEM_RSS) as rss:
+                inicio = time.perf_counter()
+                chamada()
+                tempos.append(time.perf_counter() - inicio)
+        picos.append(rss.pico)
+        deltas.append(rss.pico - rss.inicial)
+        del chamada
+
+    return {
+        'tempo_s': min(tempos),
+        'pico_rss_mb': max(picos) / 1024**2,
+        'delta_rss_mb': max(deltas) / 1024**2,
+    }
+
+
+def executar_benchmark(tamanhos, casos=None, repeticoes=1, processos=1):
+    """
+    Executa os casos em cada tamanho, cada um em um processo novo
+
+    Args:
+        tamanhos (list): Tamanhos no formato '1M', '10M', ...
+        casos (list, optional): Nomes dos casos. Default: todos
+        repeticoes (int): Repetições por caso (fica o menor tempo)
+        processos (int): > 1 executa os casos por dia em um pool (src.paralelo)
+
+    Returns:
+        dict: "caso@tamanho" (ou "caso@tamanhoxN" com N processos) -> {tempo_s, pico_rss_mb, delta_rss_mb}
+    """
+    resultados = {}
+    contexto = multiprocessing.get_context('spawn')
+    for tamanho in tamanhos:
+        n_linhas = converter_tamanho(tamanho)
+        for nome in casos or CASOS:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                resultado = executor.submit(_executar_caso, nome, n_linhas, repeticoes, processos).result()
+            chave = f"{nome}@{tamanho}" + (f"x{processos}" if processos > 1 and nome not in CASOS_SEM_DATA else '')
+            resultados[chave] = resultado
+            print(f"⏱️  {chave}: {resultado['tempo_s']:.2f}s | pico RSS {resultado['pico_rss_mb']:,.0f} MB "
+                  f"(+{resultado['delta_rss_mb']:,.0f} MB)")
+    return resultados
+
+
+def comparar_com_baseline(resultados, baseline, tolerancia_tempo, tolerancia_memoria):
+    """
+    Compara os resultados com o baseline
+
+    Returns:
+        list: Mensagens das regressões encontradas (vazia se nenhuma)
+    """
+    regressoes = []
+    for chave, resultado in resultados.items():
+        referencia = baseline.get(chave)
+        if referencia is None:
+            print(f"   {chave}: sem baseline")
+            continue
+        limite_tempo = max(referencia['tempo_s'] * (1 + tolerancia_tempo), referencia['tempo_s'] + FOLGA_TEMPO_S)
+        limite_memoria = max(referencia['delta_rss_mb'] * (1 + tolerancia_memoria),
+                             referencia['delta_rss_mb'] + FOLGA_MEMORIA_MB)
+        if resultado['tempo_s'] > limite_tempo:
+            regressoes.append(f"{chave}: tempo {resultado['tempo_s']:.2f}s > {limite_tempo:.2f}s "
+                              f"(baseline {referencia['tempo_s']:.2f}s)")
+        if resultado['delta_rss_mb'] > limite_memoria:
+            regressoes.append(f"{chave}: memória +{resultado['delta_rss_mb']:,.0f} MB > +{limite_memoria:,.0f} MB "
+                              f"(baseline +{referencia['delta_rss_mb']:,.0f} MB)")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das funções tratar_* com dados sintéticos")
+    parser.add_argument('--tamanhos', nargs='+', default=TAMANHOS_PADRAO, help="Ex: 1M 10M 50M")
+    parser.add_argument('--casos', nargs='+', choices=list(CASOS), help="Default: todos")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Executa cada caso por dia em N processos (compare com a execução sem a opção)")
+    parser.add_argument('--baseline', default=CAMINHO_BASELINE_PADRAO)
+    parser.add_argument('--gravar-baseline', action='store_true',
+                        help="Grava/atualiza o baseline com os resultados desta execução")
+    parser.add_argument('--tolerancia-tempo', type=float, default=TOLERANCIA_TEMPO_PADRAO)
+    parser.add_argument('--tolerancia-memoria', type=float, default=TOLERANCIA_MEMORIA_PADRAO)
+    args = parser.parse_args(argv)
+
+    resultados = executar_benchmark(args.tamanhos, args.casos, args.repeticoes, args.processos)
+
+    if args.gravar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(resultados)
+        baseline['_ambiente'] = {
+            'gravado_em': datetime.now().isoformat(timespec='seconds'),
+            'maquina': platform.node(),
+            'cpus': os.cpu_count(),
+            'memoria_gb': round(psutil.virtual_memory().total / 1024**3, 1),
+            'python': platform.python_version(),
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"💾 Baseline gravado em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  Sem baseline em {args.baseline} (use --gravar-baseline)")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressoes = comparar_com_baseline(resultados, baseline, args.tolerancia_tempo, args.tolerancia_memoria)
+    if regressoes:
+        print("❌ Regressões:")
+        for regressao in regressoes:
+            print(f"   {regressao}")
+        return 1
+    print("✅ Sem regressões em relação ao baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+from src.compactacao import compactar_tipos
+from src.data_wrangling_discagens_expert import DDD_ESTADO, GRUPO_OPERACAO
+from src.data_wrangling_mailingHist import CLI_CAR_PRODUTO
+
+# ============================================
+# GERADORES DE DADOS SINTÉTICOS
+# ============================================
+# Mesmas colunas e tipos que as consultas de queries.py devolvem depois da
+# compactação de src.extracao (CPF/contrato int64, rótulos categóricos), com
+# cardinalidades próximas das reais:
+#   - carteira fixa de contratos (~1,2 contrato por CPF) repetida todo dia no mailing
+#   - CPFs discados várias vezes no mesmo dia
+#   - GrupoPrincipal com os códigos reais (e uma parte fora do mapa -> 'Outros')
+#   - DDDs concentrados em SP/RJ/MG, com alguns inválidos
+#   - pares COD_CLI/COD_CAR reais, mais alguns fora do mapa de produtos
+# Mesma `semente` -> mesmos dados; a carteira é compartilhada entre as bases.
+
+SEMENTE_PADRAO = 42
+DATA_INICIAL_PADRAO = '2025-09-01'
+DIAS_PADRAO = 30
+
+# Pares que existem na carteira mas não têm produto (viram 'Outros')
+_PARES_SEM_PRODUTO = [(196, 2), (198, 4), (228, 1)]
+
+# Peso relativo de cada DDD (demais DDDs válidos com peso 1)
+_PESO_DDD = {'11': 30, '21': 12, '31': 6, '41': 4, '51': 4, '61': 3, '71': 4, '81': 4, '85': 3}
+
+_SUBSTATUS_URA = ['ALO', 'CAIXA POSTAL', 'NAO ATENDE', 'OCUPADO', 'NUMERO INVALIDO', 'CPC', 'PROMESSA']
+
+_TABULACOES = [
+    ('ACORDO', 1, 1, 1), ('PROMESSA DE PAGAMENTO', 1, 1, 1), ('RECUSA', 1, 1, 0),
+    ('SEM CONDICOES', 1, 1, 0), ('RECADO', 1, 0, 0), ('TERCEIRO', 0, 0, 0),
+    ('NAO ATENDE', 0, 0, 0), ('DESLIGOU', 1, 0, 0),
+]
+
+
+def _datas(rng, n_linhas, dt_ini, dias):
+    return pd.Timestamp(dt_ini) + pd.to_timedelta(rng.integers(0, dias, n_linhas), unit='D')
+
+
+def gerar_carteira(n_contratos, semente=SEMENTE_PADRAO):
+    """
+    Gera a carteira de contratos compartilhada entre MAILING_HIST e CAD_DEVF
+
+    Args:
+        n_contratos (int): Quantidade de contratos
+        semente (int): Semente do gerador
+
+    Returns:
+        pd.DataFrame: CONTRATO, CPF, COD_CLI, COD_CAR, ATRASO (atraso no primeiro dia)
+    """
+    rng = np.random.default_rng(semente)
+    pares = list(CLI_CAR_PRODUTO) + _PARES_SEM_PRODUTO
+    pesos = np.array([4.0] * len(CLI_CAR_PRODUTO) + [1.0] * len(_PARES_SEM_PRODUTO))
+    escolhidos = rng.choice(len(pares), size=n_contratos, p=pesos / pesos.sum())
+    cod_cli, cod_car = np.array(pares, dtype=np.int16).T
+
+    # ~1,2 contrato por CPF
+    n_cpfs = max(1, int(n_contratos / 1.2))
+    cpfs = rng.integers(10_000_000_000, 99_999_999_999, n_cpfs)
+    return pd.DataFrame({
+        'CONTRATO': 100_000_000 + np.arange(n_contratos, dtype=np.int64) * 7,
+        'CPF': cpfs[rng.integers(0, n_cpfs, n_contratos)],
+        'COD_CLI': cod_cli[escolhidos],
+        'COD_CAR': cod_car[escolhidos],
+        'ATRASO': np.round(rng.gamma(1.5, 90, n_contratos)).astype(np.int32) - 10,
+    })
+
+
+def gerar_mailing_hist(n_linhas, dt_ini=DATA_INICIAL_PADRAO, dias=DIAS_PADRAO, semente=SEMENTE_PADRAO):
+    """
+    Gera MAILING_HIST: a mesma carteira repetida em cada dia, com o atraso andando 1 por dia
+
+    Args:
+        n_linhas (int): Quantidade de linhas (carteira de n_linhas / dias contratos)
+        dt_ini (str): Primeiro dia
+        dias (int): Quantidade de dias
+        semente (int): Semente do gerador
+
+    Returns:
+        pd.DataFrame: DATA, CONTRATO, CPF, ATRASO, COD_CLI, COD_CAR
+    """
+    carteira = gerar_carteira(max(1, n_linhas // dias), semente)
+    repeticoes = -(-n_linhas // len(carteira))
+    linhas = np.arange(n_linhas)
+    dia = (linhas // len(carteira)).clip(max=repeticoes - 1)
+    posicao = linhas % len(carteira)
+
+    df = pd.DataFrame({
+        'DATA': pd.Timestamp(dt_ini) + pd.to_timedelta(dia, unit='D'),
+        'CONTRATO': carteira['CONTRATO'].to_numpy()[posicao],
+        'CPF': carteira['CPF'].to_numpy()[posicao],
+        'ATRASO': carteira['ATRASO'].to_numpy()[posicao] + dia.astype(np.int32),
+        'COD_CLI': carteira['COD_CLI'].to_numpy()[posicao],
+        'COD_CAR': carteira['COD_CAR'].to_numpy()[posicao],
+    })
+    return compactar_tipos(df, 'mailing_hist', relatorio=False)
+
+
+def gerar_cad_devf(n_linhas, semente=SEMENTE_PADRAO):
+    """
+    Gera CAD_DEVF (um registro por contrato)
+
+    Os números de contrato são sequenciais, então os contratos de qualquer
+    mailing gerado com até n_linhas contratos na carteira existem no CAD_DEVF
+
+    Args:
+        n_linhas (int): Quantidade de contratos
+        semente (int): Semente do gerador
+
+    Returns:
+        pd.DataFrame: Colunas de get_query_cad_devf
+    """
+    carteira = gerar_carteira(n_linhas, semente)
+    rng = np.random.default_rng(semente + 1)
+    valor_principal = np.round(rng.lognormal(7, 1, n_linhas), 2)
+    descricao = carteira['COD_CLI'].astype(str) + '-' + carteira['COD_CAR'].astype(str)
+
+    df = pd.DataFrame({
+        'CPF_DEV': carteira['CPF'].to_numpy(),
+        'CONTRATO_FIN': carteira['CONTRATO'].to_numpy(),
+        'VALORPRIN_FIN': valor_principal,
+        'VALOR_FIN': np.round(valor_principal * rng.uniform(1.0, 2.5, n_linhas), 2),
+        'DTDEVOL_FIN': pd.Timestamp('2026-12-31') - pd.to_timedelta(rng.integers(0, 720, n_linhas), unit='D'),
+        'ATRASO_FIN': carteira['ATRASO'].to_numpy(),
+        'COD_CLI': carteira['COD_CLI'].to_numpy(),
+        'COD_CAR': carteira['COD_CAR'].to_numpy(),
+        'STATCONT_FIN': rng.choice(np.array([0, 1, 2], dtype=np.int8), n_linhas, p=[0.85, 0.1, 0.05]),
+        'DESC_CAR': 'CARTEIRA ' + descricao.to_numpy(dtype=object),
+    })
+    return compactar_tipos(df, 'cad_devf', relatorio=False)
+
+
+def gerar_discagens_expert(n_linhas, dt_ini=DATA_INICIAL_PADRAO, dias=DIAS_PADRAO, semente=SEMENTE_PADRAO):
+    """
+    Gera discagens do Expert (totalinfo), com CPFs discados várias vezes por dia
+
+    Args:
+        n_linhas (int): Quantidade de discagens
+        dt_ini (str): Primeiro dia
+        dias (int): Quantidade de dias
+        semente (int): Semente do gerador
+
+    Returns:
+        pd.DataFrame: Colunas de get_query_discagens
+    """
+    rng = np.random.default_rng(semente + 2)
+    # Em média ~3 discagens por CPF no dia
+    carteira = gerar_carteira(max(1, n_linhas // (3 * dias)), semente)
+    posicao = rng.integers(0, len(carteira), n_linhas)
+
+    grupos = np.array(list(GRUPO_OPERACAO) + [4000, 4100, 4500], dtype=np.int32)
+    pesos_grupos = np.array([5.0] * len(GRUPO_OPERACAO) + [1.0] * 3)
+
+    ddds = np.array([int(ddd) for ddd in DDD_ESTADO] + [0, 10], dtype=np.int8)
+    pesos_ddd = np.array([_PESO_DDD.get(ddd, 1) for ddd in DDD_ESTADO] + [1, 1], dtype=float)
+
+    atendida = rng.random(n_linhas) < 0.25
+    df = pd.DataFrame({
+        'DATA': _datas(rng, n_linhas, dt_ini, dias),
+        'id': np.arange(n_linhas, dtype=np.int64),
+        'CONTRATO': carteira['CONTRATO'].to_numpy()[posicao],
+        'CPF': carteira['CPF'].to_numpy()[posicao],
+        'ddd': rng.choice(ddds, n_linhas, p=pesos_ddd / pesos_ddd.sum()),
+        'fone': rng.integers(900_000_000, 999_999_999, n_linhas),
+        'GrupoPrincipal': rng.choice(grupos, n_linhas, p=pesos_grupos / pesos_grupos.sum()),
+        'UltCodSigRecPublica': rng.choice(np.array([16, 17, 18, 19, 21, 31, 41]), n_linhas),
+        'ResultadoClassificacao': rng.integers(0, 12, n_linhas),
+        'MotivoEncerramentoBilhete': rng.integers(0, 8, n_linhas),
+        'Instante200OKPub': np.where(atendida, rng.integers(1, 30_000, n_linhas), 0),
+        'Agente': np.where(atendida, rng.integers(1_000, 1_400, n_linhas), 0),
+        'tempoconversacao_ms': np.where(atendida, rng.integers(0, 600_000, n_linhas), 0).astype(np.int32),
+    })
+    return compactar_tipos(df, 'discagens_expert', relatorio=False)
+
+
+def gerar_discagens_trestto(n_linhas, dt_ini=DATA_INICIAL_PADRAO, dias=DIAS_PADRAO, semente=SEMENTE_PADRAO,
+                            contratos_mailing=None, fracao_no_mailing=0.9):
+    """
+    Gera DISCAGENS_TRESTTO, com CPFs repetidos no mesmo dia e a maior parte presente no mailing
+
+    Args:
+        n_linhas (int): Quantidade de linhas
+        dt_ini (str): Primeiro dia
+        dias (int): Quantidade de dias
+        semente (int): Semente do gerador
+        contratos_mailing (int, optional): Tamanho da carteira do mailing gerado junto.
+            Default: n_linhas / dias
+        fracao_no_mailing (float): Fração das linhas com CPF da carteira
+
+    Returns:
+        pd.DataFrame: Colunas de get_query_discagens_trestto
+    """
+    rng = np.random.default_rng(semente + 3)
+    carteira = gerar_carteira(contratos_mailing or max(1, n_linhas // dias), semente)
+    cpfs = carteira['CPF'].to_numpy()[rng.integers(0, len(carteira), n_linhas)]
+    fora = rng.random(n_linhas) >= fracao_no_mailing
+    cpfs[fora] = rng.integers(10_000_000_000, 99_999_999_999, fora.sum())
+
+    # Funil: DISCAGEM >= ALO >= CPC >= CPCA >= PROMESSA
+    alo = rng.random(n_linhas) < 0.35
+    cpc = alo & (rng.random(n_linhas) < 0.5)
+    cpca = cpc & (rng.random(n_linhas) < 0.6)
+    promessa = cpca & (rng.random(n_linhas) < 0.3)
+
+    df = pd.DataFrame({
+        'DATA': _datas(rng, n_linhas, dt_ini, dias),
+        'CPF': cpfs,
+        'SUBSTATUSURA': rng.choice(np.array(_SUBSTATUS_URA, dtype=object), n_linhas),
+        'TIPO': 'ROBÔ',
+        'DISCAGEM': rng.integers(1, 4, n_linhas),
+        'ALO': alo.astype(np.int64),
+        'CPC': cpc.astype(np.int64),
+        'CPCA': cpca.astype(np.int64),
+        'PROMESSA': promessa.astype(np.int64),
+    })
+    return compactar_tipos(df, 'discagens_trestto', relatorio=False)
+
+
+def gerar_tabulacao_aciona(n_linhas, semente=SEMENTE_PADRAO):
+    """
+    Gera ACIONAMENTO_CARTEIRA (tabulações com as flags CPC/CPCA/PROMESSA)
+
+    Args:
+        n_linhas (int): Quantidade de linhas
+        semente (int): Semente do gerador
+
+    Returns:
+        pd.DataFrame: Colunas de get_query_tabulacao_aciona
+    """
+    rng = np.random.default_rng(semente + 4)
+    tabulacao = rng.integers(0, len(_TABULACOES), n_linhas)
+    descricoes, cpc, cpca, promessa = (np.array(coluna) for coluna in zip(*_TABULACOES))
+    df = pd.DataFrame({
+        'COD_ACIONA': tabulacao + 1,
+        'DESC_ACIONA': descricoes[tabulacao].astype(object),
+        'CPC': cpc[tabulacao],
+        'CPCA': cpca[tabulacao],
+        'PROMESSA': promessa[tabulacao],
+    })
+    return compactar_tipos(df, 'tabulacao_aciona', relatorio=False)
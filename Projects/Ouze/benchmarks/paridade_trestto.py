@@ -0,0 +1,218 @@
+"""
+Paridade entre a consulta Trestto linha a linha e a consulta agregada no servidor
+
+Carrega DISCAGENS_TRESTTO sintética em um SQLite em memória (no lugar do SQL
+Server), executa get_query_discagens_trestto com agregar=False e agregar=True e
+compara a saída de tratar_discagens_trestto nos dois casos (em memória, fora de
+memória e por dia em processos). O ponto de partida é a implementação original
+(merge + dois groupby, tratar_discagens_trestto_referencia): todos os caminhos
+precisam reproduzir as mesmas linhas e valores dela.
+
+Uso (a partir de Projects/Ouze):
+    python -m benchmarks.paridade_trestto
+    python -m benchmarks.paridade_trestto --linhas 1M --dias 31
+
+Termina com código 1 se algum resultado divergir.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+import pandas as pd
+
+from benchmarks import dados_sinteticos
+from benchmarks.benchmark_tratamento import converter_tamanho
+from queries import get_query_discagens_trestto
+from src.compactacao import compactar_tipos
+from src.data_wrangling_discagens_trestto import (
+    COLUNAS_METRICAS,
+    eh_pre_agregado,
+    tratar_discagens_trestto,
+    tratar_discagens_trestto_fora_memoria,
+)
+from src.data_wrangling_mailingHist import MAPA_PRODUTO, adicionar_faixa_atraso, adicionar_produto
+from src.fetch_colunar import ler_sql_colunar
+from src.instrumentacao import configurar_logs
+from src.paralelo import executar_por_dia
+
+# ============================================
+# BASE SQLITE
+# ============================================
+
+def criar_base_sqlite(df_discagens_trestto):
+    """
+    Cria DISCAGENS_TRESTTO em um SQLite em memória (DATA como texto 'YYYY-MM-DD',
+    para que o BETWEEN das consultas funcione como no SQL Server)
+
+    Returns:
+        sqlite3.Connection: Conexão com a tabela carregada
+    """
+    # Datas das consultas parametrizadas no mesmo formato texto da coluna
+    sqlite3.register_adapter(date, date.isoformat)
+    conn = sqlite3.connect(':memory:')
+    df = df_discagens_trestto.astype({'SUBSTATUSURA': object, 'TIPO': object})
+    df['DATA'] = df['DATA'].dt.strftime('%Y-%m-%d')
+    df.to_sql('DISCAGENS_TRESTTO', conn, index=False)
+    return conn
+
+
+def ler_trestto(conn, dt_ini, dt_fim, agregar):
+    """Executa a consulta e aplica os mesmos tipos de src.extracao (DATA como data, esquema compactado)"""
+    df = ler_sql_colunar(get_query_discagens_trestto(dt_ini, dt_fim, agregar=agregar), conn)
+    df['DATA'] = pd.to_datetime(df['DATA'])
+    return compactar_tipos(df, 'discagens_trestto', relatorio=False)
+
+
+# ============================================
+# REFERÊNCIA (IMPLEMENTAÇÃO ORIGINAL)
+# ============================================
+
+def tratar_discagens_trestto_referencia(df, df_mailing_hist):
+    """
+    tratar_discagens_trestto como era antes das otimizações (cópia, merge e dois
+    groupby), com PRODUTO como texto como saía do np.select original
+    
+    Returns:
+        tuple: (df_esforco, df_unique)
+    """
+    df = df.copy()
+    df_mailing_hist = df_mailing_hist.copy()
+    
+    df['DATA'] = pd.to_datetime(df['DATA']).dt.date
+    df_mailing_hist['DATA'] = pd.to_datetime(df_mailing_hist['DATA']).dt.date
+    df['CPF'] = df['CPF'].astype(str)
+    df_mailing_hist['CPF'] = df_mailing_hist['CPF'].astype(str)
+    df_mailing_hist['PRODUTO'] = df_mailing_hist['PRODUTO'].astype(str)
+    
+    colunas_metricas = ['DISCAGEM', 'ALO', 'CPC', 'CPCA', 'PROMESSA']
+    df_consolidado = df.groupby(['DATA', 'CPF'], as_index=False)[colunas_metricas].sum()
+    df_join = df_consolidado.merge(
+        df_mailing_hist[['DATA', 'CPF', 'PRODUTO', 'FX_ATRASO']].drop_duplicates(),
+        on=['CPF', 'DATA'],
+        how='inner'
+    )
+    
+    df_esforco = df_join.groupby(['DATA', 'PRODUTO', 'FX_ATRASO'], as_index=False, observed=False)[colunas_metricas].sum()
+    
+    df_unique = df_join.copy()
+    for col in colunas_metricas:
+        df_unique[col] = (df_unique[col] > 0).astype(int)
+    df_unique = df_unique.groupby(['DATA', 'PRODUTO', 'FX_ATRASO'], as_index=False, observed=False)[colunas_metricas].sum()
+    
+    return df_esforco, df_unique
+
+
+def _normalizar_referencia(resultado):
+    """
+    Tipos da saída atual aplicados à referência (DATA datetime64, PRODUTO categórico,
+    métricas int64), para comparar só linhas e valores
+    """
+    normalizados = []
+    for df in resultado:
+        df = df.copy()
+        df['DATA'] = pd.to_datetime(df['DATA'])
+        df['PRODUTO'] = df['PRODUTO'].astype(MAPA_PRODUTO.dtype)
+        normalizados.append(df.astype({col: 'int64' for col in COLUNAS_METRICAS}))
+    return tuple(normalizados)
+
+
+# ============================================
+# COMPARAÇÃO
+# ============================================
+
+def _comparar(nome, esperado, obtido):
+    """Compara (df_esforco, df_unique); devolve a mensagem de divergência ou None"""
+    for tabela, df_esperado, df_obtido in zip(('esforco', 'unique'), esperado, obtido):
+        try:
+            df_obtido = df_obtido.astype({col: 'int64' for col in COLUNAS_METRICAS})
+            pd.testing.assert_frame_equal(df_esperado.reset_index(drop=True), df_obtido.reset_index(drop=True))
+        except AssertionError as erro:
+            return f"{nome} [{tabela}]: {erro}"
+    return None
+
+
+def verificar_paridade(n_linhas, dias, semente=dados_sinteticos.SEMENTE_PADRAO):
+    """
+    Executa todos os caminhos sobre a mesma base e compara com a referência
+
+    Returns:
+        list: Divergências encontradas (vazia se todos os caminhos batem)
+    """
+    dt_ini = dados_sinteticos.DATA_INICIAL_PADRAO
+    dt_fim = (pd.Timestamp(dt_ini) + pd.Timedelta(days=dias - 1)).strftime('%Y-%m-%d')
+    df_origem = dados_sinteticos.gerar_discagens_trestto(n_linhas, dt_ini, dias, semente)
+    df_mailing = adicionar_faixa_atraso(adicionar_produto(
+        dados_sinteticos.gerar_mailing_hist(n_linhas, dt_ini, dias, semente)
+    ))
+
+    conn = criar_base_sqlite(df_origem)
+    inicio = time.perf_counter()
+    df_linhas = ler_trestto(conn, dt_ini, dt_fim, agregar=False)
+    tempo_linhas = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    df_agregado = ler_trestto(conn, dt_ini, dt_fim, agregar=True)
+    tempo_agregado = time.perf_counter() - inicio
+    conn.close()
+
+    print(f"📥 Linha a linha: {len(df_linhas):,} linhas em {tempo_linhas:.2f}s | "
+          f"agregada: {len(df_agregado):,} linhas em {tempo_agregado:.2f}s")
+
+    divergencias = []
+    if eh_pre_agregado(df_linhas) or not eh_pre_agregado(df_agregado):
+        divergencias.append("eh_pre_agregado não reconhece a assinatura das consultas")
+
+    # Mailing sem um dos produtos: PRODUTO é categórico com todas as categorias do
+    # mapa, mas a saída só pode ter linhas dos produtos presentes (como a referência)
+    mailings = {
+        '': df_mailing,
+        ' (sem Outros)': df_mailing[df_mailing['PRODUTO'] != 'Outros'],
+    }
+    for sufixo, df_mailing_caso in mailings.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            esperado = _normalizar_referencia(tratar_discagens_trestto_referencia(df_linhas, df_mailing_caso))
+            caminhos = {
+                'linha a linha': lambda: tratar_discagens_trestto(df_linhas, df_mailing_caso),
+                'em memória': lambda: tratar_discagens_trestto(df_agregado, df_mailing_caso),
+                'fora de memória': lambda: tratar_discagens_trestto_fora_memoria(
+                    df_agregado, df_mailing_caso, n_particoes=4),
+                'por dia': lambda: executar_por_dia(
+                    tratar_discagens_trestto, df_agregado, df_mailing_caso, max_processos=2),
+                # Marcado como pré-agregado sem estar: precisa cair na consolidação normal
+                'pre_agregado indevido': lambda: tratar_discagens_trestto(
+                    df_linhas, df_mailing_caso, pre_agregado=True),
+            }
+            resultados = {nome + sufixo: caminho() for nome, caminho in caminhos.items()}
+
+        for nome, obtido in resultados.items():
+            divergencia = _comparar(nome, esperado, obtido)
+            print(f"{'❌' if divergencia else '✅'} {nome}")
+            if divergencia:
+                divergencias.append(divergencia)
+    return divergencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paridade da consulta Trestto agregada no servidor (SQLite)")
+    parser.add_argument('--linhas', default='200K', help="Linhas de DISCAGENS_TRESTTO. Ex: 200K, 1M")
+    parser.add_argument('--dias', type=int, default=dados_sinteticos.DIAS_PADRAO)
+    parser.add_argument('--semente', type=int, default=dados_sinteticos.SEMENTE_PADRAO)
+    args = parser.parse_args(argv)
+
+    configurar_logs(os.devnull)
+    divergencias = verificar_paridade(converter_tamanho(args.linhas), args.dias, args.semente)
+    if divergencias:
+        print("❌ Divergências:")
+        for divergencia in divergencias:
+            print(f"   {divergencia}")
+        return 1
+    print("✅ Todos os caminhos equivalentes à implementação original")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import argparse
+from datetime import date
+
+from queries import get_consultas_ouze
+from src.cache import CacheParquet
+from src.data_wrangling_acionamentos import tratar_acionamentos
+from src.data_wrangling_discagens_expert import tratar_base_discagens
+from src.data_wrangling_discagens_trestto import (
+    JoinTrestto,
+    juntar_discagens_trestto,
+    sketches_join_trestto,
+    tratar_join_trestto,
+)
+from src.data_wrangling_mailingHist import adicionar_valor_principal, tratar_base_mailing_hist
+from src.extracao import carregar_consulta
+from src.instrumentacao import gravar_metricas, iniciar_servidor_metricas
+from src.pipeline import Pipeline
+
+# ============================================
+# PIPELINE OUZE
+# ============================================
+# Extração: discagens_expert, cad_devf, mailing_hist, discagens_trestto, tabulacao_aciona
+# Tratamento:
+#   discagens_expert_tratado <- discagens_expert
+#   mailing_hist_tratado     <- mailing_hist
+#   mailing_hist_valor       <- mailing_hist_tratado + cad_devf (altera a entrada: recebe cópias)
+#   trestto_join             <- discagens_trestto + mailing_hist_tratado (join Trestto x mailing)
+#   trestto                  <- trestto_join (esforço e únicos)
+#   trestto_sketches         <- trestto_join (únicos mescláveis)
+#   acionamentos             <- tabulacao_aciona
+
+def montar_pipeline_ouze(dt_ini, dt_fim, agregar_trestto=True, cache_extracao=None, **kwargs):
+    """
+    Declara as etapas do Ouze (extrações e tratamentos) como um DAG
+
+    As extrações de períodos que incluem o dia de hoje (e as consultas sem filtro
+    de data: CAD_DEVF e tabulação) sempre executam, pois os dados ainda mudam; os
+    tratamentos seguintes só executam de novo se o conteúdo extraído mudou
+
+    As extrações com filtro de data leem pelo CacheParquet: numa execução do mês
+    corrente, só os dias que ainda não estão em disco (e o dia de hoje) vão ao servidor
+
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        agregar_trestto (bool): Extrai discagens_trestto já somada por DATA + CPF no servidor
+            (só DATA, CPF e métricas; tratar_discagens_trestto pula a consolidação)
+        cache_extracao (CacheParquet, optional): Cache por dia das extrações. Default: CacheParquet()
+        **kwargs: Repassados para Pipeline (diretorio, max_etapas_simultaneas)
+
+    Returns:
+        Pipeline: Pipeline pronto para executar
+    """
+    pipeline = Pipeline(**kwargs)
+    cache_extracao = CacheParquet() if cache_extracao is None else cache_extracao
+    periodo_fechado = dt_fim < date.today().isoformat()
+    sem_filtro_de_data = ('cad_devf', 'tabulacao_aciona')
+
+    for nome, consulta in get_consultas_ouze(dt_ini, dt_fim, agregar_trestto, por_periodo=True).items():
+        pipeline.adicionar(
+            nome, carregar_consulta,
+            parametros={'nome': nome, 'consulta': tuple(consulta), 'cache': cache_extracao},
+            usar_cache=periodo_fechado and nome not in sem_filtro_de_data,
+        )
+
+    pipeline.adicionar('discagens_expert_tratado', tratar_base_discagens, ['discagens_expert'])
+    pipeline.adicionar('mailing_hist_tratado', tratar_base_mailing_hist, ['mailing_hist'])
+    pipeline.adicionar('mailing_hist_valor', adicionar_valor_principal, ['mailing_hist_tratado', 'cad_devf'],
+                       altera_entradas=True)
+    pipeline.adicionar('trestto_join', juntar_discagens_trestto, ['discagens_trestto', 'mailing_hist_tratado'])
+    pipeline.adicionar('trestto', tratar_join_trestto, ['trestto_join'])
+    pipeline.adicionar('trestto_sketches', sketches_join_trestto, ['trestto_join'])
+    pipeline.adicionar('acionamentos', tratar_acionamentos, ['tabulacao_aciona'])
+    return pipeline
+
+
+def executar_pipeline_ouze(dt_ini, dt_fim, alvos=None, forcar=(), **kwargs):
+    """
+    Executa o pipeline do Ouze, reaproveitando as saídas das etapas que não mudaram
+
+    Uso (notebook):
+        saidas = executar_pipeline_ouze('2025-09-01', '2025-09-30')
+        df_trestto_esforco, df_trestto_unique = saidas['trestto']
+        df_unique_mes = saidas['trestto_sketches'].rollup(['PRODUTO'], periodo='M')
+
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        alvos (list, optional): Etapas pedidas. Default: todas
+        forcar (list): Etapas que executam mesmo com saída salva
+
+    Returns:
+        dict: nome da etapa -> saída
+    """
+    return montar_pipeline_ouze(dt_ini, dt_fim, **kwargs).executar(alvos=alvos, forcar=forcar)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa o pipeline Ouze")
+    parser.add_argument("dt_ini", help="Data inicial (YYYY-MM-DD)")
+    parser.add_argument("dt_fim", help="Data final (YYYY-MM-DD)")
+    parser.add_argument("--alvos", nargs="*", help="Etapas pedidas (default: todas)")
+    parser.add_argument("--forcar", nargs="*", default=[], help="Etapas que executam mesmo com saída salva")
+    parser.add_argument("--porta-metricas", type=int, help="Expõe as métricas Prometheus nesta porta durante a execução")
+    parser.add_argument("--arquivo-metricas", help="Grava as métricas (.prom) ao final, para o textfile collector")
+    args = parser.parse_args()
+
+    if args.porta_metricas:
+        iniciar_servidor_metricas(args.porta_metricas)
+
+    saidas = executar_pipeline_ouze(args.dt_ini, args.dt_fim, alvos=args.alvos, forcar=args.forcar)
+    for nome, saida in saidas.items():
+        if isinstance(saida, JoinTrestto):
+            tamanhos = [len(saida.segmentos)]
+        else:
+            tamanhos = [len(parte) for parte in saida] if isinstance(saida, tuple) else [len(saida)]
+        print(f"✓ {nome}: {' | '.join(f'{tamanho:,}' for tamanho in tamanhos)} linhas")
+
+    if args.arquivo_metricas:
+        gravar_metricas(args.arquivo_metricas)
@@ -1,28 +1,76 @@
-from datetime import datetime
+from collections import namedtuple
+from datetime import datetime, timedelta
 
-def get_query_discagens(dt_ini, dt_fim):
+# Consulta parametrizada: texto com placeholders `?` e os valores na mesma ordem.
+# O texto não muda com o período, então o SQL Server compila o plano uma vez só
+# (src.fetch_colunar.ler_sql_colunar aceita tanto ConsultaSQL quanto texto puro)
+ConsultaSQL = namedtuple('ConsultaSQL', ['sql', 'params'])
+
+# Consulta de período ainda não montada: quem executa decide se monta o texto
+# (construtor(dt_ini, dt_fim, **parametros)) ou se lê dia a dia pelo cache
+# (src.extracao.carregar_em_paralelo com cache=src.cache.CacheParquet)
+ConsultaPeriodo = namedtuple('ConsultaPeriodo', ['construtor', 'dt_ini', 'dt_fim', 'parametros'])
+
+def _data(texto):
+    """'YYYY-MM-DD' -> datetime.date (ValueError para qualquer outro texto)"""
+    return datetime.strptime(texto, '%Y-%m-%d').date()
+
+def _literal_sql(texto):
+    """Texto como literal T-SQL entre aspas simples (aspas internas duplicadas)"""
+    return "'" + texto.replace("'", "''") + "'"
+
+def gerar_shards_discagens(dt_ini, dt_fim, granularidade='dia'):
     """
-    Retorna a query SQL para buscar discagens com período parametrizado
+    Divide o período em shards que nunca atravessam a virada de mês
+    (cada mês fica em uma tabela totalinfo_YYYY_MM diferente)
     
     Args:
         dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
         dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        granularidade (str): 'dia' (um shard por dia) ou 'mes' (um shard por mês)
     
     Returns:
-        str: Query SQL formatada com as datas e tabela dinâmica
+        list: Lista de tuplas (dt_ini, dt_fim) no formato 'YYYY-MM-DD'
     """
-    # Converter a data inicial para extrair ano e mês
-    data_obj = datetime.strptime(dt_ini, '%Y-%m-%d')
-    ano = data_obj.year
-    mes = data_obj.strftime('%m')  # Formato com zero à esquerda (01, 02, etc.)
+    if granularidade not in ('dia', 'mes'):
+        raise ValueError(f"Granularidade inválida: {granularidade} (use 'dia' ou 'mes')")
     
-    # Gerar nome da tabela dinamicamente
-    tabela = f"totalinfo_{ano}_{mes}"
+    inicio = datetime.strptime(dt_ini, '%Y-%m-%d').date()
+    fim = datetime.strptime(dt_fim, '%Y-%m-%d').date()
     
-    query = f"""
-    SELECT 
-        * 
-    FROM OPENQUERY (EXPERT,'
+    shards = []
+    atual = inicio
+    while atual <= fim:
+        if granularidade == 'dia':
+            fim_shard = atual
+        else:
+            proximo_mes = (atual.replace(day=28) + timedelta(days=4)).replace(day=1)
+            fim_shard = min(fim, proximo_mes - timedelta(days=1))
+        shards.append((atual.strftime('%Y-%m-%d'), fim_shard.strftime('%Y-%m-%d')))
+        atual = fim_shard + timedelta(days=1)
+    return shards
+
+def _get_query_discagens_mes(dt_ini, dt_fim):
+    """
+    Retorna a query OPENQUERY de discagens para um período dentro de um único mês
+    
+    O filtro de data vai dentro do OPENQUERY (intervalo em A.instante, equivalente a
+    DATE(A.instante) BETWEEN dt_ini AND dt_fim), então apenas os dias pedidos
+    atravessam o linked server
+    
+    OPENQUERY só aceita um literal como texto remoto (sem `?` nem variáveis), então
+    esta é a única parte montada dinamicamente: datas validadas (_data), tabela
+    derivada delas e o texto remoto escapado como literal T-SQL (_literal_sql)
+    """
+    inicio = _data(dt_ini)
+    
+    # Gerar nome da tabela dinamicamente (mês com zero à esquerda: 01, 02, etc.)
+    tabela = f"totalinfo_{inicio.year}_{inicio.month:02d}"
+    
+    # Limite superior exclusivo: dia seguinte ao dt_fim
+    fim_exclusivo = _data(dt_fim) + timedelta(days=1)
+    
+    query_remota = f"""
     SELECT
         DATE(A.instante) DATA,
         A.id,
@@ -38,11 +86,39 @@ def get_query_discagens(dt_ini, dt_fim):
         A.Agente,
         A.tempoconversacao_ms
     FROM {tabela} A
-    WHERE A.GrupoPrincipal IN (SELECT G.id_grupo FROM grupo G WHERE G.ID_CAMPANHA IN (19, 30))
-    ')
+    WHERE A.instante >= '{inicio:%Y-%m-%d}'
+    AND A.instante < '{fim_exclusivo:%Y-%m-%d}'
+    AND A.GrupoPrincipal IN (SELECT G.id_grupo FROM grupo G WHERE G.ID_CAMPANHA IN (19, 30))
+    """
+    
+    query = f"""
+    SELECT 
+        * 
+    FROM OPENQUERY (EXPERT, {_literal_sql(query_remota)})
     """
     return query
 
+def get_query_discagens(dt_ini, dt_fim):
+    """
+    Retorna a query SQL para buscar discagens com período parametrizado
+    
+    Períodos que atravessam meses geram um UNION ALL com uma OPENQUERY por
+    tabela totalinfo_YYYY_MM. Para buscar os shards em paralelo, usar
+    gerar_shards_discagens + src.extracao.carregar_discagens_em_shards
+    
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+    
+    Returns:
+        ConsultaSQL: (sql, ()) — as datas ficam no texto remoto do OPENQUERY
+    """
+    partes = [
+        _get_query_discagens_mes(ini, fim)
+        for ini, fim in gerar_shards_discagens(dt_ini, dt_fim, granularidade='mes')
+    ]
+    return ConsultaSQL("\n    UNION ALL\n".join(partes), ())
+
 def get_query_mailing_hist(dt_ini, dt_fim):
     """
     Retorna a query SQL para buscar mailing_hist com período parametrizado
@@ -52,9 +128,9 @@ def get_query_mailing_hist(dt_ini, dt_fim):
         dt_fim (str): Data final no formato 'YYYY-MM-DD'
     
     Returns:
-        str: Query SQL formatada com as datas
+        ConsultaSQL: (sql, (dt_ini, dt_fim)) com as datas como parâmetros `?`
     """
-    query = f"""
+    query = """
     SELECT 
         DATA,
         CONTRATO,
@@ -63,10 +139,10 @@ def get_query_mailing_hist(dt_ini, dt_fim):
         COD_CLI,
         COD_CAR
     FROM MAILING_HIST 
-    WHERE DATA BETWEEN '{dt_ini}' AND '{dt_fim}'
+    WHERE DATA BETWEEN ? AND ?
     AND COD_CLI IN(196,198,228)
     """
-    return query
+    return ConsultaSQL(query, (_data(dt_ini), _data(dt_fim)))
 
 def get_query_cad_devf():
     """
@@ -75,7 +151,7 @@ def get_query_cad_devf():
     Esta query não necessita de parâmetros de data pois busca o cadastro atual
     
     Returns:
-        str: Query SQL
+        ConsultaSQL: (sql, ()) — consulta sem parâmetros
     """
     query = """
     SELECT 
@@ -95,20 +171,42 @@ def get_query_cad_devf():
        OR (D.COD_CLI = 196 AND D.COD_CAR IN (1,3,4)) 
        OR (D.COD_CLI = 228 AND D.COD_CAR = 2)
     """
-    return query
+    return ConsultaSQL(query, ())
 
-def get_query_discagens_trestto(dt_ini, dt_fim):
+def get_query_discagens_trestto(dt_ini, dt_fim, agregar=False):
     """
     Retorna a query SQL para buscar discagens do Trestto (Robô)
     
+    Com agregar=True a consolidação por DATA + CPF é feita no servidor (GROUP BY com
+    SUM das métricas) e só as colunas usadas em tratar_discagens_trestto são trazidas:
+    uma linha por CPF por dia, em vez de uma linha por evento
+    
     Args:
         dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
         dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        agregar (bool): Se True, devolve DATA, CPF e as métricas somadas por DATA + CPF
     
     Returns:
-        str: Query SQL formatada com as datas
+        ConsultaSQL: (sql, (dt_ini, dt_fim)) com as datas como parâmetros `?`
     """
-    query = f"""
+    params = (_data(dt_ini), _data(dt_fim))
+    if agregar:
+        query = """
+    SELECT  
+        DATA, 
+        CPF, 
+        SUM(DISCAGEM) DISCAGEM, 
+        SUM(ALO) ALO, 
+        SUM(CPC) CPC, 
+        SUM(CPCA) CPCA, 
+        SUM(PROMESSA) PROMESSA  
+    FROM DISCAGENS_TRESTTO 
+    WHERE DATA BETWEEN ? AND ?
+    GROUP BY DATA, CPF
+    """
+        return ConsultaSQL(query, params)
+    
+    query = """
     SELECT  
         DATA, 
         CPF, 
@@ -120,12 +218,65 @@ def get_query_discagens_trestto(dt_ini, dt_fim):
         CPCA, 
         PROMESSA  
     FROM DISCAGENS_TRESTTO 
-    WHERE DATA BETWEEN '{dt_ini}' AND '{dt_fim}'
+    WHERE DATA BETWEEN ? AND ?
     """
-    return query
+    return ConsultaSQL(query, params)
+
+def get_query_resumo_discagens_trestto(dt_ini, dt_fim):
+    """
+    Retorna a query SQL com a impressão digital diária de DISCAGENS_TRESTTO
+    (quantidade de linhas e checksum por DATA), usada para detectar dias alterados
+    
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+    
+    Returns:
+        ConsultaSQL: (sql, (dt_ini, dt_fim)) com as datas como parâmetros `?`
+    """
+    query = """
+    SELECT 
+        DATA,
+        COUNT(*) QTD,
+        CHECKSUM_AGG(CHECKSUM(CPF, DISCAGEM, ALO, CPC, CPCA, PROMESSA)) CHECKSUM
+    FROM DISCAGENS_TRESTTO 
+    WHERE DATA BETWEEN ? AND ?
+    GROUP BY DATA
+    """
+    return ConsultaSQL(query, (_data(dt_ini), _data(dt_fim)))
+
+def get_query_resumo_mailing_hist(dt_ini, dt_fim):
+    """
+    Retorna a query SQL com a impressão digital diária de MAILING_HIST
+    (quantidade de linhas e checksum por DATA), usada para detectar dias alterados
+    
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+    
+    Returns:
+        ConsultaSQL: (sql, (dt_ini, dt_fim)) com as datas como parâmetros `?`
+    """
+    query = """
+    SELECT 
+        DATA,
+        COUNT(*) QTD,
+        CHECKSUM_AGG(CHECKSUM(CONTRATO, CPF, ATRASO, COD_CLI, COD_CAR)) CHECKSUM
+    FROM MAILING_HIST 
+    WHERE DATA BETWEEN ? AND ?
+    AND COD_CLI IN(196,198,228)
+    GROUP BY DATA
+    """
+    return ConsultaSQL(query, (_data(dt_ini), _data(dt_fim)))
 
 def get_query_tabulacao_aciona():
-    query = f"""
+    """
+    Retorna a query SQL com a tabulação dos acionamentos (CPC, CPCA e PROMESSA por código)
+    
+    Returns:
+        ConsultaSQL: (sql, ()) — consulta sem parâmetros
+    """
+    query = """
         SELECT 
             COD_ACIONA,
             DESC_ACIONA,
@@ -135,4 +286,31 @@ def get_query_tabulacao_aciona():
         FROM ACIONAMENTO_CARTEIRA
         WHERE COD_CLI = 196
     """
-    return query
\ No newline at end of file
+    return ConsultaSQL(query, ())
+
+def get_consultas_ouze(dt_ini, dt_fim, agregar_trestto=False, por_periodo=False):
+    """
+    Retorna as consultas da etapa de extração com o servidor e banco de cada uma
+
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        agregar_trestto (bool): Se True, discagens_trestto já vem somada por DATA + CPF
+        por_periodo (bool): Se True, as consultas com filtro de data vêm como ConsultaPeriodo
+            (ainda não montadas), para serem lidas dia a dia pelo cache da extração
+
+    Returns:
+        dict: nome -> (server_var, database_var, query), no formato de src.extracao.carregar_em_paralelo
+    """
+    def periodo(construtor, **parametros):
+        if por_periodo:
+            return ConsultaPeriodo(construtor, dt_ini, dt_fim, parametros)
+        return construtor(dt_ini, dt_fim, **parametros)
+
+    return {
+        'discagens_expert': ("SERVER_SRC", "DATABASE_SRC", periodo(get_query_discagens)),
+        'cad_devf': ("SERVER_SRC", "DATABASE_SRC", get_query_cad_devf()),
+        'mailing_hist': ("SERVER_BD2", "DATABASE_BD2", periodo(get_query_mailing_hist)),
+        'discagens_trestto': ("SERVER_BD2", "DATABASE_TRC", periodo(get_query_discagens_trestto, agregar=agregar_trestto)),
+        'tabulacao_aciona': ("SERVER_BD2", "DATABASE_BD2", get_query_tabulacao_aciona()),
+    }
\ No newline at end of file
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from src.sketches import ERRO_RELATIVO_PADRAO, SketchesUnicos
+
+# ============================================
+# AGREGADORES INCREMENTAIS
+# ============================================
+# Recebem o resultado bloco a bloco (ver src/extracao.ler_em_chunks) e mantêm
+# apenas o parcial agregado, cujo tamanho depende da quantidade de grupos e
+# não da quantidade de linhas lidas.
+
+class AgregadorSoma:
+    """Soma colunas (e conta linhas) por chaves de agrupamento, bloco a bloco"""
+
+    def __init__(self, chaves, colunas_soma=None, nome_contagem='QTD'):
+        """
+        Args:
+            chaves (list): Colunas de agrupamento (ex: ['DATA', 'OPERACAO'])
+            colunas_soma (list, optional): Colunas numéricas a serem somadas
+            nome_contagem (str, optional): Nome da coluna com a contagem de linhas.
+                                           None para não contar linhas
+        """
+        self.chaves = list(chaves)
+        self.colunas_soma = list(colunas_soma or [])
+        self.nome_contagem = nome_contagem
+        self._parcial = None
+
+    def atualizar(self, df):
+        """
+        Incorpora um bloco ao parcial agregado
+
+        Args:
+            df (pd.DataFrame): Bloco já tratado
+        """
+        grupos = df.groupby(self.chaves, observed=True)
+        parcial = grupos[self.colunas_soma].sum() if self.colunas_soma else None
+        if self.nome_contagem:
+            contagem = grupos.size().rename(self.nome_contagem)
+            parcial = contagem.to_frame() if parcial is None else parcial.join(contagem)
+
+        if self._parcial is None:
+            self._parcial = parcial
+        else:
+            self._parcial = (
+                pd.concat([self._parcial, parcial])
+                .groupby(level=self.chaves, observed=True)
+                .sum()
+            )
+
+    def resultado(self):
+        """
+        Returns:
+            pd.DataFrame: Agregado final com as chaves como colunas
+        """
+        if self._parcial is None:
+            colunas = self.chaves + self.colunas_soma
+            if self.nome_contagem:
+                colunas.append(self.nome_contagem)
+            return pd.DataFrame(columns=colunas)
+        return self._parcial.reset_index()
+
+
+class AgregadorDistintos:
+    """
+    Conta valores distintos de uma coluna por chaves de agrupamento, bloco a bloco
+
+    O parcial é um SketchesUnicos por grupo: no modo HyperLogLog (padrão) a memória
+    é fixa por grupo (2^p bytes, ver src.sketches.precisao_para_erro), qualquer que
+    seja a quantidade de valores distintos; no modo exato ficam os pares
+    (grupo, chave int64 do valor), que crescem com os distintos
+    """
+
+    def __init__(self, chaves, coluna, nome_resultado=None, erro_relativo=ERRO_RELATIVO_PADRAO, exato=False):
+        """
+        Args:
+            chaves (list): Colunas de agrupamento (ex: ['ESTADO'])
+            coluna (str): Coluna cujos valores distintos serão contados (ex: 'CPF')
+            nome_resultado (str, optional): Nome da coluna de saída. Default: 'QTD_{coluna}_DISTINTOS'
+            erro_relativo (float, optional): Erro padrão da contagem no modo HyperLogLog
+            exato (bool, optional): Se True, contagem exata (memória proporcional aos distintos)
+        """
+        self.chaves = list(chaves)
+        self.coluna = coluna
+        self.nome_resultado = nome_resultado or f'QTD_{coluna}_DISTINTOS'
+        self.erro_relativo = erro_relativo
+        self.exato = exato
+        self._sketches = None
+
+    def atualizar(self, df):
+        """
+        Incorpora um bloco mesclando os sketches dele aos dos blocos anteriores
+
+        Args:
+            df (pd.DataFrame): Bloco já tratado
+        """
+        presencas = df[self.coluna].notna().to_numpy()[:, np.newaxis]
+        sketches = SketchesUnicos.construir(df[self.chaves], df[self.coluna], presencas, [self.nome_resultado],
+                                            erro_relativo=self.erro_relativo, exato=self.exato)
+        self._sketches = sketches if self._sketches is None else self._sketches.mesclar(sketches)
+
+    def resultado(self):
+        """
+        Returns:
+            pd.DataFrame: Contagem de distintos por chave (estimada no modo HyperLogLog)
+        """
+        if self._sketches is None:
+            return pd.DataFrame(columns=self.chaves + [self.nome_resultado])
+        return self._sketches.rollup(self.chaves)
@@ -0,0 +1,274 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from src.compactacao import compactar_tipos
+from src.fetch_colunar import ler_sql_colunar
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+DIRETORIO_CACHE_PADRAO = os.getenv('OUZE_CACHE_DIR', '.cache_ouze')
+TAMANHO_MAXIMO_PADRAO_MB = int(os.getenv('OUZE_CACHE_MAX_MB', 5 * 1024))
+
+# Datas fixas usadas só para gerar o texto da consulta que entra na chave do cache
+DATA_ASSINATURA = '1900-01-01'
+
+# Arquivos gravados pelo cache (o limite de tamanho só remove estes)
+_PADRAO_DIRETORIO_CONSULTA = re.compile(r'^.+_[0-9a-f]{12}$')
+_PADRAO_ARQUIVO_CACHE = re.compile(r'^(DATA=\d{4}-\d{2}-\d{2}|SNAPSHOT_\d+)\.parquet$')
+
+# ============================================
+# CACHE EM DISCO (PARQUET)
+# ============================================
+
+class CacheParquet:
+    """
+    Cache local do resultado das extrações, particionado por fonte e por dia
+
+    Estrutura em disco:
+        <diretorio>/<fonte>/<construtor>_<hash da consulta>/DATA=YYYY-MM-DD.parquet
+
+    O hash é do texto SQL gerado pelo construtor e dos parâmetros: mudar a query em
+    queries.py muda o diretório, e as partições da versão antiga deixam de ser lidas
+
+    O tamanho total é limitado por `tamanho_maximo_mb`; ao ultrapassar, as partições
+    acessadas há mais tempo são removidas primeiro (LRU pelo mtime do arquivo). Só
+    entram na conta os arquivos dessa estrutura: outros módulos que usam o mesmo
+    diretório raiz (ex: pipeline/, indice_contratos/) não têm arquivos removidos
+    """
+
+    def __init__(self, diretorio=DIRETORIO_CACHE_PADRAO, tamanho_maximo_mb=TAMANHO_MAXIMO_PADRAO_MB):
+        """
+        Args:
+            diretorio (str): Diretório raiz do cache
+            tamanho_maximo_mb (int): Tamanho máximo do cache em MB
+        """
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo_mb * 1024 * 1024
+        self._lock = threading.Lock()
+
+    def diretorio_consulta(self, fonte, construtor, parametros, periodo=True):
+        """
+        Retorna o diretório da consulta (texto SQL + parâmetros) dentro da fonte
+
+        O construtor é chamado com datas fixas (DATA_ASSINATURA) só para obter o
+        texto da query: qualquer mudança no SQL gerado muda o diretório
+
+        Args:
+            fonte (str): Nome da fonte (ex: 'SRC', 'BD2', 'TRC')
+            construtor (callable): Função de queries.py que gera a query
+            parametros (dict): Parâmetros adicionais do construtor (exceto datas)
+            periodo (bool): Se o construtor recebe (dt_ini, dt_fim). False para snapshots
+
+        Returns:
+            str: Caminho do diretório
+        """
+        datas = (DATA_ASSINATURA, DATA_ASSINATURA) if periodo else ()
+        assinatura = repr((construtor(*datas, **parametros), sorted(parametros.items())))
+        chave = hashlib.sha1(assinatura.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.diretorio, fonte, f"{construtor.__name__}_{chave}")
+
+    @staticmethod
+    def _arquivo_dia(diretorio, dia):
+        return os.path.join(diretorio, f"DATA={dia.strftime('%Y-%m-%d')}.parquet")
+
+    def ler_dia(self, diretorio, dia):
+        """Lê a partição do dia ou retorna None se não estiver em cache"""
+        return self.ler_arquivo(self._arquivo_dia(diretorio, dia))
+
+    def gravar_dia(self, diretorio, dia, df):
+        """Grava a partição do dia"""
+        self.gravar_arquivo(self._arquivo_dia(diretorio, dia), df)
+
+    def ler_arquivo(self, caminho):
+        """Lê um arquivo do cache, marcando-o como usado recentemente"""
+        try:
+            df = pd.read_parquet(caminho)
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        return df
+
+    def gravar_arquivo(self, caminho, df):
+        """
+        Grava um arquivo no cache de forma atômica
+
+        A política de tamanho não é aplicada aqui: quem grava chama aplicar_limite()
+        uma vez ao final da leitura (ler_com_cache, ler_snapshot_com_cache)
+        """
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, caminho)
+
+    def _arquivos_do_cache(self):
+        """Arquivos gravados pelo cache: <fonte>/<construtor>_<hash>/(DATA=...|SNAPSHOT_...).parquet"""
+        if not os.path.isdir(self.diretorio):
+            return
+        for fonte in os.scandir(self.diretorio):
+            if not fonte.is_dir():
+                continue
+            for consulta in os.scandir(fonte.path):
+                if not consulta.is_dir() or not _PADRAO_DIRETORIO_CONSULTA.match(consulta.name):
+                    continue
+                for arquivo in os.scandir(consulta.path):
+                    if arquivo.is_file() and _PADRAO_ARQUIVO_CACHE.match(arquivo.name):
+                        yield arquivo.path
+
+    def aplicar_limite(self):
+        """Remove as partições menos usadas até o cache caber no tamanho máximo"""
+        with self._lock:
+            arquivos = []
+            for caminho in self._arquivos_do_cache():
+                try:
+                    info = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_mtime, info.st_size, caminho))
+
+            total = sum(tamanho for _, tamanho, _ in arquivos)
+            for _, tamanho, caminho in sorted(arquivos):
+                if total <= self.tamanho_maximo:
+                    break
+                try:
+                    os.remove(caminho)
+                except FileNotFoundError:
+                    pass
+                total -= tamanho
+
+# ============================================
+# LEITURA COM CACHE
+# ============================================
+
+def dias_do_periodo(dt_ini, dt_fim):
+    """Lista os dias (datetime.date) entre dt_ini e dt_fim, inclusive"""
+    inicio = datetime.strptime(dt_ini, '%Y-%m-%d').date()
+    fim = datetime.strptime(dt_fim, '%Y-%m-%d').date()
+    return [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+
+
+def agrupar_intervalos(dias):
+    """Agrupa dias em intervalos contínuos [(ini, fim), ...]"""
+    intervalos = []
+    for dia in dias:
+        if intervalos and dia - intervalos[-1][1] == timedelta(days=1):
+            intervalos[-1][1] = dia
+        else:
+            intervalos.append([dia, dia])
+    return [(ini, fim) for ini, fim in intervalos]
+
+
+def ler_com_cache(cache, fonte, construtor, conn, dt_ini, dt_fim, coluna_data='DATA', esquema=None, **parametros):
+    """
+    Lê o período usando o cache: dias passados já em cache vêm do disco
+    e apenas os dias faltantes são consultados no SQL Server
+
+    O dia corrente (e futuros) nunca é gravado, pois ainda pode mudar
+
+    Args:
+        cache (CacheParquet): Cache a ser usado
+        fonte (str): Nome da fonte (ex: 'SRC', 'BD2', 'TRC')
+        construtor (callable): Função de queries.py no formato construtor(dt_ini, dt_fim, **parametros),
+            que devolve a query em texto ou (sql, params)
+        conn: Conexão pyodbc da fonte
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        coluna_data (str): Coluna do resultado usada para particionar por dia
+        esquema (str | dict, optional): Esquema de src.compactacao aplicado ao resultado
+        **parametros: Parâmetros adicionais repassados ao construtor
+
+    Returns:
+        pd.DataFrame: Resultado do período completo
+    """
+    diretorio = cache.diretorio_consulta(fonte, construtor, parametros)
+    dias = dias_do_periodo(dt_ini, dt_fim)
+    hoje = date.today()
+
+    partes = {}
+    for dia in dias:
+        if dia < hoje:
+            df_dia = cache.ler_dia(diretorio, dia)
+            if df_dia is not None:
+                partes[dia] = df_dia
+
+    faltantes = [dia for dia in dias if dia not in partes]
+    print(f"💾 Cache {construtor.__name__}: {len(partes)} dia(s) em disco | {len(faltantes)} dia(s) no servidor")
+
+    colunas = None
+    for ini, fim in agrupar_intervalos(faltantes):
+        df = ler_sql_colunar(
+            construtor(ini.strftime('%Y-%m-%d'), fim.strftime('%Y-%m-%d'), **parametros),
+            conn
+        )
+        colunas = df.columns
+        dia_linha = pd.to_datetime(df[coluna_data]).dt.date
+        grupos = dict(tuple(df.groupby(dia_linha, sort=False)))
+
+        dia = ini
+        while dia <= fim:
+            df_dia = grupos.get(dia, df.iloc[0:0]).reset_index(drop=True)
+            partes[dia] = df_dia
+            if dia < hoje:
+                cache.gravar_dia(diretorio, dia, df_dia)
+            dia += timedelta(days=1)
+    if faltantes:
+        cache.aplicar_limite()
+
+    if not partes:
+        return pd.DataFrame(columns=colunas)
+    df = pd.concat([partes[dia] for dia in dias], ignore_index=True)
+    if esquema is not None:
+        compactar_tipos(df, esquema)
+    return df
+
+
+def ler_snapshot_com_cache(cache, fonte, construtor, conn, validade_horas=24, esquema=None, **parametros):
+    """
+    Lê uma consulta sem período (ex: get_query_cad_devf) usando o cache
+
+    Args:
+        cache (CacheParquet): Cache a ser usado
+        fonte (str): Nome da fonte (ex: 'SRC')
+        construtor (callable): Função de queries.py no formato construtor(**parametros)
+        conn: Conexão pyodbc da fonte
+        validade_horas (float): Idade máxima do snapshot em cache
+        esquema (str | dict, optional): Esquema de src.compactacao aplicado ao resultado
+        **parametros: Parâmetros repassados ao construtor
+
+    Returns:
+        pd.DataFrame: Resultado da consulta
+    """
+    diretorio = cache.diretorio_consulta(fonte, construtor, parametros, periodo=False)
+    snapshots = []
+    if os.path.isdir(diretorio):
+        snapshots = sorted(
+            int(nome[len('SNAPSHOT_'):-len('.parquet')])
+            for nome in os.listdir(diretorio)
+            if nome.startswith('SNAPSHOT_') and nome.endswith('.parquet')
+        )
+
+    if snapshots:
+        idade_horas = (time.time() - snapshots[-1]) / 3600
+        if idade_horas <= validade_horas:
+            df = cache.ler_arquivo(os.path.join(diretorio, f"SNAPSHOT_{snapshots[-1]}.parquet"))
+            if df is not None:
+                print(f"💾 Cache {construtor.__name__}: snapshot em disco ({idade_horas:.1f}h)")
+                return df if esquema is None else compactar_tipos(df, esquema)
+
+    print(f"💾 Cache {construtor.__name__}: snapshot no servidor")
+    df = ler_sql_colunar(construtor(**parametros), conn)
+    cache.gravar_arquivo(os.path.join(diretorio, f"SNAPSHOT_{int(time.time())}.parquet"), df)
+    for antigo in snapshots:
+        try:
+            os.remove(os.path.join(diretorio, f"SNAPSHOT_{antigo}.parquet"))
+        except FileNotFoundError:
+            pass
+    cache.aplicar_limite()
+    return df if esquema is None else compactar_tipos(df, esquema)
@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+# ============================================
+# ESQUEMAS DE COMPACTAÇÃO
+# ============================================
+# 'category' -> rótulos de baixa cardinalidade
+# 'chave'    -> CPF/contrato: sempre int64 (ver chave_int64), independente dos valores do lote
+# 'int8', 'int16', 'int32' -> flags, códigos e contagens (só aplica se todos os valores couberem)
+#
+# CPF e contrato precisam ser compactados com o mesmo esquema em todas as bases
+# que serão cruzadas, para que as chaves continuem com o mesmo tipo dos dois lados.
+
+ESQUEMAS = {
+    'discagens_expert': {
+        'CPF': 'chave',
+        'CONTRATO': 'chave',
+        'ddd': 'int8',
+        'GrupoPrincipal': 'int32',
+        'tempoconversacao_ms': 'int32',
+        'OPERACAO': 'category',
+        'ESTADO': 'category',
+        'ORIGEM': 'category',
+    },
+    'mailing_hist': {
+        'CPF': 'chave',
+        'CONTRATO': 'chave',
+        'ATRASO': 'int32',
+        'COD_CLI': 'int16',
+        'COD_CAR': 'int16',
+        'PRODUTO': 'category',
+        'FX_ATRASO': 'category',
+    },
+    'discagens_trestto': {
+        'CPF': 'chave',
+        'SUBSTATUSURA': 'category',
+        'TIPO': 'category',
+        'DISCAGEM': 'int32',
+        'ALO': 'int32',
+        'CPC': 'int32',
+        'CPCA': 'int32',
+        'PROMESSA': 'int32',
+    },
+    'cad_devf': {
+        'CPF_DEV': 'chave',
+        'CONTRATO_FIN': 'chave',
+        'ATRASO_FIN': 'int32',
+        'COD_CLI': 'int16',
+        'COD_CAR': 'int16',
+        'STATCONT_FIN': 'int8',
+        'DESC_CAR': 'category',
+    },
+    'tabulacao_aciona': {
+        'COD_ACIONA': 'int32',
+        'DESC_ACIONA': 'category',
+        'CPC': 'int8',
+        'CPCA': 'int8',
+        'PROMESSA': 'int8',
+    },
+}
+
+# Maior quantidade de dígitos que sempre cabe em int64
+_MAX_DIGITOS_CHAVE = 18
+
+# Chave dos valores nulos; os demais valores fora do formato numérico ficam abaixo dela
+CHAVE_NULA = -1
+
+# ============================================
+# FUNÇÕES DE COMPACTAÇÃO
+# ============================================
+
+def _compactar_inteiro(serie, tipo):
+    """Converte para o inteiro pedido se não houver nulos, decimais ou estouro; senão None"""
+    if pd.api.types.is_bool_dtype(serie):
+        serie = serie.astype(np.int8)
+    elif not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    if serie.isna().any():
+        return None
+
+    valores = serie.to_numpy()
+    if valores.dtype.kind == 'f' and not np.array_equal(valores, np.floor(valores)):
+        return None
+
+    limites = np.iinfo(tipo)
+    if len(valores) and (valores.min() < limites.min or valores.max() > limites.max):
+        return None
+    return serie.astype(tipo)
+
+
+def chave_int64(serie):
+    """
+    Converte CPF/contrato para int64 com a mesma regra para qualquer lote
+
+    - só dígitos (até 18, espaços nas pontas ignorados) -> o número ('00123' e 123 -> 123)
+    - nulo -> CHAVE_NULA (-1)
+    - qualquer outro valor -> hash negativo do texto (abaixo de -1): textos iguais
+      continuam com a mesma chave e nunca colidem com um número válido
+
+    Assim a coluna é int64 em todas as bases, e o join compara as mesmas chaves dos
+    dois lados mesmo quando só um deles tem valores fora do formato
+
+    Args:
+        serie (pd.Series): CPF/contrato em texto, inteiro ou float
+
+    Returns:
+        tuple: (pd.Series int64 com o índice da original, quantidade de valores fora do formato)
+    """
+    if pd.api.types.is_integer_dtype(serie) and not serie.isna().any():
+        return serie.astype(np.int64), 0
+
+    chaves = np.full(len(serie), CHAVE_NULA, dtype=np.int64)
+    nulos = serie.isna().to_numpy()
+    texto = serie[~nulos].astype(str).str.strip()
+    if pd.api.types.is_float_dtype(serie):
+        # 12345.0 -> '12345'
+        texto = texto.str.replace(r'\.0*$', '', regex=True)
+
+    numericos = texto.str.fullmatch(r'\d{1,%d}' % _MAX_DIGITOS_CHAVE).to_numpy(dtype=bool)
+    posicoes = np.flatnonzero(~nulos)
+    chaves[posicoes[numericos]] = texto[numericos].astype(np.int64).to_numpy()
+
+    fora = ~numericos
+    if fora.any():
+        hashes = pd.util.hash_array(texto[fora].to_numpy(dtype=object))
+        chaves[posicoes[fora]] = -(hashes >> np.uint64(2)).astype(np.int64) - 2
+    return pd.Series(chaves, index=serie.index, name=serie.name), int(fora.sum())
+
+
+def _compactar_chave(serie, coluna, nome):
+    """Converte CPF/contrato com chave_int64, avisando quantos valores estão fora do formato"""
+    convertida, fora_do_formato = chave_int64(serie)
+    if fora_do_formato:
+        print(f"⚠️  {nome or ''} {coluna}: {fora_do_formato:,} valor(es) fora do formato numérico "
+              f"(chave pelo hash do texto)")
+    return convertida
+
+
+def compactar_tipos(df, esquema, nome=None, relatorio=False):
+    """
+    Aplica um esquema de compactação de tipos ao DataFrame (colunas ausentes são ignoradas)
+
+    Args:
+        df (pd.DataFrame): DataFrame a ser compactado
+        esquema (dict | str): Dicionário coluna -> tipo, ou nome de um esquema em ESQUEMAS
+        nome (str, optional): Nome exibido no relatório. Default: nome do esquema
+        relatorio (bool): Se True, exibe a memória antes e depois (memory_usage(deep=True):
+            percorre todas as strings, então fica desligado no caminho normal)
+
+    Returns:
+        pd.DataFrame: O mesmo DataFrame com os tipos compactados
+    """
+    if isinstance(esquema, str):
+        nome = nome or esquema
+        esquema = ESQUEMAS[esquema]
+
+    if relatorio:
+        memoria_antes = df.memory_usage(deep=True).sum()
+
+    for coluna, tipo in esquema.items():
+        if coluna not in df.columns:
+            continue
+        serie = df[coluna]
+
+        if tipo == 'category':
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                df[coluna] = serie.astype('category')
+            continue
+
+        if tipo == 'chave':
+            convertida = _compactar_chave(serie, coluna, nome)
+        else:
+            convertida = _compactar_inteiro(serie, tipo)
+
+        if convertida is not None:
+            df[coluna] = convertida
+
+    if relatorio:
+        memoria_depois = df.memory_usage(deep=True).sum()
+        reducao = memoria_antes / memoria_depois if memoria_depois else 1
+        print(f"🗜️  Compactação {nome or ''}: {memoria_antes / 1024**2:,.1f} MB → "
+              f"{memoria_depois / 1024**2:,.1f} MB ({reducao:.1f}x)")
+
+    return df
@@ -1,6 +1,10 @@
+from src.instrumentacao import instrumentar
+
+
+@instrumentar()
 def tratar_acionamentos(df_tabualacao_aciona):
     colunas_binarias = ['CPC', 'CPCA', 'PROMESSA']
 
-    # Converte todas para int
-    df_tabualacao_aciona[colunas_binarias] = df_tabualacao_aciona[colunas_binarias].astype(int)
+    # Converte todas para int8 (flags 0/1)
+    df_tabualacao_aciona[colunas_binarias] = df_tabualacao_aciona[colunas_binarias].astype('int8')
     return df_tabualacao_aciona
\ No newline at end of file
@@ -1,6 +1,8 @@
-import numpy as np
 import pandas as pd
 
+from src.instrumentacao import instrumentar
+from src.mapeamento import MapaCodigos
+
 # ============================================
 # DICIONÁRIOS E CONSTANTES
 # ============================================
@@ -21,6 +23,19 @@ DDD_ESTADO = {
     '91': 'PA', '92': 'AM', '93': 'PA', '94': 'PA', '95': 'RR', '96': 'AP', '97': 'AM', '98': 'MA', '99': 'MA'
 }
 
+GRUPO_OPERACAO = {
+    4118: 'ATIVO',
+    4022: 'MANUAL',
+    4017: 'RECEPTIVO',
+    **dict.fromkeys([4047, 4679, 4681, 4683, 4671], 'URA CPC'),
+    **dict.fromkeys([4433, 4504], 'PREVENTIVO'),
+    **dict.fromkeys([4326, 4636, 4637, 4649], 'AGV NEGOCIADORA'),
+}
+
+# Mapas compilados (tabela densa indexada pelo código)
+MAPA_OPERACAO = MapaCodigos(GRUPO_OPERACAO, padrao='Outros')
+MAPA_ESTADO = MapaCodigos({int(ddd): estado for ddd, estado in DDD_ESTADO.items()})
+
 # ============================================
 # FUNÇÕES DE TRATAMENTO - DISCAGENS
 # ============================================
@@ -33,27 +48,9 @@ def adicionar_operacao(df):
         df (pd.DataFrame): DataFrame com coluna 'GrupoPrincipal'
     
     Returns:
-        pd.DataFrame: DataFrame com nova coluna 'OPERACAO'
+        pd.DataFrame: DataFrame com nova coluna 'OPERACAO' (categórica; códigos fora de GRUPO_OPERACAO -> 'Outros')
     """
-    conditions = [
-        df['GrupoPrincipal'] == 4118,
-        df['GrupoPrincipal'] == 4022,
-        df['GrupoPrincipal'] == 4017,
-        df['GrupoPrincipal'].isin([4047, 4679, 4681, 4683, 4671]),
-        df['GrupoPrincipal'].isin([4433, 4504]),
-        df['GrupoPrincipal'].isin([4326, 4636, 4637, 4649])
-    ]
-    
-    choices = [
-        'ATIVO',
-        'MANUAL',
-        'RECEPTIVO',
-        'URA CPC',
-        'PREVENTIVO',
-        'AGV NEGOCIADORA'
-    ]
-    
-    df['OPERACAO'] = np.select(conditions, choices, default='Outros')
+    df['OPERACAO'] = MAPA_OPERACAO.aplicar(df['GrupoPrincipal'])
     return df
 
 
@@ -66,12 +63,13 @@ def adicionar_estado_por_ddd(df, coluna_ddd='ddd'):
         coluna_ddd (str): Nome da coluna que contém o DDD
     
     Returns:
-        pd.DataFrame: DataFrame com nova coluna 'ESTADO'
+        pd.DataFrame: DataFrame com nova coluna 'ESTADO' (categórica; DDD fora de DDD_ESTADO -> NaN)
     """
-    df['ESTADO'] = df[coluna_ddd].astype(str).str.zfill(2).map(DDD_ESTADO)
+    df['ESTADO'] = MAPA_ESTADO.aplicar(df[coluna_ddd])
     return df
 
 
+@instrumentar()
 def tratar_base_discagens(df):
     """
     Aplica todos os tratamentos padrão para base de discagens
@@ -84,4 +82,25 @@ def tratar_base_discagens(df):
     """
     df = adicionar_operacao(df)
     df = adicionar_estado_por_ddd(df)
-    return df
\ No newline at end of file
+    return df
+
+@instrumentar()
+def tratar_base_discagens_em_chunks(chunks, agregadores):
+    """
+    Aplica os tratamentos padrão bloco a bloco e alimenta agregadores incrementais
+
+    Nenhum bloco é mantido após ser agregado, então o pico de memória depende
+    do tamanho do bloco e não da quantidade de discagens do mês
+
+    Args:
+        chunks (iterable): Blocos de discagens (ex: src.extracao.ler_em_chunks)
+        agregadores (list): Agregadores com método atualizar(df) (ver src.agregadores)
+
+    Returns:
+        list: Os mesmos agregadores, já alimentados com todos os blocos
+    """
+    for chunk in chunks:
+        chunk = tratar_base_discagens(chunk)
+        for agregador in agregadores:
+            agregador.atualizar(chunk)
+    return agregadores
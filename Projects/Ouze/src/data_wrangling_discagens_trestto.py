@@ -1,54 +1,411 @@
 
+from collections import namedtuple
+
+import numpy as np
 import pandas as pd
 
-def tratar_discagens_trestto(df, df_mailing_hist):
+from src.compactacao import chave_int64
+from src.instrumentacao import instrumentar, medicao_atual
+from src.join_fora_memoria import DIRETORIO_SPILL_PADRAO, MEMORIA_MAXIMA_PADRAO_MB, juntar_por_particoes
+from src.sketches import ERRO_RELATIVO_PADRAO, SketchesUnicos
+
+COLUNAS_METRICAS = ['DISCAGEM', 'ALO', 'CPC', 'CPCA', 'PROMESSA']
+COLUNAS_UNIQUE = [f'{col}_UNIQUE' for col in COLUNAS_METRICAS]
+CHAVES_SEGMENTO = ['DATA', 'PRODUTO', 'FX_ATRASO']
+# Colunas de get_query_discagens_trestto(agregar=True): já somadas por DATA + CPF no servidor
+COLUNAS_PRE_AGREGADO = ['DATA', 'CPF'] + COLUNAS_METRICAS
+
+# Resultado do join Trestto x mailing (juntar_discagens_trestto), reaproveitado pelo
+# esforço/únicos e pelos sketches sem refazer o join
+JoinTrestto = namedtuple('JoinTrestto', ['segmentos', 'metricas', 'dia_base', 'cpfs_distintos', 'contagens'])
+
+
+def _codificar_chaves(df, df_mailing_hist):
     """
-    Aplica tratamentos para base de discagens Trestto com segmentação por PRODUTO e FX_ATRASO
-    Retorna dois DataFrames: esforço total e únicos (CPFs únicos por métrica)
+    Codifica (DATA, CPF) dos dois lados em uma única chave int64, sem copiar os DataFrames
+    
+    O CPF é codificado pelos valores distintos do mailing; CPFs do Trestto que não
+    existem no mailing recebem -1 (nunca entrariam no join interno)
+    
+    Returns:
+        tuple: (chave_trestto, chave_mailing, dia_base, cpfs_distintos)
     """
-    df = df.copy()
-    df_mailing_hist = df_mailing_hist.copy()
+    cpf_trestto, cpf_mailing = df['CPF'], df_mailing_hist['CPF']
+    inteiros = (pd.api.types.is_integer_dtype(cpf_trestto), pd.api.types.is_integer_dtype(cpf_mailing))
+    if any(inteiros) and not all(inteiros):
+        # Só um lado compactado: o outro recebe a mesma codificação (compactacao.chave_int64)
+        cpf_trestto, cpf_mailing = chave_int64(cpf_trestto)[0], chave_int64(cpf_mailing)[0]
+    elif not any(inteiros):
+        # Nenhum lado compactado: mesma regra de comparação de antes, CPF como texto dos dois lados
+        cpf_trestto, cpf_mailing = cpf_trestto.astype(str), cpf_mailing.astype(str)
     
-    # Converter DATA para o mesmo tipo
-    df['DATA'] = pd.to_datetime(df['DATA']).dt.date
-    df_mailing_hist['DATA'] = pd.to_datetime(df_mailing_hist['DATA']).dt.date
+    codigos_mailing, cpfs_distintos = pd.factorize(cpf_mailing)
+    codigos_trestto = pd.Index(cpfs_distintos).get_indexer(cpf_trestto)
     
-    # Garantir que CPF está como string
-    df['CPF'] = df['CPF'].astype(str)
-    df_mailing_hist['CPF'] = df_mailing_hist['CPF'].astype(str)
+    dia_trestto = pd.to_datetime(df['DATA']).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    dia_mailing = pd.to_datetime(df_mailing_hist['DATA']).to_numpy(dtype='datetime64[D]').astype(np.int64)
+    dia_base = min((dias.min() for dias in (dia_trestto, dia_mailing) if len(dias)), default=0)
+    quantidade_cpfs = max(len(cpfs_distintos), 1)
     
-    print(f"📊 Antes da consolidação - Trestto: {len(df):,}")
+    chave_trestto = (dia_trestto - dia_base) * quantidade_cpfs + codigos_trestto
+    chave_trestto[codigos_trestto < 0] = -1
+    chave_mailing = (dia_mailing - dia_base) * quantidade_cpfs + codigos_mailing
+    return chave_trestto, chave_mailing, dia_base, cpfs_distintos
+
+
+def eh_pre_agregado(df):
+    """
+    Indica se as discagens vieram de get_query_discagens_trestto(agregar=True)
+    (só DATA, CPF e as métricas, sem SUBSTATUSURA/TIPO)
     
-    # ✅ CONSOLIDAR TRESTTO ANTES DO MERGE (por DATA + CPF)
-    colunas_metricas = ['DISCAGEM', 'ALO', 'CPC', 'CPCA', 'PROMESSA']
-    df_consolidado = df.groupby(['DATA', 'CPF'], as_index=False)[colunas_metricas].sum()
+    Args:
+        df (pd.DataFrame | iterable): Discagens Trestto (blocos não são inspecionados)
     
-    print(f"📊 Após consolidação - Trestto: {len(df_consolidado):,}")
-    print(f"📊 Mailing: {len(df_mailing_hist):,}")
+    Returns:
+        bool: True se a assinatura de colunas for a da consulta agregada
+    """
+    return isinstance(df, pd.DataFrame) and set(df.columns) == set(COLUNAS_PRE_AGREGADO)
+
+
+def _juntar_trestto(df, df_mailing_hist, pre_agregado=False):
+    """
+    Join por (DATA, CPF) entre o Trestto consolidado e os segmentos distintos do mailing
+    
+    (DATA, CPF) é codificado em uma chave inteira e o join é um gather pelo índice da
+    consolidação. Com pre_agregado=True a consolidação é pulada se as chaves já forem únicas
+    
+    Returns:
+        JoinTrestto: (df_segmentos com CHAVE/PRODUTO/FX_ATRASO das linhas do join,
+                      métricas consolidadas de cada linha (np.ndarray),
+                      dia_base e cpfs_distintos para decodificar CHAVE,
+                      dict com as contagens de linhas de cada passo)
+    """
+    chave_trestto, chave_mailing, dia_base, cpfs_distintos = _codificar_chaves(df, df_mailing_hist)
     
-    # Fazer o join com mailing_hist por CPF E DATA
-    df_join = df_consolidado.merge(
-        df_mailing_hist[['DATA', 'CPF', 'PRODUTO', 'FX_ATRASO']].drop_duplicates(), 
-        on=['CPF', 'DATA'], 
-        how='inner'
+    # ✅ CONSOLIDAR TRESTTO ANTES DO MERGE (por DATA + CPF), só CPFs presentes no mailing
+    casados = chave_trestto >= 0
+    df_metricas = pd.DataFrame({col: df[col].to_numpy()[casados] for col in COLUNAS_METRICAS})
+    chaves_casadas = pd.Index(chave_trestto[casados])
+    if pre_agregado and chaves_casadas.is_unique:
+        # Já consolidado no servidor (GROUP BY DATA, CPF): uma linha por chave
+        df_consolidado = df_metricas.set_axis(chaves_casadas)
+    else:
+        if pre_agregado:
+            print("⚠️  Trestto marcado como pré-agregado, mas com (DATA, CPF) repetidos: consolidando")
+        df_consolidado = df_metricas.groupby(chaves_casadas, sort=False).sum()
+    
+    # Mailing distinto por (DATA, CPF, PRODUTO, FX_ATRASO)
+    df_segmentos = pd.DataFrame({
+        'CHAVE': chave_mailing,
+        'PRODUTO': df_mailing_hist['PRODUTO'].array,
+        'FX_ATRASO': df_mailing_hist['FX_ATRASO'].array,
+    }).drop_duplicates()
+    
+    # Join interno por (DATA, CPF): cada segmento busca sua linha consolidada
+    posicoes = df_consolidado.index.get_indexer(df_segmentos['CHAVE'].to_numpy())
+    no_join = posicoes >= 0
+    posicoes = posicoes[no_join]
+    contagens = {
+        'trestto': len(df),
+        'consolidado': len(df_consolidado),
+        'mailing': len(df_mailing_hist),
+        'segmentos': len(df_segmentos),
+        'join': int(no_join.sum()),
+    }
+    df_segmentos = df_segmentos[no_join]
+    metricas = df_consolidado.to_numpy()[posicoes]
+    return JoinTrestto(df_segmentos, metricas, dia_base, cpfs_distintos, contagens)
+
+
+def _decodificar_dias(chaves, dia_base, cpfs_distintos):
+    dias = chaves // max(len(cpfs_distintos), 1) + dia_base
+    return dias.astype('datetime64[D]').astype('datetime64[ns]')
+
+
+def _somar_join(juntado):
+    """
+    Esforço e únicos por DATA/PRODUTO/FX_ATRASO a partir do join, em um único groupby
+    
+    Returns:
+        pd.DataFrame: Métricas e métricas _UNIQUE por DATA/PRODUTO/FX_ATRASO
+    """
+    metricas = juntado.metricas
+    
+    # ESFORÇO (soma) e UNIQUE (> 0 vira 1) em um único groupby
+    df_join = pd.DataFrame(
+        np.hstack([metricas, (metricas > 0).astype(np.int64)]),
+        columns=COLUNAS_METRICAS + COLUNAS_UNIQUE
     )
+    df_join['DATA'] = _decodificar_dias(juntado.segmentos['CHAVE'].to_numpy(), juntado.dia_base, juntado.cpfs_distintos)
+    df_join['PRODUTO'] = juntado.segmentos['PRODUTO'].array
+    df_join['FX_ATRASO'] = juntado.segmentos['FX_ATRASO'].array
+    
+    return _somar_por_segmento(df_join)
+
+
+def _agregar_trestto(df, df_mailing_hist, pre_agregado=False):
+    """
+    Núcleo de tratar_discagens_trestto: join por (DATA, CPF) e agregação por segmento
+    
+    Returns:
+        tuple: (df_agregado com métricas e métricas _UNIQUE por DATA/PRODUTO/FX_ATRASO,
+                dict com as contagens de linhas de cada passo)
+    """
+    juntado = _juntar_trestto(df, df_mailing_hist, pre_agregado)
+    return _somar_join(juntado), juntado.contagens
+
+
+def _somar_por_segmento(df_join):
+    """
+    Soma das métricas por DATA/PRODUTO/FX_ATRASO, com as mesmas linhas de antes
     
-    print(f"📊 Após join: {len(df_join):,}")
+    Todas as faixas de FX_ATRASO aparecem (zeradas) para cada DATA e PRODUTO do
+    join, mas só os produtos presentes: PRODUTO é categórico com todas as categorias
+    do mapa (inclusive 'Outros'), e um observed=False nele criaria linhas zeradas
+    para produtos que não aparecem no join
+    """
+    df_soma = df_join.groupby(CHAVES_SEGMENTO, observed=True)[COLUNAS_METRICAS + COLUNAS_UNIQUE].sum()
     
+    fx_atraso = df_join['FX_ATRASO']
+    if isinstance(fx_atraso.dtype, pd.CategoricalDtype):
+        faixas = pd.Categorical(fx_atraso.cat.categories, dtype=fx_atraso.dtype)
+    else:
+        faixas = fx_atraso.drop_duplicates().sort_values()
+    indice = pd.MultiIndex.from_product([
+        df_join['DATA'].drop_duplicates().sort_values(),
+        df_join['PRODUTO'].drop_duplicates().sort_values(),
+        faixas,
+    ], names=CHAVES_SEGMENTO)
+    return df_soma.reindex(indice, fill_value=0).reset_index()
+
+
+def _exibir_contagens(contagens):
+    print(f"📊 Antes da consolidação - Trestto: {contagens['trestto']:,}")
+    print(f"📊 Após consolidação - Trestto: {contagens['consolidado']:,}")
+    print(f"📊 Mailing: {contagens['mailing']:,}")
+    print(f"📊 Após join: {contagens['join']:,}")
+    medicao = medicao_atual()
+    if medicao:
+        medicao.registrar_join(contagens['consolidado'], contagens['segmentos'], contagens['join'], nome='trestto_mailing')
+
+
+def _separar_esforco_unique(df_agregado):
     # TOTAL TRESTTO ESFORÇO DIÁRIO (segmentado por PRODUTO e FX_ATRASO)
-    df_esforco = df_join.groupby(['DATA', 'PRODUTO', 'FX_ATRASO'], as_index=False)[colunas_metricas].sum()
+    df_esforco = df_agregado[CHAVES_SEGMENTO + COLUNAS_METRICAS]
     
     # TOTAL TRESTTO UNIQUE DIÁRIO (segmentado por PRODUTO e FX_ATRASO)
-    df_unique = df_join.copy()
+    df_unique = df_agregado[CHAVES_SEGMENTO + COLUNAS_UNIQUE].rename(
+        columns=dict(zip(COLUNAS_UNIQUE, COLUNAS_METRICAS))
+    )
     
-    # Aplica a transformação: > 0 vira 1
-    for col in colunas_metricas:
-        df_unique[col] = (df_unique[col] > 0).astype(int)
+    return df_esforco, df_unique
+
+
+@instrumentar()
+def juntar_discagens_trestto(df, df_mailing_hist, pre_agregado=None):
+    """
+    Join por (DATA, CPF) entre as discagens Trestto e o mailing, sem agregar
     
-    # Agrupa por data, produto e faixa de atraso
-    df_unique = df_unique.groupby(['DATA', 'PRODUTO', 'FX_ATRASO'], as_index=False)[colunas_metricas].sum()
+    Para quando o esforço/únicos e os sketches saem das mesmas bases (ex: etapa
+    trestto_join do pipeline): o join é feito uma vez e passado para
+    tratar_join_trestto e sketches_join_trestto
     
-    return df_esforco, df_unique
+    Args:
+        df (pd.DataFrame): Discagens Trestto (DATA, CPF e colunas de métricas)
+        df_mailing_hist (pd.DataFrame): Mailing com DATA, CPF, PRODUTO e FX_ATRASO
+        pre_agregado (bool, optional): Se df já vem somado por DATA + CPF.
+            Default: detectado pelas colunas (eh_pre_agregado)
+    
+    Returns:
+        JoinTrestto: Linhas do join com as métricas consolidadas
+    """
+    if pre_agregado is None:
+        pre_agregado = eh_pre_agregado(df)
+    juntado = _juntar_trestto(df, df_mailing_hist, pre_agregado)
+    _exibir_contagens(juntado.contagens)
+    return juntado
+
+
+@instrumentar()
+def tratar_join_trestto(juntado):
+    """
+    Esforço e únicos a partir de juntar_discagens_trestto (mesmo resultado de tratar_discagens_trestto)
+    
+    Args:
+        juntado (JoinTrestto): Saída de juntar_discagens_trestto
+    
+    Returns:
+        tuple: (df_esforco, df_unique)
+    """
+    return _separar_esforco_unique(_somar_join(juntado))
+
+
+@instrumentar()
+def tratar_discagens_trestto(df, df_mailing_hist, memoria_maxima_mb=None, pre_agregado=None):
+    """
+    Aplica tratamentos para base de discagens Trestto com segmentação por PRODUTO e FX_ATRASO
+    Retorna dois DataFrames: esforço total e únicos (CPFs únicos por métrica)
+    
+    (DATA, CPF) é codificado em uma chave inteira, o join é um gather pelo índice da
+    consolidação e esforço e únicos saem de um único groupby sobre o resultado do join.
+    Os DataFrames de entrada não são copiados nem alterados. DATA sai como datetime64
+    
+    Discagens de get_query_discagens_trestto(agregar=True) já chegam somadas por
+    DATA + CPF e a consolidação em pandas é pulada
+    
+    Args:
+        df (pd.DataFrame): Discagens Trestto (DATA, CPF e colunas de métricas)
+        df_mailing_hist (pd.DataFrame): Mailing com DATA, CPF, PRODUTO e FX_ATRASO
+        memoria_maxima_mb (int, optional): Se informado, usa o join fora de memória
+            (tratar_discagens_trestto_fora_memoria) com esse orçamento
+        pre_agregado (bool, optional): Se df já vem somado por DATA + CPF.
+            Default: detectado pelas colunas (eh_pre_agregado)
+    
+    Returns:
+        tuple: (df_esforco, df_unique)
+    """
+    if pre_agregado is None:
+        pre_agregado = eh_pre_agregado(df)
+    if memoria_maxima_mb is not None:
+        return tratar_discagens_trestto_fora_memoria(df, df_mailing_hist, memoria_maxima_mb, pre_agregado=pre_agregado)
+    
+    df_agregado, contagens = _agregar_trestto(df, df_mailing_hist, pre_agregado)
+    _exibir_contagens(contagens)
+    return _separar_esforco_unique(df_agregado)
+
+
+@instrumentar()
+def tratar_discagens_trestto_fora_memoria(df, df_mailing_hist, memoria_maxima_mb=MEMORIA_MAXIMA_PADRAO_MB,
+                                          preparar_mailing=None, n_particoes=None,
+                                          diretorio=DIRETORIO_SPILL_PADRAO, pre_agregado=None):
+    """
+    Mesmo resultado de tratar_discagens_trestto, com join particionado em disco
+    
+    Os dois lados são particionados por hash do CPF em arquivos parquet locais
+    (src.join_fora_memoria) e cada partição passa pelo mesmo join/agregação. Como
+    um CPF fica inteiro em uma partição, as agregações parciais por
+    DATA/PRODUTO/FX_ATRASO são somadas no final. Só uma partição fica em memória
+    por vez, além das entradas (quando já vierem como DataFrame)
+    
+    Uso com o mailing lido em blocos:
+        tratar_discagens_trestto_fora_memoria(
+            df_discagens_trestto,
+            ler_em_chunks(get_query_mailing_hist(dt_ini, dt_fim), conn),
+            memoria_maxima_mb=1024,
+            preparar_mailing=preparar_mailing_trestto,
+        )
+    
+    Args:
+        df (pd.DataFrame | iterable): Discagens Trestto, ou blocos delas
+        df_mailing_hist (pd.DataFrame | iterable): Mailing (ou blocos) com DATA, CPF, PRODUTO e FX_ATRASO
+        memoria_maxima_mb (int): Orçamento de memória por partição
+        preparar_mailing (callable, optional): Aplicado a cada bloco do mailing antes do spill
+            (ex: adicionar PRODUTO e FX_ATRASO)
+        n_particoes (int, optional): Força a quantidade de partições
+        diretorio (str, optional): Onde gravar o spill. Default: diretório temporário do sistema
+        pre_agregado (bool, optional): Se df já vem somado por DATA + CPF.
+            Default: detectado pelas colunas (só quando df é um DataFrame)
+    
+    Returns:
+        tuple: (df_esforco, df_unique)
+    """
+    if pre_agregado is None:
+        pre_agregado = eh_pre_agregado(df)
+    
+    # Um CPF nunca é dividido entre partições, então (DATA, CPF) continua único em cada uma
+    def processar(lados):
+        if any(lado not in lados or lados[lado].empty for lado in ('trestto', 'mailing')):
+            return None
+        return _agregar_trestto(lados['trestto'], lados['mailing'], pre_agregado)
+    
+    parciais = []
+    contagens = dict.fromkeys(['trestto', 'consolidado', 'mailing', 'segmentos', 'join'], 0)
+    for resultado in juntar_por_particoes(
+        {'trestto': df, 'mailing': df_mailing_hist},
+        processar,
+        coluna_chave='CPF',
+        memoria_maxima_mb=memoria_maxima_mb,
+        colunas={'trestto': ['DATA', 'CPF'] + COLUNAS_METRICAS, 'mailing': ['DATA', 'CPF', 'PRODUTO', 'FX_ATRASO']},
+        transformacoes={'mailing': preparar_mailing} if preparar_mailing else None,
+        n_particoes=n_particoes,
+        diretorio=diretorio,
+    ):
+        if resultado is None:
+            continue
+        df_parcial, contagens_particao = resultado
+        parciais.append(df_parcial)
+        for nome, quantidade in contagens_particao.items():
+            contagens[nome] += quantidade
+    
+    if parciais:
+        df_agregado = _somar_por_segmento(pd.concat(parciais, ignore_index=True))
+    else:
+        df_agregado = pd.DataFrame(columns=CHAVES_SEGMENTO + COLUNAS_METRICAS + COLUNAS_UNIQUE)
+    
+    _exibir_contagens(contagens)
+    return _separar_esforco_unique(df_agregado)
+
+@instrumentar()
+def tratar_discagens_trestto_sketches(df, df_mailing_hist, erro_relativo=ERRO_RELATIVO_PADRAO, exato=False,
+                                      pre_agregado=None):
+    """
+    Sketches de CPFs distintos por DATA/PRODUTO/FX_ATRASO para cada métrica (src.sketches)
+    
+    Mesmo join de tratar_discagens_trestto, mas cada célula de df_unique guarda um
+    sketch mesclável dos CPFs em vez da contagem: únicos da semana, do mês ou de
+    qualquer combinação de dimensões saem de sketches.rollup(...) sem refazer o join
+    
+    Uso:
+        sketches = tratar_discagens_trestto_sketches(df_discagens_trestto, df_maling_hist)
+        df_unique_mes = sketches.rollup(['PRODUTO', 'FX_ATRASO'], periodo='M')
+    
+    Args:
+        df (pd.DataFrame): Discagens Trestto (DATA, CPF e colunas de métricas)
+        df_mailing_hist (pd.DataFrame): Mailing com DATA, CPF, PRODUTO e FX_ATRASO
+        erro_relativo (float): Erro padrão do HyperLogLog (define a memória por célula)
+        exato (bool): Se True, guarda os CPFs e o rollup é exato
+        pre_agregado (bool, optional): Se df já vem somado por DATA + CPF.
+            Default: detectado pelas colunas (eh_pre_agregado)
+    
+    Returns:
+        SketchesUnicos: Sketches por célula, para COLUNAS_METRICAS
+    """
+    if pre_agregado is None:
+        pre_agregado = eh_pre_agregado(df)
+    
+    juntado = _juntar_trestto(df, df_mailing_hist, pre_agregado)
+    _exibir_contagens(juntado.contagens)
+    return _construir_sketches(juntado, erro_relativo, exato)
+
+
+@instrumentar()
+def sketches_join_trestto(juntado, erro_relativo=ERRO_RELATIVO_PADRAO, exato=False):
+    """
+    Sketches a partir de juntar_discagens_trestto (mesmo resultado de tratar_discagens_trestto_sketches)
+    
+    Args:
+        juntado (JoinTrestto): Saída de juntar_discagens_trestto
+        erro_relativo (float): Erro padrão do HyperLogLog (define a memória por célula)
+        exato (bool): Se True, guarda os CPFs e o rollup é exato
+    
+    Returns:
+        SketchesUnicos: Sketches por célula, para COLUNAS_METRICAS
+    """
+    return _construir_sketches(juntado, erro_relativo, exato)
+
+
+def _construir_sketches(juntado, erro_relativo, exato):
+    chaves = juntado.segmentos['CHAVE'].to_numpy()
+    cpfs_distintos = juntado.cpfs_distintos
+    df_celulas = pd.DataFrame({
+        'DATA': _decodificar_dias(chaves, juntado.dia_base, cpfs_distintos),
+        'PRODUTO': juntado.segmentos['PRODUTO'].array,
+        'FX_ATRASO': juntado.segmentos['FX_ATRASO'].array,
+    })
+    cpfs = pd.Series(np.asarray(cpfs_distintos)[chaves % max(len(cpfs_distintos), 1)])
+    return SketchesUnicos.construir(
+        df_celulas, cpfs, juntado.metricas > 0, COLUNAS_METRICAS, erro_relativo=erro_relativo, exato=exato
+    )
 
 # def tratar_discagens_trestto(df):
 #     """
@@ -1,6 +1,10 @@
-import numpy as np
 import pandas as pd
 
+from src.faixas import aplicar_faixas
+from src.indice_contratos import IndiceContratos
+from src.instrumentacao import instrumentar, medicao_atual
+from src.mapeamento import MapaCodigosPar
+
 FAIXAS_ATRASO_BINS = [float('-inf'), 0, 30, 60, 90, 120, 150, 180, 360, 720, float('inf')]
 FAIXAS_ATRASO_LABELS = [
     'Menor 0',
@@ -15,6 +19,15 @@ FAIXAS_ATRASO_LABELS = [
     'Maior 720'
 ]
 
+CLI_CAR_PRODUTO = {
+    (228, 2): 'API',
+    **dict.fromkeys([(198, 1), (198, 2), (198, 3)], 'Agenda Negativa'),
+    **dict.fromkeys([(196, 1), (196, 3), (196, 4)], 'Equipamentos'),
+}
+
+# Mapa compilado (COD_CLI, COD_CAR) -> PRODUTO
+MAPA_PRODUTO = MapaCodigosPar(CLI_CAR_PRODUTO, padrao='Outros')
+
 # ============================================
 # FUNÇÕES DE TRATAMENTO - MAILING_HIST
 # ============================================
@@ -27,21 +40,9 @@ def adicionar_produto(df):
         df (pd.DataFrame): DataFrame com colunas 'COD_CLI' e 'COD_CAR'
     
     Returns:
-        pd.DataFrame: DataFrame com nova coluna 'PRODUTO'
+        pd.DataFrame: DataFrame com nova coluna 'PRODUTO' (categórica; pares fora de CLI_CAR_PRODUTO -> 'Outros')
     """
-    conditions = [
-        (df['COD_CLI'] == 228) & (df['COD_CAR'] == 2),
-        (df['COD_CLI'] == 198) & (df['COD_CAR'].isin([1, 2, 3])),
-        (df['COD_CLI'] == 196) & (df['COD_CAR'].isin([1, 3, 4]))
-    ]
-    
-    choices = [
-        'API',
-        'Agenda Negativa',
-        'Equipamentos'
-    ]
-    
-    df['PRODUTO'] = np.select(conditions, choices, default='Outros')
+    df['PRODUTO'] = MAPA_PRODUTO.aplicar(df['COD_CLI'], df['COD_CAR'])
     return df
 
 
@@ -56,66 +57,69 @@ def adicionar_faixa_atraso(df, coluna_atraso='ATRASO'):
     Returns:
         pd.DataFrame: DataFrame com nova coluna 'FX_ATRASO'
     """
-    df['FX_ATRASO'] = pd.cut(
-        df[coluna_atraso], 
-        bins=FAIXAS_ATRASO_BINS, 
-        labels=FAIXAS_ATRASO_LABELS, 
-        right=True
-    )
+    df = aplicar_faixas(df, [(coluna_atraso, FAIXAS_ATRASO_BINS, FAIXAS_ATRASO_LABELS, 'FX_ATRASO')])
     return df
 
+@instrumentar()
 def adicionar_valor_principal(df_mailing_hist, df_cad_devf):
     """
-    Adiciona a coluna VALORPRIN_FIN ao DataFrame de mailing_hist através de join com CAD_DEVF
+    Adiciona a coluna VALORPRIN_FIN ao DataFrame de mailing_hist através do contrato no CAD_DEVF
     O valor principal é o mesmo para o contrato independente da data
     
+    A busca é feita em um índice ordenado contrato -> valor (src.indice_contratos),
+    sem merge e sem copiar o mailing. Diferenças em relação ao merge à esquerda antigo:
+    - a coluna é adicionada no próprio df_mailing_hist (quem precisa do original
+      passa uma cópia; no pipeline a etapa recebe as entradas copiadas)
+    - uma linha por linha do mailing: contratos repetidos no CAD_DEVF não duplicam
+      linhas, vale o último valor (o índice avisa quando os valores divergem)
+    - o contrato é comparado pelo número ('00123' e '123' são o mesmo contrato, como
+      nas colunas 'chave' de src.compactacao); os que não são só dígitos, pelo texto
+    
     Args:
         df_mailing_hist (pd.DataFrame): DataFrame de mailing_hist (com coluna CONTRATO)
-        df_cad_devf (pd.DataFrame): DataFrame de CAD_DEVF (com colunas CONTRATO_FIN e VALORPRIN_FIN)
+        df_cad_devf (pd.DataFrame | IndiceContratos): CAD_DEVF (com colunas CONTRATO_FIN e
+            VALORPRIN_FIN) ou um IndiceContratos já construído/persistido
     
     Returns:
-        pd.DataFrame: DataFrame de mailing_hist com nova coluna VALORPRIN_FIN
+        pd.DataFrame: O próprio df_mailing_hist com a nova coluna VALORPRIN_FIN
     """
-    # Fazer cópia para não alterar o original
-    df_resultado = df_mailing_hist.copy()
+    if isinstance(df_cad_devf, IndiceContratos):
+        indice = df_cad_devf
+        print(f"📊 Antes do join - Mailing: {len(df_mailing_hist):,} | Índice de contratos: {len(indice):,}")
+    else:
+        indice = IndiceContratos.em_memoria(df_cad_devf)
+        print(f"📊 Antes do join - Mailing: {len(df_mailing_hist):,} | CAD_DEVF: {len(df_cad_devf):,}")
     
-    # Garantir que os contratos estão no mesmo formato
-    df_resultado['CONTRATO'] = df_resultado['CONTRATO'].astype(str)
-    df_cad_devf_temp = df_cad_devf[['CONTRATO_FIN', 'VALORPRIN_FIN']].copy()
-    df_cad_devf_temp['CONTRATO_FIN'] = df_cad_devf_temp['CONTRATO_FIN'].astype(str)
+    df_mailing_hist['VALORPRIN_FIN'] = indice.consultar(df_mailing_hist['CONTRATO'])
     
-    print(f"📊 Antes do join - Mailing: {len(df_resultado):,} | CAD_DEVF: {len(df_cad_devf_temp):,}")
+    print(f"📊 Após join: {len(df_mailing_hist):,}")
+    print(f"📊 Contratos com valor: {df_mailing_hist['VALORPRIN_FIN'].notna().sum():,}")
+    print(f"📊 Contratos sem valor: {df_mailing_hist['VALORPRIN_FIN'].isna().sum():,}")
     
-    # Fazer o join apenas por CONTRATO
-    df_resultado = df_resultado.merge(
-        df_cad_devf_temp,
-        left_on='CONTRATO',
-        right_on='CONTRATO_FIN',
-        how='left'  # left join para manter todos os registros do mailing
-    )
+    medicao = medicao_atual()
+    if medicao:
+        medicao.registrar_join(len(df_mailing_hist), len(indice), df_mailing_hist['VALORPRIN_FIN'].notna().sum(),
+                               nome='mailing_cad_devf')
     
-    # Remover a coluna auxiliar CONTRATO_FIN
-    df_resultado = df_resultado.drop(columns=['CONTRATO_FIN'])
-    
-    print(f"📊 Após join: {len(df_resultado):,}")
-    print(f"📊 Contratos com valor: {df_resultado['VALORPRIN_FIN'].notna().sum():,}")
-    print(f"📊 Contratos sem valor: {df_resultado['VALORPRIN_FIN'].isna().sum():,}")
-    
-    return df_resultado
+    return df_mailing_hist
 
-def tratar_base_mailing_hist(df):
+@instrumentar()
+def tratar_base_mailing_hist(df, df_cad_devf=None):
     """
     Aplica todos os tratamentos padrão para base de mailing_hist
     
     Args:
         df (pd.DataFrame): DataFrame de mailing_hist
+        df_cad_devf (pd.DataFrame | IndiceContratos, optional): CAD_DEVF para adicionar o
+            VALORPRIN_FIN. Se None, o valor principal não é adicionado
     
     Returns:
         pd.DataFrame: DataFrame tratado
     """
     df = adicionar_produto(df)
     df = adicionar_faixa_atraso(df)
-    df = adicionar_valor_principal(df)
+    if df_cad_devf is not None:
+        df = adicionar_valor_principal(df, df_cad_devf)
     return df
 
 
@@ -127,10 +131,12 @@ def criar_faixa_customizada(df, coluna, bins, labels, nome_nova_coluna=None):
     """
     Cria uma coluna de faixa customizada
     
+    Para várias faixas de uma vez, usar src.faixas.aplicar_faixas
+    
     Args:
         df (pd.DataFrame): DataFrame
         coluna (str): Nome da coluna para categorizar
-        bins (list): Lista de bins para pd.cut
+        bins (list): Lista de bins (mesma semântica de pd.cut com right=True)
         labels (list): Lista de labels para as faixas
         nome_nova_coluna (str, optional): Nome da nova coluna. Default: 'FX_{coluna}'
     
@@ -140,10 +146,5 @@ def criar_faixa_customizada(df, coluna, bins, labels, nome_nova_coluna=None):
     if nome_nova_coluna is None:
         nome_nova_coluna = f'FX_{coluna}'
     
-    df[nome_nova_coluna] = pd.cut(
-        df[coluna], 
-        bins=bins, 
-        labels=labels, 
-        right=True
-    )
+    df = aplicar_faixas(df, [(coluna, bins, labels, nome_nova_coluna)])
     return df
\ No newline at end of file
@@ -1,9 +1,18 @@
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
+import threading
+import time
 import pyodbc
 
+from src.fetch_colunar import ConexaoPreparada
+
 load_dotenv()
 
+POOL_TAMANHO_MAXIMO = int(os.getenv('POOL_TAMANHO_MAXIMO', 4))
+POOL_TEMPO_OCIOSO_MAXIMO = float(os.getenv('POOL_TEMPO_OCIOSO_MAXIMO', 600))
+POOL_INTERVALO_VERIFICACAO = float(os.getenv('POOL_INTERVALO_VERIFICACAO', 30))
+
 def get_connection(server_var, database_var):
     """Retorna uma conexão pyodbc a partir de variáveis do .env"""
     server = os.getenv(server_var)
@@ -13,3 +22,153 @@ def get_connection(server_var, database_var):
         f"SERVER={server};DATABASE={database};Trusted_Connection=yes;"
     )
     return conn
+
+
+class PoolConexoes:
+    """
+    Pool de conexões pyodbc, seguro para uso entre threads, com uma fila por (server_var, database_var)
+
+    Cada chave tem no máximo `tamanho_maximo` conexões abertas. Conexões ociosas há mais de
+    `tempo_ocioso_maximo` segundos são fechadas; as ociosas há mais de `intervalo_verificacao`
+    segundos passam por um SELECT 1 antes de serem entregues
+    """
+
+    def __init__(self, tamanho_maximo=POOL_TAMANHO_MAXIMO, tempo_ocioso_maximo=POOL_TEMPO_OCIOSO_MAXIMO,
+                 intervalo_verificacao=POOL_INTERVALO_VERIFICACAO, fabrica=get_connection):
+        """
+        Args:
+            tamanho_maximo (int): Máximo de conexões abertas por chave
+            tempo_ocioso_maximo (float): Segundos ociosa até a conexão ser descartada
+            intervalo_verificacao (float): Segundos ociosa a partir dos quais a conexão é testada
+            fabrica (callable): Função fabrica(server_var, database_var) que abre uma conexão
+        """
+        self.tamanho_maximo = tamanho_maximo
+        self.tempo_ocioso_maximo = tempo_ocioso_maximo
+        self.intervalo_verificacao = intervalo_verificacao
+        self.fabrica = fabrica
+        self._condicao = threading.Condition()
+        self._livres = {}   # chave -> lista de (conexão, instante da devolução)
+        self._abertas = {}  # chave -> quantidade de conexões abertas (livres + em uso)
+
+    @staticmethod
+    def _fechar(conn):
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    @staticmethod
+    def _saudavel(conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _retirar(self, chave, timeout):
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._condicao:
+            while True:
+                livres = self._livres.setdefault(chave, [])
+                while livres:
+                    conn, devolvida_em = livres.pop()
+                    ociosa = time.monotonic() - devolvida_em
+                    if ociosa <= self.tempo_ocioso_maximo:
+                        return conn, ociosa
+                    self._abertas[chave] -= 1
+                    self._fechar(conn)
+
+                if self._abertas.get(chave, 0) < self.tamanho_maximo:
+                    self._abertas[chave] = self._abertas.get(chave, 0) + 1
+                    return None, 0.0
+
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    raise TimeoutError(f"Nenhuma conexão livre no pool para {chave}")
+                self._condicao.wait(restante)
+
+    def _descartar(self, chave, conn):
+        if conn is not None:
+            self._fechar(conn)
+        with self._condicao:
+            self._abertas[chave] -= 1
+            self._condicao.notify()
+
+    def _devolver(self, chave, conn):
+        with self._condicao:
+            self._livres[chave].append((conn, time.monotonic()))
+            self._condicao.notify()
+
+    @contextmanager
+    def conexao(self, server_var, database_var, timeout=None):
+        """
+        Retira uma conexão do pool e a devolve ao final do bloco
+
+        Uso:
+            with pool.conexao("SERVER_SRC", "DATABASE_SRC") as conn:
+                df = pd.read_sql(query, conn)
+
+        Se o bloco levantar pyodbc.Error a conexão é descartada em vez de devolvida
+
+        Args:
+            server_var (str): Variável do .env com o servidor
+            database_var (str): Variável do .env com o banco
+            timeout (float, optional): Segundos de espera por uma conexão livre
+
+        Yields:
+            ConexaoPreparada: Conexão pyodbc com os cursores preparados de src.fetch_colunar
+        """
+        chave = (server_var, database_var)
+        conn, ociosa = self._retirar(chave, timeout)
+
+        try:
+            if conn is not None and ociosa > self.intervalo_verificacao and not self._saudavel(conn):
+                self._fechar(conn)
+                conn = None
+            if conn is None:
+                # Os cursores preparados (src.fetch_colunar) ficam junto com a conexão
+                conn = ConexaoPreparada(self.fabrica(server_var, database_var))
+        except BaseException:
+            self._descartar(chave, conn)
+            raise
+
+        try:
+            yield conn
+        except pyodbc.Error:
+            self._descartar(chave, conn)
+            raise
+        except BaseException:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                self._descartar(chave, conn)
+                raise
+            self._devolver(chave, conn)
+            raise
+        else:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                self._descartar(chave, conn)
+            else:
+                self._devolver(chave, conn)
+
+    def fechar_todas(self):
+        """Fecha todas as conexões livres do pool"""
+        with self._condicao:
+            for chave, livres in self._livres.items():
+                for conn, _ in livres:
+                    self._fechar(conn)
+                self._abertas[chave] -= len(livres)
+                livres.clear()
+            self._condicao.notify_all()
+
+
+POOL = PoolConexoes()
+
+def conexao(server_var, database_var, timeout=None):
+    """Atalho para POOL.conexao: retira uma conexão do pool padrão do módulo"""
+    return POOL.conexao(server_var, database_var, timeout)
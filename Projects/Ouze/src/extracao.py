@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.cache import ler_com_cache
+from src.compactacao import ESQUEMAS, compactar_tipos
+from src.db_connection import POOL
+from src.fetch_colunar import ler_sql_colunar, ler_sql_colunar_em_lotes
+from src.instrumentacao import MedicaoEtapa
+from queries import ConsultaPeriodo, gerar_shards_discagens, get_query_discagens
+
+# ============================================
+# CONSTANTES
+# ============================================
+
+TAMANHO_CHUNK_PADRAO = 500_000
+MAX_CONSULTAS_POR_SERVIDOR = int(os.getenv('MAX_CONSULTAS_POR_SERVIDOR', 2))
+
+ConsultaSpec = namedtuple('ConsultaSpec', ['server_var', 'database_var', 'query'])
+
+# ============================================
+# LEITURA EM CHUNKS
+# ============================================
+
+def ler_em_chunks(query, conn, chunksize=TAMANHO_CHUNK_PADRAO):
+    """
+    Executa a query e devolve o resultado em blocos de tamanho limitado
+
+    O cursor é lido com fetchmany, então apenas um bloco fica em memória por vez
+
+    Args:
+        query (str | tuple): Query SQL ou par (sql, params) de queries.py
+        conn: Conexão pyodbc
+        chunksize (int): Quantidade máxima de linhas por bloco
+
+    Yields:
+        pd.DataFrame: Bloco com no máximo `chunksize` linhas
+    """
+    yield from ler_sql_colunar_em_lotes(query, conn, tamanho_lote=chunksize)
+
+
+# ============================================
+# EXTRAÇÃO CONCORRENTE
+# ============================================
+
+def _ler_consulta(query, conn, database_var, cache=None):
+    """
+    Lê uma consulta pronta ou uma queries.ConsultaPeriodo
+
+    A ConsultaPeriodo é lida pelo cache (dias passados do disco, só os faltantes no
+    servidor) quando há cache; sem cache, é montada para o período inteiro
+    """
+    if not isinstance(query, ConsultaPeriodo):
+        return ler_sql_colunar(query, conn)
+    construtor, dt_ini, dt_fim, parametros = query
+    if cache is None:
+        return ler_sql_colunar(construtor(dt_ini, dt_fim, **parametros), conn)
+    fonte = database_var.removeprefix('DATABASE_')
+    return ler_com_cache(cache, fonte, construtor, conn, dt_ini, dt_fim, **parametros)
+
+
+def carregar_em_paralelo(consultas, max_por_servidor=MAX_CONSULTAS_POR_SERVIDOR, pool=POOL, compactar=True, cache=None):
+    """
+    Executa várias consultas ao mesmo tempo em um pool de threads
+
+    O limite de consultas simultâneas é aplicado por servidor (valor da variável
+    do .env), então SERVER_BD2 conta uma única vez mesmo servindo BD2 e TRC
+
+    Uso:
+        dfs = carregar_em_paralelo(get_consultas_ouze('2025-09-01', '2025-09-30'))
+        df_cad_devf = dfs['cad_devf']
+
+    Args:
+        consultas (dict): nome -> ConsultaSpec(server_var, database_var, query), com query em texto,
+            (sql, params) (ex: queries.ConsultaSQL) ou queries.ConsultaPeriodo
+        max_por_servidor (int): Máximo de consultas simultâneas no mesmo servidor
+        pool (PoolConexoes): Pool de onde as conexões são retiradas
+        compactar (bool): Se True, aplica src.compactacao.ESQUEMAS[nome] às consultas que tiverem esquema
+        cache (CacheParquet, optional): Cache por dia usado nas consultas queries.ConsultaPeriodo
+
+    Returns:
+        dict: nome -> pd.DataFrame, na mesma ordem de `consultas`
+    """
+    if not consultas:
+        return {}
+
+    semaforos = {}
+    for server_var, _, _ in consultas.values():
+        servidor = os.getenv(server_var) or server_var
+        semaforos.setdefault(servidor, threading.BoundedSemaphore(max_por_servidor))
+
+    def executar(nome, spec):
+        server_var, database_var, query = spec
+        with semaforos[os.getenv(server_var) or server_var]:
+            with MedicaoEtapa(f"extracao.{nome}", server_var=server_var, database_var=database_var) as medicao:
+                with pool.conexao(server_var, database_var) as conn:
+                    df = _ler_consulta(query, conn, database_var, cache)
+                medicao.registrar_saida(df)
+                return df
+
+    with ThreadPoolExecutor(max_workers=len(consultas)) as executor:
+        futuros = {nome: executor.submit(executar, nome, spec) for nome, spec in consultas.items()}
+        dfs = {nome: futuro.result() for nome, futuro in futuros.items()}
+
+    if compactar:
+        for nome, df in dfs.items():
+            if nome in ESQUEMAS:
+                compactar_tipos(df, nome)
+    return dfs
+
+
+def carregar_consulta(nome, consulta, pool=POOL, compactar=True, cache=None):
+    """
+    Executa uma única consulta (etapa de extração do pipeline)
+
+    Args:
+        nome (str): Nome da consulta (também escolhe o esquema de compactação)
+        consulta (tuple): ConsultaSpec(server_var, database_var, query)
+        pool (PoolConexoes): Pool de onde a conexão é retirada
+        compactar (bool): Se True, aplica src.compactacao.ESQUEMAS[nome] quando existir
+        cache (CacheParquet, optional): Cache por dia, quando a query é queries.ConsultaPeriodo
+
+    Returns:
+        pd.DataFrame: Resultado da consulta
+    """
+    return carregar_em_paralelo({nome: consulta}, pool=pool, compactar=compactar, cache=cache)[nome]
+
+
+
+def carregar_discagens_em_shards(dt_ini, dt_fim, granularidade='dia', max_paralelo=MAX_CONSULTAS_POR_SERVIDOR,
+                                 server_var="SERVER_SRC", database_var="DATABASE_SRC", pool=POOL, compactar=True):
+    """
+    Busca as discagens do Expert dividindo o período em shards buscados em paralelo
+
+    Cada shard leva o filtro de data para dentro do OPENQUERY e usa a tabela
+    totalinfo_YYYY_MM do seu mês, então 3 dias custam 3 dias de transferência
+
+    Args:
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        granularidade (str): 'dia' ou 'mes' (ver queries.gerar_shards_discagens)
+        max_paralelo (int): Máximo de shards simultâneos no servidor
+        server_var (str): Variável do .env com o servidor
+        database_var (str): Variável do .env com o banco
+        pool (PoolConexoes): Pool de onde as conexões são retiradas
+        compactar (bool): Se True, aplica o esquema 'discagens_expert' ao resultado concatenado
+
+    Returns:
+        pd.DataFrame: Discagens do período, na ordem dos shards
+    """
+    shards = gerar_shards_discagens(dt_ini, dt_fim, granularidade)
+    consultas = {
+        shard: ConsultaSpec(server_var, database_var, get_query_discagens(*shard))
+        for shard in shards
+    }
+    dfs = carregar_em_paralelo(consultas, max_por_servidor=max_paralelo, pool=pool, compactar=False)
+
+    print(f"📊 Discagens: {len(shards)} shard(s) | {sum(len(df) for df in dfs.values()):,} linhas")
+    df = pd.concat(dfs.values(), ignore_index=True)
+    if compactar:
+        compactar_tipos(df, 'discagens_expert')
+    return df
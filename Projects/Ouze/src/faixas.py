@@ -0,0 +1,102 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ============================================
+# MOTOR DE FAIXAS (BANDING)
+# ============================================
+# Equivalente a pd.cut(valores, bins, labels=labels, right=True): intervalos
+# (b[i-1], b[i]], com o primeiro limite excluído e NaN fora das bordas.
+# As bordas e o dtype categórico de cada esquema são compilados uma única vez.
+
+class EsquemaFaixa:
+    """Bordas e rótulos de uma faixa, com o dtype categórico compartilhado"""
+
+    def __init__(self, bins, labels):
+        """
+        Args:
+            bins (list): Bordas das faixas (crescentes; aceita ±inf)
+            labels (list): Rótulos das faixas (len(bins) - 1)
+        """
+        self.bordas = np.asarray(bins, dtype=np.float64)
+        if len(self.bordas) < 2 or not np.all(np.diff(self.bordas) > 0):
+            raise ValueError("bins must increase monotonically.")
+        if len(labels) != len(self.bordas) - 1:
+            raise ValueError("Bin labels must be one fewer than the number of bin edges")
+        self.dtype = pd.CategoricalDtype(list(labels), ordered=True)
+
+    def codigos(self, valores):
+        """
+        Retorna o código da faixa de cada valor (-1 = NaN)
+
+        Args:
+            valores (np.ndarray): Valores em float64
+
+        Returns:
+            np.ndarray: Códigos nas categorias de self.dtype
+        """
+        codigos = np.searchsorted(self.bordas, valores, side='left') - 1
+        codigos[(codigos >= len(self.bordas) - 1) | np.isnan(valores)] = -1
+        return codigos
+
+    def aplicar(self, valores):
+        """
+        Args:
+            valores: Série/array numérico
+
+        Returns:
+            pd.Categorical: Faixa de cada valor
+        """
+        return pd.Categorical.from_codes(self.codigos(_para_float(valores)), dtype=self.dtype)
+
+
+@lru_cache(maxsize=None)
+def _compilar(bins, labels):
+    return EsquemaFaixa(bins, labels)
+
+
+def compilar_faixa(bins, labels):
+    """Retorna o EsquemaFaixa (compilado uma única vez) para as bordas e rótulos informados"""
+    return _compilar(tuple(bins), tuple(labels))
+
+
+def _para_float(valores):
+    serie = pd.Series(valores, copy=False)
+    if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        raise TypeError("A coluna para faixas precisa ser numérica")
+    return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def aplicar_faixas(df, especificacoes):
+    """
+    Cria várias colunas de faixa de uma vez
+
+    Cada coluna de origem é convertida para float64 uma única vez, mesmo quando
+    usada em mais de uma faixa; cada faixa é um np.searchsorted sobre as bordas
+
+    Uso:
+        aplicar_faixas(df, [
+            ('ATRASO', FAIXAS_ATRASO_BINS, FAIXAS_ATRASO_LABELS, 'FX_ATRASO'),
+            ('VALORPRIN_FIN', [0, 500, 1000, float('inf')], ['Até 500', '501-1000', 'Maior 1000']),
+        ])
+
+    Args:
+        df (pd.DataFrame): DataFrame
+        especificacoes (list): Tuplas (coluna, bins, labels) ou (coluna, bins, labels, nome_nova_coluna).
+                               Nome padrão: 'FX_{coluna}'
+
+    Returns:
+        pd.DataFrame: DataFrame com as novas colunas
+    """
+    por_coluna = {}
+    for especificacao in especificacoes:
+        coluna, bins, labels = especificacao[:3]
+        nome = especificacao[3] if len(especificacao) > 3 and especificacao[3] else f'FX_{coluna}'
+        por_coluna.setdefault(coluna, []).append((compilar_faixa(bins, labels), nome))
+
+    for coluna, esquemas in por_coluna.items():
+        valores = _para_float(df[coluna])
+        for esquema, nome in esquemas:
+            df[nome] = pd.Categorical.from_codes(esquema.codigos(valores), dtype=esquema.dtype)
+    return df
@@ -0,0 +1,376 @@
+import datetime
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ============================================
+# LEITURA COLUNAR DE CURSORES DB-API (pyodbc)
+# ============================================
+# Em vez de montar uma lista com todas as linhas (fetchall) e só depois o
+# DataFrame, lê o cursor em lotes (fetchmany) e copia cada lote direto para
+# buffers NumPy tipados por coluna. Só um lote de linhas Python existe por vez.
+#
+# DECIMAL/NUMERIC ficam como decimal.Decimal (coluna object), sem perda de
+# precisão; float64 só para as colunas pedidas em `colunas_float`.
+
+TAMANHO_LOTE_PADRAO = 50_000
+MAX_PREPARADOS_POR_CONEXAO = 16
+
+_TIPOS_NUMPY = {
+    int: 'int64',
+    float: 'float64',
+    bool: 'bool',
+    datetime.datetime: 'datetime64[us]',
+    datetime.date: 'datetime64[us]',
+}
+
+
+def _tipo_da_descricao(type_code):
+    """Tipo NumPy a partir do type_code do cursor.description (None se não informado)"""
+    return _TIPOS_NUMPY.get(type_code, 'object' if type_code is not None else None)
+
+
+def _tipo_do_valor(valores):
+    """Tipo NumPy inferido pelo primeiro valor não nulo (drivers que não informam type_code)"""
+    for valor in valores:
+        if valor is not None:
+            return _TIPOS_NUMPY.get(type(valor), 'object')
+    return None
+
+
+_TIPOS_COM_MASCARA = ('int64', 'bool')
+
+# Tipos aceitos (dtype.kind) quando o tipo da coluna foi inferido pelos valores
+_KINDS_INFERIDOS = {'int64': 'iu', 'float64': 'fiu', 'bool': 'b'}
+
+
+class _ColunaTipada:
+    """Buffer de uma coluna, com crescimento geométrico e máscara de nulos"""
+
+    def __init__(self, nome, tipo, capacidade, inferido=False):
+        self.nome = nome
+        self.tipo = None
+        self.tamanho = 0
+        self._capacidade = max(capacidade, 1)
+        self._inferido = inferido or tipo is None
+        self._valores = None
+        self._nulos = None
+        if tipo is not None:
+            self._alocar(tipo)
+
+    def _alocar(self, tipo):
+        self.tipo = tipo
+        self._valores = np.empty(self._capacidade, dtype=tipo)
+        self._nulos = np.zeros(self._capacidade, dtype=bool) if tipo in _TIPOS_COM_MASCARA else None
+
+    def _garantir_capacidade(self, necessario):
+        if necessario <= self._capacidade:
+            return
+        while self._capacidade < necessario:
+            self._capacidade *= 2
+        self._valores = np.resize(self._valores, self._capacidade)
+        if self._nulos is not None:
+            self._nulos = np.resize(self._nulos, self._capacidade)
+
+    def _converter_para_object(self):
+        valores = self._valores[:self.tamanho].astype(object)
+        if self._nulos is not None:
+            valores[self._nulos[:self.tamanho]] = None
+        self._alocar('object')
+        self._valores[:self.tamanho] = valores
+
+    def _para_array(self, valores):
+        """Converte os valores para o tipo da coluna, levantando TypeError se houver perda"""
+        if self._inferido and self.tipo in _KINDS_INFERIDOS:
+            array = np.asarray(valores)
+            if array.dtype.kind not in _KINDS_INFERIDOS[self.tipo]:
+                raise TypeError(f"Valores incompatíveis com {self.tipo}")
+            return array.astype(self.tipo, copy=False)
+        return np.array(valores, dtype=self.tipo)
+
+    def anexar(self, valores):
+        """
+        Copia os valores de um lote para o buffer
+
+        Args:
+            valores (tuple): Valores da coluna no lote
+        """
+        if self.tipo is None:
+            # Lote inteiramente nulo ainda não define o tipo
+            self._alocar(_tipo_do_valor(valores) or 'object')
+
+        inicio, fim = self.tamanho, self.tamanho + len(valores)
+        self._garantir_capacidade(fim)
+
+        try:
+            if self.tipo == 'object':
+                self._valores[inicio:fim] = valores
+            elif None in valores and self.tipo in _TIPOS_COM_MASCARA:
+                nulos = np.fromiter((v is None for v in valores), dtype=bool, count=len(valores))
+                preenchidos = [v for v in valores if v is not None]
+                if preenchidos:
+                    self._valores[inicio:fim][~nulos] = self._para_array(preenchidos)
+                self._nulos[inicio:fim] = nulos
+            elif None in valores and self.tipo == 'float64':
+                self._valores[inicio:fim] = self._para_array([np.nan if v is None else v for v in valores])
+            else:
+                self._valores[inicio:fim] = self._para_array(valores)
+        except (TypeError, OverflowError, ValueError):
+            self._converter_para_object()
+            self._valores[inicio:fim] = valores
+
+        self.tamanho = fim
+
+    def finalizar(self):
+        """
+        Returns:
+            Array da coluna (NumPy, ou array anulável do pandas para inteiros/booleanos com nulos)
+        """
+        if self.tipo is None:
+            return np.full(self.tamanho, None, dtype=object)
+        valores = self._valores[:self.tamanho]
+        if self._nulos is not None:
+            nulos = self._nulos[:self.tamanho]
+            if nulos.any():
+                if self.tipo == 'int64':
+                    return pd.arrays.IntegerArray(valores, nulos.copy())
+                return pd.arrays.BooleanArray(valores, nulos.copy())
+        return valores
+
+
+def _tipos_das_colunas(cursor, colunas_float=()):
+    """Tipo NumPy de cada coluna do cursor (float64 nas colunas pedidas em colunas_float)"""
+    return [
+        'float64' if descricao[0] in colunas_float else _tipo_da_descricao(descricao[1])
+        for descricao in cursor.description
+    ]
+
+
+def _criar_colunas(cursor, capacidade, colunas_float=()):
+    return [
+        _ColunaTipada(descricao[0], tipo, capacidade)
+        for descricao, tipo in zip(cursor.description, _tipos_das_colunas(cursor, colunas_float))
+    ]
+
+
+def _montar_dataframe(colunas):
+    return pd.DataFrame({coluna.nome: coluna.finalizar() for coluna in colunas}, copy=False)
+
+
+def ler_cursor_colunar(cursor, tamanho_lote=TAMANHO_LOTE_PADRAO, colunas_float=()):
+    """
+    Lê o result set atual de um cursor já executado para um DataFrame
+
+    Args:
+        cursor: Cursor DB-API (pyodbc) com result set (cursor.description preenchido)
+        tamanho_lote (int): Linhas por chamada de fetchmany
+        colunas_float (Collection[str]): Colunas DECIMAL/NUMERIC lidas como float64
+            (com perda de precisão). As demais ficam com decimal.Decimal
+
+    Returns:
+        pd.DataFrame: Resultado com colunas tipadas
+    """
+    capacidade = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else tamanho_lote
+    colunas = _criar_colunas(cursor, capacidade, colunas_float)
+
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        for coluna, valores in zip(colunas, zip(*lote)):
+            coluna.anexar(valores)
+        del lote
+
+    return _montar_dataframe(colunas)
+
+
+def ler_cursor_em_lotes(cursor, tamanho_lote=TAMANHO_LOTE_PADRAO, colunas_float=()):
+    """
+    Lê o result set atual de um cursor em DataFrames de até `tamanho_lote` linhas
+
+    Args:
+        cursor: Cursor DB-API (pyodbc) com result set
+        tamanho_lote (int): Linhas por chamada de fetchmany (e por DataFrame)
+        colunas_float (Collection[str]): Colunas DECIMAL/NUMERIC lidas como float64
+
+    Yields:
+        pd.DataFrame: Um DataFrame por lote
+    """
+    tipos = _tipos_das_colunas(cursor, colunas_float)
+    inferidos = [tipo is None for tipo in tipos]
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        colunas = []
+        for indice, (descricao, valores) in enumerate(zip(cursor.description, zip(*lote))):
+            coluna = _ColunaTipada(descricao[0], tipos[indice], len(lote), inferidos[indice])
+            coluna.anexar(valores)
+            # Mantém o tipo inferido no primeiro lote para os próximos
+            tipos[indice] = tipos[indice] or coluna.tipo
+            colunas.append(coluna)
+        del lote
+        yield _montar_dataframe(colunas)
+
+
+# ============================================
+# CONSULTAS PARAMETRIZADAS (STATEMENTS PREPARADOS)
+# ============================================
+# As consultas de queries.py chegam como (sql, params) com placeholders `?`: o texto
+# é o mesmo para qualquer período, então o SQL Server reaproveita o plano compilado.
+# ConexaoPreparada guarda um cursor por texto; o pyodbc só prepara o statement de
+# novo quando o texto executado no cursor muda, então chamadas e shards de dias
+# diferentes na mesma conexão reaproveitam o statement preparado. Os cursores ficam
+# no próprio objeto (as conexões pyodbc não aceitam weakref): quando a conexão é
+# fechada ou descartada, eles vão junto.
+
+
+def separar_consulta(consulta, params=None):
+    """
+    Normaliza uma consulta para (sql, params)
+
+    Args:
+        consulta (str | tuple): Texto SQL ou par (sql, params) (ex: queries.ConsultaSQL)
+        params (sequence, optional): Parâmetros, quando a consulta vem só como texto
+
+    Returns:
+        tuple: (sql, params), com params None quando não houver parâmetros
+    """
+    if isinstance(consulta, tuple):
+        if params is not None:
+            raise ValueError("Parâmetros informados duas vezes: na consulta (sql, params) e em params")
+        consulta, params = consulta
+    return consulta, (tuple(params) if params else None)
+
+
+def _fechar_cursor(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+class ConexaoPreparada:
+    """
+    Conexão DB-API com um cursor reservado por texto SQL (até max_preparados, LRU)
+
+    Os demais atributos (cursor, commit, rollback...) são os da conexão original
+
+    Uso:
+        conn = ConexaoPreparada(pyodbc.connect(...))
+        df = ler_sql_colunar(get_query_discagens(dt_ini, dt_fim), conn)
+        conn.close()   # fecha os cursores preparados e a conexão
+    """
+
+    def __init__(self, conexao, max_preparados=MAX_PREPARADOS_POR_CONEXAO):
+        """
+        Args:
+            conexao: Conexão DB-API (pyodbc)
+            max_preparados (int): Máximo de cursores preparados mantidos abertos
+        """
+        self.conexao = conexao
+        self.max_preparados = max_preparados
+        self._cursores = OrderedDict()  # texto -> cursor
+        self._lock = threading.Lock()
+
+    def __getattr__(self, nome):
+        return getattr(self.conexao, nome)
+
+    def cursor_preparado(self, sql):
+        """Cursor reservado para o texto `sql` (criado na primeira vez)"""
+        with self._lock:
+            cursor = self._cursores.pop(sql, None)
+            if cursor is None:
+                cursor = self.conexao.cursor()
+                if len(self._cursores) >= self.max_preparados:
+                    _, antigo = self._cursores.popitem(last=False)
+                    _fechar_cursor(antigo)
+            self._cursores[sql] = cursor
+            return cursor
+
+    def esquecer_cursor(self, sql):
+        """Fecha o cursor do texto `sql` (ex: depois de um erro no meio da leitura)"""
+        with self._lock:
+            cursor = self._cursores.pop(sql, None)
+        if cursor is not None:
+            _fechar_cursor(cursor)
+
+    def descartar_preparados(self):
+        """Fecha todos os cursores preparados"""
+        with self._lock:
+            cursores, self._cursores = list(self._cursores.values()), OrderedDict()
+        for cursor in cursores:
+            _fechar_cursor(cursor)
+
+    def close(self):
+        self.descartar_preparados()
+        self.conexao.close()
+
+
+def ler_sql_colunar(query, conn, tamanho_lote=TAMANHO_LOTE_PADRAO, params=None, colunas_float=()):
+    """
+    Substituto de pd.read_sql que preenche buffers tipados a partir de fetchmany
+
+    Consultas com parâmetros em uma ConexaoPreparada (ex: as do pool de
+    src.db_connection) são executadas no cursor preparado para aquele texto;
+    nas demais conexões, em um cursor novo
+
+    Args:
+        query (str | tuple): Query SQL ou par (sql, params)
+        conn: Conexão DB-API (pyodbc) ou ConexaoPreparada
+        tamanho_lote (int): Linhas por chamada de fetchmany
+        params (sequence, optional): Parâmetros para os placeholders `?` da query
+        colunas_float (Collection[str]): Colunas DECIMAL/NUMERIC lidas como float64
+
+    Returns:
+        pd.DataFrame: Resultado da query
+    """
+    sql, params = separar_consulta(query, params)
+    if params is None or not isinstance(conn, ConexaoPreparada):
+        cursor = conn.cursor()
+        try:
+            if params:
+                cursor.execute(sql, params)
+            else:
+                cursor.execute(sql)
+            return ler_cursor_colunar(cursor, tamanho_lote, colunas_float)
+        finally:
+            cursor.close()
+
+    cursor = conn.cursor_preparado(sql)
+    try:
+        cursor.execute(sql, params)
+        return ler_cursor_colunar(cursor, tamanho_lote, colunas_float)
+    except BaseException:
+        conn.esquecer_cursor(sql)
+        raise
+
+
+def ler_sql_colunar_em_lotes(query, conn, tamanho_lote=TAMANHO_LOTE_PADRAO, params=None, colunas_float=()):
+    """
+    Executa a query e devolve o resultado em DataFrames de até `tamanho_lote` linhas
+
+    Usa um cursor próprio (o result set fica aberto enquanto os lotes são consumidos)
+
+    Args:
+        query (str | tuple): Query SQL ou par (sql, params)
+        conn: Conexão DB-API (pyodbc)
+        tamanho_lote (int): Linhas por chamada de fetchmany
+        params (sequence, optional): Parâmetros para os placeholders `?` da query
+        colunas_float (Collection[str]): Colunas DECIMAL/NUMERIC lidas como float64
+
+    Yields:
+        pd.DataFrame: Um DataFrame por lote
+    """
+    sql, params = separar_consulta(query, params)
+    cursor = conn.cursor()
+    try:
+        if params:
+            cursor.execute(sql, params)
+        else:
+            cursor.execute(sql)
+        yield from ler_cursor_em_lotes(cursor, tamanho_lote, colunas_float)
+    finally:
+        cursor.close()
@@ -0,0 +1,203 @@
+import json
+import os
+
+import pandas as pd
+
+from queries import (
+    get_query_discagens_trestto,
+    get_query_mailing_hist,
+    get_query_resumo_discagens_trestto,
+    get_query_resumo_mailing_hist,
+)
+from src.cache import agrupar_intervalos, dias_do_periodo
+from src.data_wrangling_discagens_trestto import tratar_discagens_trestto
+from src.data_wrangling_mailingHist import adicionar_faixa_atraso, adicionar_produto
+from src.db_connection import POOL
+from src.extracao import ConsultaSpec, carregar_em_paralelo
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+# Fora de .cache_ouze: o limite de tamanho do CacheParquet remove partições de lá,
+# e o armazém é a única cópia dos agregados dos dias já processados
+DIRETORIO_TRESTTO_PADRAO = os.getenv('OUZE_TRESTTO_DIR', '.armazem_ouze/trestto_agregado')
+
+# ============================================
+# ARMAZÉM DIÁRIO DOS AGREGADOS TRESTTO
+# ============================================
+
+class ArmazemTrestto:
+    """
+    Armazém persistente de df_esforco e df_unique particionado por dia
+
+    Estrutura em disco:
+        <diretorio>/esforco/DATA=YYYY-MM-DD.parquet
+        <diretorio>/unique/DATA=YYYY-MM-DD.parquet
+        <diretorio>/manifesto.json   (dia -> impressão digital das bases de origem)
+    """
+
+    TABELAS = ('esforco', 'unique')
+
+    def __init__(self, diretorio=DIRETORIO_TRESTTO_PADRAO):
+        """
+        Args:
+            diretorio (str): Diretório raiz do armazém
+        """
+        self.diretorio = diretorio
+        self._caminho_manifesto = os.path.join(diretorio, 'manifesto.json')
+
+    def ler_manifesto(self):
+        """Retorna o manifesto {dia 'YYYY-MM-DD': impressão digital}"""
+        try:
+            with open(self._caminho_manifesto, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _gravar_manifesto(self, manifesto):
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f"{self._caminho_manifesto}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=1, sort_keys=True)
+        os.replace(temporario, self._caminho_manifesto)
+
+    def _arquivo(self, tabela, dia):
+        return os.path.join(self.diretorio, tabela, f"DATA={dia.strftime('%Y-%m-%d')}.parquet")
+
+    def dia_completo(self, dia):
+        """Se as partições de todas as tabelas do dia existem em disco"""
+        return all(os.path.exists(self._arquivo(tabela, dia)) for tabela in self.TABELAS)
+
+    def gravar_dia(self, dia, df_esforco, df_unique, impressao):
+        """
+        Substitui as partições de um dia e registra sua impressão digital
+
+        Os DataFrames devem ser o resultado do dia processado sozinho: a agregação
+        preenche com zeros os produtos presentes no período agregado, então recortar
+        um dia de uma agregação de vários dias traria linhas zeradas a mais
+
+        Args:
+            dia (datetime.date): Dia processado
+            df_esforco (pd.DataFrame): Esforço do dia
+            df_unique (pd.DataFrame): Únicos do dia
+            impressao (str): Impressão digital das bases de origem no dia
+        """
+        for tabela, df in zip(self.TABELAS, (df_esforco, df_unique)):
+            os.makedirs(os.path.join(self.diretorio, tabela), exist_ok=True)
+            caminho = self._arquivo(tabela, dia)
+            temporario = f"{caminho}.tmp"
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, caminho)
+
+        # O manifesto só é atualizado depois das partições: uma falha no meio
+        # deixa o dia como pendente para a próxima execução
+        manifesto = self.ler_manifesto()
+        manifesto[dia.strftime('%Y-%m-%d')] = impressao
+        self._gravar_manifesto(manifesto)
+
+    def ler(self, dt_ini, dt_fim):
+        """
+        Lê os agregados do período a partir das partições diárias
+
+        Args:
+            dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+            dt_fim (str): Data final no formato 'YYYY-MM-DD'
+
+        Returns:
+            tuple: (df_esforco, df_unique)
+        """
+        dias = dias_do_periodo(dt_ini, dt_fim)
+        resultado = []
+        for tabela in self.TABELAS:
+            presentes = [dia for dia in dias if os.path.exists(self._arquivo(tabela, dia))]
+            if len(presentes) < len(dias):
+                faltando = sorted(set(dias) - set(presentes))
+                print(f"⚠️  Armazém Trestto: {len(faltando)} dia(s) sem partição de {tabela} "
+                      f"({', '.join(dia.strftime('%Y-%m-%d') for dia in faltando)})")
+            partes = [pd.read_parquet(self._arquivo(tabela, dia)) for dia in presentes]
+            resultado.append(pd.concat(partes, ignore_index=True) if partes else pd.DataFrame())
+        return tuple(resultado)
+
+# ============================================
+# ATUALIZAÇÃO INCREMENTAL
+# ============================================
+
+def preparar_mailing_trestto(df_mailing_hist):
+    """Adiciona ao mailing as colunas usadas na segmentação do Trestto (PRODUTO e FX_ATRASO)"""
+    df_mailing_hist = adicionar_produto(df_mailing_hist)
+    df_mailing_hist = adicionar_faixa_atraso(df_mailing_hist)
+    return df_mailing_hist
+
+
+def _impressoes_por_dia(df_resumo_trestto, df_resumo_mailing, dias):
+    """Monta a impressão digital de cada dia a partir dos resumos das duas bases"""
+    def por_dia(df):
+        if df.empty:
+            return {}
+        datas = pd.to_datetime(df['DATA']).dt.strftime('%Y-%m-%d')
+        return dict(zip(datas, df['QTD'].astype(str) + ':' + df['CHECKSUM'].astype(str)))
+
+    trestto, mailing = por_dia(df_resumo_trestto), por_dia(df_resumo_mailing)
+    impressoes = {}
+    for dia in dias:
+        chave = dia.strftime('%Y-%m-%d')
+        impressoes[chave] = f"trestto={trestto.get(chave, '0:')}|mailing={mailing.get(chave, '0:')}"
+    return impressoes
+
+
+def atualizar_trestto_incremental(armazem, dt_ini, dt_fim, pool=POOL, preparar_mailing=preparar_mailing_trestto):
+    """
+    Atualiza o armazém só com os dias novos ou alterados e devolve o período completo
+
+    Um dia é reprocessado quando não está no manifesto, quando a impressão digital
+    (quantidade + checksum por DATA em DISCAGENS_TRESTTO e MAILING_HIST) mudou ou
+    quando alguma partição do dia sumiu do disco
+
+    Os dias pendentes contínuos são extraídos em uma consulta por intervalo, mas cada
+    dia é agregado separadamente: a partição gravada é igual à de processar o dia sozinho
+
+    Args:
+        armazem (ArmazemTrestto): Armazém dos agregados diários
+        dt_ini (str): Data inicial no formato 'YYYY-MM-DD'
+        dt_fim (str): Data final no formato 'YYYY-MM-DD'
+        pool (PoolConexoes): Pool de onde as conexões são retiradas
+        preparar_mailing (callable): Função que adiciona PRODUTO e FX_ATRASO ao mailing
+
+    Returns:
+        tuple: (df_esforco, df_unique) do período completo
+    """
+    dias = dias_do_periodo(dt_ini, dt_fim)
+    resumos = carregar_em_paralelo({
+        'resumo_trestto': ConsultaSpec("SERVER_BD2", "DATABASE_TRC", get_query_resumo_discagens_trestto(dt_ini, dt_fim)),
+        'resumo_mailing': ConsultaSpec("SERVER_BD2", "DATABASE_BD2", get_query_resumo_mailing_hist(dt_ini, dt_fim)),
+    }, pool=pool)
+    impressoes = _impressoes_por_dia(resumos['resumo_trestto'], resumos['resumo_mailing'], dias)
+
+    manifesto = armazem.ler_manifesto()
+    pendentes = [
+        dia for dia in dias
+        if manifesto.get(dia.strftime('%Y-%m-%d')) != impressoes[dia.strftime('%Y-%m-%d')]
+        or not armazem.dia_completo(dia)
+    ]
+    print(f"📅 Trestto incremental: {len(dias) - len(pendentes)} dia(s) em disco | {len(pendentes)} dia(s) a processar")
+
+    for ini, fim in agrupar_intervalos(pendentes):
+        ini_str, fim_str = ini.strftime('%Y-%m-%d'), fim.strftime('%Y-%m-%d')
+        dfs = carregar_em_paralelo({
+            'discagens_trestto': ConsultaSpec("SERVER_BD2", "DATABASE_TRC", get_query_discagens_trestto(ini_str, fim_str, agregar=True)),
+            'mailing_hist': ConsultaSpec("SERVER_BD2", "DATABASE_BD2", get_query_mailing_hist(ini_str, fim_str)),
+        }, pool=pool)
+
+        df_trestto, df_mailing = dfs['discagens_trestto'], preparar_mailing(dfs['mailing_hist'])
+        trestto_por_dia = dict(tuple(df_trestto.groupby(pd.to_datetime(df_trestto['DATA']).dt.date, sort=False)))
+        mailing_por_dia = dict(tuple(df_mailing.groupby(pd.to_datetime(df_mailing['DATA']).dt.date, sort=False)))
+
+        for dia in [dia for dia in pendentes if ini <= dia <= fim]:
+            df_esforco, df_unique = tratar_discagens_trestto(
+                trestto_por_dia.get(dia, df_trestto.iloc[0:0]),
+                mailing_por_dia.get(dia, df_mailing.iloc[0:0])
+            )
+            armazem.gravar_dia(dia, df_esforco, df_unique, impressoes[dia.strftime('%Y-%m-%d')])
+
+    return armazem.ler(dt_ini, dt_fim)
@@ -0,0 +1,195 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+DIRETORIO_INDICE_PADRAO = os.getenv('OUZE_INDICE_CONTRATOS_DIR', '.cache_ouze/indice_contratos')
+
+# Maior quantidade de dígitos que sempre cabe em int64
+_MAX_DIGITOS_CHAVE = 18
+
+# Texto só com dígitos, aceitando o ".0" de inteiros que passaram por float (ex: '123.0')
+_PADRAO_CHAVE = r'^(\d{1,%d})(?:\.0*)?$' % _MAX_DIGITOS_CHAVE
+
+# ============================================
+# ÍNDICE CONTRATO -> VALOR PRINCIPAL
+# ============================================
+
+def _chaves_float(valores):
+    """Chaves de um array float64: só valores integrais, não negativos e que cabem em int64"""
+    with np.errstate(invalid='ignore'):
+        validos = (valores >= 0) & (valores < 10.0 ** _MAX_DIGITOS_CHAVE) & (np.floor(valores) == valores)
+    chaves = np.full(len(valores), -1, dtype=np.int64)
+    chaves[validos] = valores[validos].astype(np.int64)
+    return chaves, validos
+
+
+def chaves_numericas(serie):
+    """
+    Converte contratos para int64
+
+    Inteiros, floats integrais (ex: 123.0 de uma coluna com NaN) e textos só com
+    dígitos viram chaves; nulos, floats com casas decimais, negativos e textos com
+    outros caracteres (ex: '+12', '1_000') ficam fora da máscara (chave -1)
+
+    A comparação é pelo número: '00123', '123' e 123 são o mesmo contrato, a mesma
+    regra de src.compactacao.chave_int64 (as colunas 'chave' já chegam como int64)
+
+    Args:
+        serie (pd.Series): Contratos (inteiros, floats ou texto)
+
+    Returns:
+        tuple: (chaves int64, máscara dos valores convertidos)
+    """
+    if pd.api.types.is_integer_dtype(serie):
+        validos = serie.notna().to_numpy()
+        return serie.fillna(-1).to_numpy(dtype=np.int64), validos
+    if pd.api.types.is_float_dtype(serie):
+        return _chaves_float(serie.to_numpy(dtype=np.float64, na_value=np.nan))
+
+    if pd.api.types.infer_dtype(serie, skipna=False) == 'integer':
+        try:
+            # Caminho rápido: todos os valores já são inteiros (texto vai pela regex,
+            # pois int() aceitaria '+12' e '1_000')
+            chaves = serie.to_numpy(dtype=object).astype(np.int64)
+            if len(chaves) == 0 or chaves.min() >= 0:
+                return chaves, np.ones(len(chaves), dtype=bool)
+        except (TypeError, ValueError, OverflowError):
+            pass
+
+    digitos = serie.astype(str).str.strip().str.extract(_PADRAO_CHAVE, expand=False)
+    validos = digitos.notna().to_numpy()
+    chaves = np.full(len(digitos), -1, dtype=np.int64)
+    chaves[validos] = digitos[validos].astype(np.int64).to_numpy()
+    return chaves, validos
+
+
+def _texto_contratos(serie):
+    """Contrato como texto, para os que não viram chave numérica"""
+    return serie.astype(str).str.strip().to_numpy(dtype=object)
+
+
+class IndiceContratos:
+    """
+    Índice ordenado contrato (int64) -> VALORPRIN_FIN (float64)
+
+    Persistido como dois arrays .npy (chaves ordenadas e valores) e aberto com
+    memory-map; a consulta é um searchsorted vetorizado. Para contratos repetidos
+    no CAD_DEVF vale o último valor recebido
+
+    Contratos que não viram chave numérica (ex: com letras) ficam em uma tabela
+    à parte pelo texto (`outros`, persistida em outros.parquet) e são contados no log
+    """
+
+    def __init__(self, diretorio=DIRETORIO_INDICE_PADRAO):
+        """
+        Args:
+            diretorio (str, optional): Diretório dos arrays. None para um índice só em memória
+        """
+        self.diretorio = diretorio
+        self.chaves = np.empty(0, dtype=np.int64)
+        self.valores = np.empty(0, dtype=np.float64)
+        self.outros = pd.Series(dtype=np.float64)
+        if diretorio is not None and os.path.exists(self._caminho('chaves')):
+            self.chaves = np.load(self._caminho('chaves'), mmap_mode='r')
+            self.valores = np.load(self._caminho('valores'), mmap_mode='r')
+        if diretorio is not None and os.path.exists(self._caminho('outros', 'parquet')):
+            self.outros = pd.read_parquet(self._caminho('outros', 'parquet')).set_index('CONTRATO')['VALORPRIN_FIN']
+
+    @classmethod
+    def em_memoria(cls, df_cad_devf):
+        """Monta um índice não persistido a partir de um DataFrame CAD_DEVF"""
+        indice = cls(diretorio=None)
+        indice.atualizar(df_cad_devf)
+        return indice
+
+    def _caminho(self, nome, extensao='npy'):
+        return os.path.join(self.diretorio, f"{nome}.{extensao}")
+
+    def __len__(self):
+        return len(self.chaves) + len(self.outros)
+
+    def atualizar(self, df_cad_devf):
+        """
+        Incorpora contratos novos ou alterados (o valor recebido substitui o existente)
+
+        Args:
+            df_cad_devf (pd.DataFrame): Saída de get_query_cad_devf (CONTRATO_FIN e VALORPRIN_FIN)
+        """
+        contratos = df_cad_devf['CONTRATO_FIN']
+        chaves, validos = chaves_numericas(contratos)
+        valores = pd.to_numeric(df_cad_devf['VALORPRIN_FIN'], errors='coerce').to_numpy(dtype=np.float64)
+
+        repetidos = pd.DataFrame({'chave': chaves[validos], 'valor': valores[validos]}).groupby('chave')['valor'].nunique()
+        if (repetidos > 1).any():
+            print(f"⚠️  Índice de contratos: {(repetidos > 1).sum():,} contrato(s) repetidos com valores "
+                  f"diferentes (vale o último recebido)")
+
+        sem_chave = ~validos & contratos.notna().to_numpy()
+        outros = self.outros
+        if sem_chave.any():
+            print(f"⚠️  Índice de contratos: {sem_chave.sum():,} contrato(s) fora do formato numérico (indexados pelo texto)")
+            novos = pd.Series(valores[sem_chave], index=_texto_contratos(contratos[sem_chave]), dtype=np.float64)
+            outros = pd.concat([outros, novos])
+            outros = outros[~outros.index.duplicated(keep='last')]
+
+        chaves, valores = chaves[validos], valores[validos]
+
+        # Novos depois dos existentes: no drop de duplicados por chave fica o mais recente
+        todas_chaves = np.concatenate([np.asarray(self.chaves), chaves])
+        todos_valores = np.concatenate([np.asarray(self.valores), valores])
+        ordem = np.argsort(todas_chaves, kind='stable')
+        todas_chaves, todos_valores = todas_chaves[ordem], todos_valores[ordem]
+        ultimo = np.append(todas_chaves[1:] != todas_chaves[:-1], True)
+        chaves, valores = todas_chaves[ultimo], todos_valores[ultimo]
+
+        if self.diretorio is None:
+            self.chaves, self.valores, self.outros = chaves, valores, outros
+            return
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        # Solta o memory-map antes de substituir os arquivos (necessário no Windows)
+        self.chaves = self.valores = None
+        for nome, array in (('chaves', chaves), ('valores', valores)):
+            temporario = self._caminho(f"{nome}.tmp")
+            with open(temporario, 'wb') as f:
+                np.save(f, array)
+            os.replace(temporario, self._caminho(nome))
+        self.chaves = np.load(self._caminho('chaves'), mmap_mode='r')
+        self.valores = np.load(self._caminho('valores'), mmap_mode='r')
+
+        if outros is not self.outros:
+            temporario = self._caminho('outros.tmp', 'parquet')
+            outros.rename_axis('CONTRATO').rename('VALORPRIN_FIN').reset_index().to_parquet(temporario, index=False)
+            os.replace(temporario, self._caminho('outros', 'parquet'))
+            self.outros = outros
+
+    def consultar(self, contratos):
+        """
+        Busca o valor principal de cada contrato
+
+        Args:
+            contratos (pd.Series): Contratos (inteiros ou texto)
+
+        Returns:
+            np.ndarray: VALORPRIN_FIN (float64), NaN para contratos não encontrados
+        """
+        chaves, validos = chaves_numericas(contratos)
+        resultado = np.full(len(chaves), np.nan, dtype=np.float64)
+
+        sem_chave = ~validos & contratos.notna().to_numpy()
+        if sem_chave.any():
+            print(f"⚠️  {sem_chave.sum():,} contrato(s) fora do formato numérico (busca pelo texto)")
+            resultado[sem_chave] = self.outros.reindex(_texto_contratos(contratos[sem_chave])).to_numpy()
+        if len(self.chaves) == 0:
+            return resultado
+
+        posicoes = np.searchsorted(self.chaves, chaves)
+        posicoes[posicoes == len(self.chaves)] = 0
+        encontrados = validos & (self.chaves[posicoes] == chaves)
+        resultado[encontrados] = self.valores[posicoes[encontrados]]
+        return resultado
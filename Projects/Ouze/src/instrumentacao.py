@@ -0,0 +1,336 @@
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterator
+
+import pandas as pd
+import psutil
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, start_http_server, write_to_textfile
+from pythonjsonlogger.json import JsonFormatter
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+NOME_LOGGER = 'ouze'
+ARQUIVO_LOG_PADRAO = os.getenv('OUZE_LOG_ARQUIVO')
+PORTA_METRICAS_PADRAO = int(os.getenv('OUZE_METRICAS_PORTA', 9108))
+INTERVALO_AMOSTRAGEM_RSS = 0.05
+
+logger = logging.getLogger(NOME_LOGGER)
+
+# ============================================
+# MÉTRICAS PROMETHEUS
+# ============================================
+
+DURACAO_ETAPA = Histogram(
+    'ouze_etapa_duracao_segundos', 'Tempo de parede de cada etapa', ['etapa'],
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+EXECUCOES_ETAPA = Counter('ouze_etapa_execucoes', 'Execuções de cada etapa', ['etapa', 'status'])
+LINHAS_ENTRADA = Counter('ouze_etapa_linhas_entrada', 'Linhas recebidas pela etapa', ['etapa'])
+LINHAS_SAIDA = Counter('ouze_etapa_linhas_saida', 'Linhas devolvidas pela etapa', ['etapa'])
+BYTES_SAIDA = Counter('ouze_etapa_bytes_saida', 'Memória rasa dos DataFrames devolvidos pela etapa (colunas object: só ponteiros)', ['etapa'])
+PICO_MEMORIA = Gauge('ouze_etapa_pico_memoria_delta_bytes', 'Pico de RSS acima do início da etapa (última execução)', ['etapa'])
+CARDINALIDADE_JOIN = Gauge('ouze_etapa_join_linhas', 'Linhas de cada lado do join e do resultado (última execução)', ['etapa', 'lado'])
+
+# ============================================
+# LOGS JSON
+# ============================================
+
+def configurar_logs(arquivo=ARQUIVO_LOG_PADRAO, nivel=logging.INFO):
+    """
+    Configura o logger 'ouze' para escrever uma linha JSON por evento
+
+    Args:
+        arquivo (str, optional): Arquivo de log (append). Default: stderr
+        nivel (int): Nível do logger
+
+    Returns:
+        logging.Logger: Logger configurado
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.FileHandler(arquivo, encoding='utf-8') if arquivo else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter(
+        '{asctime}{levelname}{name}{message}', style='{',
+        rename_fields={'asctime': 'instante', 'levelname': 'nivel', 'name': 'logger', 'message': 'evento'},
+    ))
+    logger.addHandler(handler)
+    logger.setLevel(nivel)
+    logger.propagate = False
+    return logger
+
+
+def iniciar_servidor_metricas(porta=PORTA_METRICAS_PADRAO, endereco='0.0.0.0'):
+    """
+    Expõe as métricas em http://<endereco>:<porta>/metrics para o Prometheus
+
+    Args:
+        porta (int): Porta HTTP
+        endereco (str): Endereço de escuta
+    """
+    start_http_server(porta, addr=endereco)
+    logger.info('servidor_metricas', extra={'porta': porta})
+
+
+def gravar_metricas(caminho):
+    """
+    Grava as métricas no formato texto do Prometheus (textfile collector do node_exporter),
+    para execuções em lote que terminam antes de serem coletadas
+
+    Args:
+        caminho (str): Arquivo .prom
+    """
+    write_to_textfile(caminho, REGISTRY)
+
+
+# ============================================
+# MEDIÇÃO DE ETAPAS
+# ============================================
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+_coletor_medicoes = contextvars.ContextVar('coletor_medicoes', default=None)
+
+
+def _contar_linhas(valor):
+    """Linhas de um DataFrame/Series ou da soma dos DataFrames de uma tupla/lista/dict"""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return len(valor)
+    if isinstance(valor, dict):
+        valor = list(valor.values())
+    if isinstance(valor, (tuple, list)):
+        return sum(len(item) for item in valor if isinstance(item, (pd.DataFrame, pd.Series)))
+    return 0
+
+
+def _contar_bytes(valor):
+    """
+    Memória rasa dos DataFrames/Series: O(colunas), sem percorrer as strings das
+    colunas object (que contam só os ponteiros). É o tamanho em memória do
+    resultado, não o volume transferido pelo driver
+    """
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=False, deep=False).sum())
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=False, deep=False))
+    if isinstance(valor, dict):
+        valor = list(valor.values())
+    if isinstance(valor, (tuple, list)):
+        return sum(_contar_bytes(item) for item in valor)
+    return 0
+
+
+def _contar_ao_consumir(blocos, medicao):
+    """Repassa os blocos de um iterador (ex: ler_em_chunks), somando as linhas de cada um na entrada"""
+    for bloco in blocos:
+        medicao.registrar_entrada(bloco)
+        yield bloco
+
+
+class AmostradorRSS:
+    """Amostra o RSS do processo em uma thread e guarda o pico"""
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM_RSS):
+        self.intervalo = intervalo
+        self._processo = psutil.Process()
+        self._parar = threading.Event()
+        self.inicial = self.pico = self._processo.memory_info().rss
+
+    def _amostrar(self):
+        while not self._parar.is_set():
+            self.pico = max(self.pico, self._processo.memory_info().rss)
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self):
+        self.inicial = self.pico = self._processo.memory_info().rss
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+        self.pico = max(self.pico, self._processo.memory_info().rss)
+
+
+class MedicaoEtapa:
+    """
+    Mede uma etapa: tempo de parede, linhas de entrada/saída, bytes, pico de memória
+    e cardinalidade de joins. Ao sair, grava um log JSON e atualiza as métricas Prometheus
+
+    Uso:
+        with MedicaoEtapa('extracao.mailing_hist') as medicao:
+            df = ler_sql_colunar(query, conn)
+            medicao.registrar_saida(df)
+
+    O pico de memória é do processo inteiro: etapas rodando em paralelo entram no
+    pico umas das outras
+    """
+
+    def __init__(self, etapa, **contexto):
+        """
+        Args:
+            etapa (str): Nome da etapa (label 'etapa' das métricas)
+            **contexto: Campos extras para o log (ex: dt_ini, dt_fim)
+        """
+        self.etapa = etapa
+        self.contexto = contexto
+        self.linhas_entrada = 0
+        self.linhas_saida = 0
+        self.bytes_saida = 0
+        self.joins = []
+        self.duracao = None
+        self._amostrador = AmostradorRSS()
+
+    def registrar_entrada(self, *valores):
+        """Soma as linhas dos DataFrames recebidos"""
+        self.linhas_entrada += sum(_contar_linhas(valor) for valor in valores)
+
+    def registrar_saida(self, valor):
+        """Soma as linhas e bytes dos DataFrames devolvidos"""
+        self.linhas_saida += _contar_linhas(valor)
+        self.bytes_saida += _contar_bytes(valor)
+
+    def registrar_join(self, esquerda, direita, resultado, nome='join'):
+        """
+        Registra a cardinalidade de um join
+
+        Args:
+            esquerda (int): Linhas do lado esquerdo
+            direita (int): Linhas do lado direito
+            resultado (int): Linhas após o join
+            nome (str): Identificação do join dentro da etapa
+        """
+        self.joins.append({'nome': nome, 'esquerda': int(esquerda), 'direita': int(direita), 'resultado': int(resultado)})
+
+    def __enter__(self):
+        self._token = _medicao_atual.set(self)
+        self._amostrador.__enter__()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        self.duracao = time.perf_counter() - self._inicio
+        self._amostrador.__exit__(tipo_erro, erro, traceback)
+        _medicao_atual.reset(self._token)
+        registro = {
+            'etapa': self.etapa,
+            'status': 'erro' if tipo_erro else 'ok',
+            'duracao_s': round(self.duracao, 4),
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'bytes_saida': self.bytes_saida,
+            'pico_memoria_delta_bytes': max(0, self._amostrador.pico - self._amostrador.inicial),
+            'joins': self.joins,
+            **self.contexto,
+        }
+        _atualizar_metricas(registro)
+        coletor = _coletor_medicoes.get()
+        if coletor is not None:
+            coletor.append(registro)
+
+        if not logger.handlers:
+            configurar_logs()
+        if tipo_erro:
+            registro['erro'] = f"{tipo_erro.__name__}: {erro}"
+            logger.error('etapa', extra=registro)
+        else:
+            logger.info('etapa', extra=registro)
+        return False
+
+
+def _atualizar_metricas(registro):
+    """Atualiza as métricas Prometheus deste processo com o registro de uma etapa"""
+    etapa = registro['etapa']
+    DURACAO_ETAPA.labels(etapa).observe(registro['duracao_s'])
+    EXECUCOES_ETAPA.labels(etapa, registro['status']).inc()
+    LINHAS_ENTRADA.labels(etapa).inc(registro['linhas_entrada'])
+    LINHAS_SAIDA.labels(etapa).inc(registro['linhas_saida'])
+    BYTES_SAIDA.labels(etapa).inc(registro['bytes_saida'])
+    PICO_MEMORIA.labels(etapa).set(registro['pico_memoria_delta_bytes'])
+    for join in registro['joins']:
+        for lado in ('esquerda', 'direita', 'resultado'):
+            CARDINALIDADE_JOIN.labels(etapa, f"{join['nome']}.{lado}").set(join[lado])
+
+
+@contextlib.contextmanager
+def coletar_medicoes():
+    """
+    Guarda os registros das etapas medidas dentro do bloco
+
+    Usado nos processos filhos (src.paralelo): as métricas Prometheus de lá não
+    chegam ao registro do processo principal, então os registros voltam junto com o
+    resultado e são reaplicados com aplicar_medicoes
+
+    Yields:
+        list: Registros (dict) das etapas concluídas dentro do bloco
+    """
+    registros = []
+    token = _coletor_medicoes.set(registros)
+    try:
+        yield registros
+    finally:
+        _coletor_medicoes.reset(token)
+
+
+def aplicar_medicoes(registros):
+    """
+    Atualiza as métricas deste processo com registros de etapas medidas em outro processo
+    (o log JSON de cada uma já foi gravado lá)
+
+    Args:
+        registros (list): Registros devolvidos por coletar_medicoes
+    """
+    for registro in registros:
+        _atualizar_metricas(registro)
+
+
+def medicao_atual():
+    """
+    Retorna a MedicaoEtapa em andamento na thread atual (None fora de uma etapa medida)
+
+    Uso dentro de uma função instrumentada:
+        medicao = medicao_atual()
+        if medicao:
+            medicao.registrar_join(len(esquerda), len(direita), len(resultado))
+    """
+    return _medicao_atual.get()
+
+
+def instrumentar(etapa=None):
+    """
+    Decorator que mede cada chamada da função com MedicaoEtapa
+
+    As linhas de entrada são as dos DataFrames passados como argumento e as de
+    saída as do retorno (DataFrame, tupla ou dict de DataFrames). Argumentos que
+    são iteradores de blocos (ex: geradores de ler_em_chunks) são contados à
+    medida que a função consome cada bloco
+
+    Uso:
+        @instrumentar()
+        def tratar_acionamentos(df): ...
+
+    Args:
+        etapa (str, optional): Nome da etapa. Default: nome da função
+    """
+    def decorator(funcao):
+        nome = etapa or funcao.__name__
+
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            with MedicaoEtapa(nome) as medicao:
+                args = [_contar_ao_consumir(arg, medicao) if isinstance(arg, Iterator) else arg for arg in args]
+                kwargs = {chave: _contar_ao_consumir(arg, medicao) if isinstance(arg, Iterator) else arg
+                          for chave, arg in kwargs.items()}
+                medicao.registrar_entrada(*args, *kwargs.values())
+                resultado = funcao(*args, **kwargs)
+                medicao.registrar_saida(resultado)
+            return resultado
+        return wrapper
+    return decorator
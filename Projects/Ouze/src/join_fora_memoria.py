@@ -0,0 +1,300 @@
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.indice_contratos import chaves_numericas
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+MEMORIA_MAXIMA_PADRAO_MB = int(os.getenv('OUZE_MEMORIA_MAXIMA_MB', 2048))
+DIRETORIO_SPILL_PADRAO = os.getenv('OUZE_SPILL_DIR')  # None -> diretório temporário do sistema
+
+# Memória de trabalho do join em relação ao tamanho da partição (chaves, consolidação, join)
+FATOR_MEMORIA_TRABALHO = 4
+PARTICOES_SEM_ESTIMATIVA = 32
+MAX_NIVEIS_REPARTICAO = 3
+
+# ============================================
+# HASH DE PARTIÇÃO
+# ============================================
+
+def _misturar(valores, semente):
+    """Finalizador do splitmix64: espalha chaves próximas (CPFs sequenciais) entre as partições"""
+    with np.errstate(over='ignore'):
+        x = valores.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15) * np.uint64(semente + 1)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def chaves_inteiras(serie):
+    """
+    Chave int64 de cada valor (ex: CPF)
+
+    Valores que representam o mesmo número (123 e '123') viram a mesma chave;
+    textos que não são só dígitos usam o hash do texto
+
+    Args:
+        serie (pd.Series): Chave do join
+
+    Returns:
+        np.ndarray: Chave int64 de cada linha
+    """
+    if pd.api.types.is_integer_dtype(serie):
+        return serie.fillna(-1).to_numpy(dtype=np.int64)
+    chaves, validos = chaves_numericas(serie)
+    if not validos.all():
+        texto = serie[~validos].astype(str).to_numpy(dtype=object)
+        chaves = chaves.copy()
+        chaves[~validos] = pd.util.hash_array(texto).astype(np.int64)
+    return chaves
+
+
+def hash_chaves(serie, semente=0):
+    """
+    Hash de 64 bits (splitmix64) de cada valor da chave, com a mesma equivalência de chaves_inteiras
+
+    Args:
+        serie (pd.Series): Chave (ex: CPF)
+        semente (int): Semente do hash
+
+    Returns:
+        np.ndarray: Hash uint64 de cada linha
+    """
+    return _misturar(chaves_inteiras(serie), semente)
+
+
+def particoes_hash(serie, n_particoes, semente=0):
+    """
+    Partição de cada valor da chave (ex: CPF)
+
+    Valores que representam o mesmo número (123 e '123') caem na mesma partição,
+    então os dois lados do join podem ser particionados separadamente mesmo se um
+    vier como inteiro e o outro como texto
+
+    Args:
+        serie (pd.Series): Chave do join
+        n_particoes (int): Quantidade de partições
+        semente (int): Semente do hash (muda a cada nível de repartição)
+
+    Returns:
+        np.ndarray: Partição (int64) de cada linha
+    """
+    return (hash_chaves(serie, semente) % np.uint64(n_particoes)).astype(np.int64)
+
+
+# ============================================
+# ARQUIVOS DE SPILL
+# ============================================
+
+class SpillParticionado:
+    """
+    Grava os lados de um join particionados por hash da chave em arquivos parquet
+
+    Estrutura em disco:
+        <diretorio>/<lado>/p=00012/parte-00003.parquet   (um arquivo por bloco de entrada)
+    """
+
+    def __init__(self, diretorio, n_particoes, coluna_chave='CPF', semente=0):
+        """
+        Args:
+            diretorio (str): Diretório dos arquivos (precisa estar vazio ou não existir)
+            n_particoes (int): Quantidade de partições
+            coluna_chave (str): Coluna usada no hash
+            semente (int): Semente do hash
+        """
+        self.diretorio = diretorio
+        self.n_particoes = n_particoes
+        self.coluna_chave = coluna_chave
+        self.semente = semente
+        self.dtypes = {}
+        self._partes = {}
+
+    def _caminho_particao(self, lado, particao):
+        return os.path.join(self.diretorio, lado, f"p={particao:05d}")
+
+    def gravar(self, lado, df):
+        """
+        Distribui um bloco de um dos lados entre as partições
+
+        Args:
+            lado (str): Nome do lado (ex: 'trestto', 'mailing')
+            df (pd.DataFrame): Bloco a gravar
+        """
+        # Guarda os tipos do primeiro bloco para restaurar categóricos na leitura
+        self.dtypes.setdefault(lado, df.dtypes.to_dict())
+        parte = self._partes.get(lado, 0)
+        self._partes[lado] = parte + 1
+        if df.empty:
+            return
+
+        particoes = particoes_hash(df[self.coluna_chave], self.n_particoes, self.semente)
+        ordem = np.argsort(particoes, kind='stable')
+        limites = np.concatenate([[0], np.cumsum(np.bincount(particoes, minlength=self.n_particoes))])
+        ordenado = df.take(ordem)
+
+        for particao in np.flatnonzero(np.diff(limites)):
+            diretorio = self._caminho_particao(lado, particao)
+            os.makedirs(diretorio, exist_ok=True)
+            bloco = ordenado.iloc[limites[particao]:limites[particao + 1]]
+            bloco.to_parquet(os.path.join(diretorio, f"parte-{parte:05d}.parquet"), index=False)
+
+    def arquivos(self, lado, particao):
+        diretorio = self._caminho_particao(lado, particao)
+        if not os.path.isdir(diretorio):
+            return []
+        return sorted(os.path.join(diretorio, arquivo) for arquivo in os.listdir(diretorio))
+
+    def tamanho_em_memoria(self, particao):
+        """Bytes descomprimidos (metadados do parquet) dos dois lados de uma partição"""
+        total = 0
+        for lado in self.dtypes:
+            for arquivo in self.arquivos(lado, particao):
+                metadados = pq.ParquetFile(arquivo).metadata
+                total += sum(metadados.row_group(i).total_byte_size for i in range(metadados.num_row_groups))
+        return total
+
+    def ler(self, lado, particao):
+        """
+        Lê uma partição de um lado, com os tipos originais
+
+        Returns:
+            pd.DataFrame: Linhas do lado na partição (vazio, com as colunas, se não houver)
+        """
+        dtypes = self.dtypes[lado]
+        arquivos = self.arquivos(lado, particao)
+        if not arquivos:
+            return pd.DataFrame({coluna: pd.Series(dtype=tipo) for coluna, tipo in dtypes.items()})
+        df = pd.concat([pd.read_parquet(arquivo) for arquivo in arquivos], ignore_index=True)
+        return self._restaurar_tipos(lado, df)
+
+    def ler_em_lotes(self, lado, particao, memoria_lote):
+        """
+        Lê uma partição de um lado em lotes, sem carregá-la inteira
+
+        Args:
+            lado (str): Nome do lado
+            particao (int): Partição
+            memoria_lote (int): Bytes (descomprimidos) aproximados de cada lote
+
+        Yields:
+            pd.DataFrame: Lotes com os tipos originais
+        """
+        for arquivo in self.arquivos(lado, particao):
+            arquivo_parquet = pq.ParquetFile(arquivo)
+            metadados = arquivo_parquet.metadata
+            if metadados.num_rows == 0:
+                continue
+            bytes_por_linha = sum(
+                metadados.row_group(i).total_byte_size for i in range(metadados.num_row_groups)
+            ) / metadados.num_rows
+            linhas_por_lote = max(1024, int(memoria_lote / max(bytes_por_linha, 1)))
+            for lote in arquivo_parquet.iter_batches(batch_size=linhas_por_lote):
+                yield self._restaurar_tipos(lado, lote.to_pandas())
+
+    def _restaurar_tipos(self, lado, df):
+        for coluna, tipo in self.dtypes[lado].items():
+            if df[coluna].dtype != tipo:
+                df[coluna] = df[coluna].astype(tipo)
+        return df
+
+
+# ============================================
+# JOIN PARTICIONADO
+# ============================================
+
+def _blocos(fonte):
+    """DataFrame único ou iterável de blocos (ex: src.extracao.ler_em_chunks)"""
+    if isinstance(fonte, pd.DataFrame):
+        yield fonte
+    else:
+        yield from fonte
+
+
+def _estimar_particoes(fontes, memoria_maxima_mb):
+    """Partições para que cada uma caiba no orçamento; None se o tamanho das fontes não é conhecido"""
+    if not all(isinstance(fonte, pd.DataFrame) for fonte in fontes.values()):
+        return None
+    total = sum(int(fonte.memory_usage(index=False, deep=True).sum()) for fonte in fontes.values())
+    return max(1, math.ceil(total * FATOR_MEMORIA_TRABALHO / (memoria_maxima_mb * 1024**2)))
+
+
+def _processar_spill(spill, processar, memoria_maxima_mb, nivel):
+    """Processa cada partição; partições acima do orçamento são reparticionadas com outra semente"""
+    orcamento = memoria_maxima_mb * 1024**2
+    for particao in range(spill.n_particoes):
+        tamanho = spill.tamanho_em_memoria(particao)
+        if tamanho == 0:
+            continue
+
+        if tamanho * FATOR_MEMORIA_TRABALHO > orcamento and nivel < MAX_NIVEIS_REPARTICAO:
+            # Partição grande demais (ex: distribuição desigual): divide de novo, lendo
+            # os arquivos dela em lotes (a partição nunca fica inteira em memória)
+            sub_spill = SpillParticionado(
+                os.path.join(spill.diretorio, f"sub-{nivel + 1}-{particao:05d}"),
+                math.ceil(tamanho * FATOR_MEMORIA_TRABALHO / orcamento) + 1,
+                spill.coluna_chave, semente=spill.semente + nivel + 1,
+            )
+            sub_spill.dtypes = dict(spill.dtypes)
+            for lado in spill.dtypes:
+                for lote in spill.ler_em_lotes(lado, particao, orcamento // FATOR_MEMORIA_TRABALHO):
+                    sub_spill.gravar(lado, lote)
+            yield from _processar_spill(sub_spill, processar, memoria_maxima_mb, nivel + 1)
+            shutil.rmtree(sub_spill.diretorio, ignore_errors=True)
+            continue
+
+        yield processar({lado: spill.ler(lado, particao) for lado in spill.dtypes})
+
+
+def juntar_por_particoes(fontes, processar, coluna_chave='CPF', memoria_maxima_mb=MEMORIA_MAXIMA_PADRAO_MB,
+                         colunas=None, transformacoes=None, n_particoes=None, diretorio=DIRETORIO_SPILL_PADRAO):
+    """
+    Hash join fora de memória: particiona todos os lados pela chave em arquivos
+    locais e chama `processar` partição a partição
+
+    Como cada valor da chave cai em uma única partição, qualquer join/agrupamento
+    pela chave feito dentro de `processar` vê todas as linhas daquela chave.
+    Resultados somáveis (ex: agregações por DATA/segmento) podem ser combinados
+    somando as saídas das partições
+
+    Args:
+        fontes (dict): lado -> DataFrame ou iterável de DataFrames
+        processar (callable): Recebe dict lado -> DataFrame da partição e devolve um resultado
+        coluna_chave (str): Coluna do hash (precisa existir em todos os lados)
+        memoria_maxima_mb (int): Orçamento de memória para processar uma partição
+        colunas (dict, optional): lado -> colunas a gravar (as demais são descartadas antes do spill)
+        transformacoes (dict, optional): lado -> função aplicada a cada bloco antes do spill
+        n_particoes (int, optional): Força a quantidade de partições. Default: estimada pelo orçamento
+        diretorio (str, optional): Onde criar os arquivos. Default: diretório temporário do sistema
+
+    Yields:
+        Resultado de `processar` para cada partição não vazia
+    """
+    colunas = colunas or {}
+    transformacoes = transformacoes or {}
+    n_particoes = n_particoes or _estimar_particoes(fontes, memoria_maxima_mb) or PARTICOES_SEM_ESTIMATIVA
+
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    diretorio_spill = tempfile.mkdtemp(prefix='ouze_spill_', dir=diretorio)
+    try:
+        spill = SpillParticionado(diretorio_spill, n_particoes, coluna_chave)
+        for lado, fonte in fontes.items():
+            for bloco in _blocos(fonte):
+                if lado in transformacoes:
+                    bloco = transformacoes[lado](bloco)
+                if lado in colunas:
+                    bloco = bloco[colunas[lado]]
+                spill.gravar(lado, bloco)
+
+        print(f"💽 Spill: {n_particoes} partição(ões) por {coluna_chave} em {diretorio_spill}")
+        yield from _processar_spill(spill, processar, memoria_maxima_mb, nivel=0)
+    finally:
+        shutil.rmtree(diretorio_spill, ignore_errors=True)
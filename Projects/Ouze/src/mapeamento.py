@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# ============================================
+# MOTOR DE MAPEAMENTO CÓDIGO -> RÓTULO
+# ============================================
+# As regras são compiladas uma única vez em uma tabela densa indexada pelo
+# próprio código (ou em um índice hash quando os códigos são esparsos demais).
+# Aplicar o mapa é um único gather vetorizado que devolve um Categorical.
+
+# Maior código aceito na tabela densa; acima disso usa índice hash
+_TAMANHO_MAXIMO_TABELA_DENSA = 1 << 22
+
+
+def _para_float(valores):
+    """Converte valores (numéricos ou texto) para float64, com NaN onde não for número"""
+    serie = pd.Series(valores, copy=False)
+    if not pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class MapaCodigos:
+    """Mapa compilado de códigos inteiros para rótulos"""
+
+    def __init__(self, regras, padrao=None):
+        """
+        Args:
+            regras (dict): código (int) -> rótulo
+            padrao (str, optional): Rótulo para códigos não mapeados (ex: 'Outros'). None -> NaN
+        """
+        self.categorias = list(dict.fromkeys(regras.values()))
+        if padrao is not None and padrao not in self.categorias:
+            self.categorias.append(padrao)
+        self.padrao = padrao
+        self.dtype = pd.CategoricalDtype(self.categorias)
+        self._codigo_padrao = -1 if padrao is None else self.categorias.index(padrao)
+
+        codigos = np.fromiter(regras.keys(), dtype=np.int64, count=len(regras))
+        rotulos = np.fromiter((self.categorias.index(r) for r in regras.values()), dtype=np.int16, count=len(regras))
+
+        self._denso = len(codigos) == 0 or (codigos.min() >= 0 and codigos.max() < _TAMANHO_MAXIMO_TABELA_DENSA)
+        if self._denso:
+            tamanho = int(codigos.max()) + 1 if len(codigos) else 0
+            self._tabela = np.full(tamanho, self._codigo_padrao, dtype=np.int16)
+            self._tabela[codigos] = rotulos
+        else:
+            self._indice = pd.Index(codigos)
+            self._rotulos = np.append(rotulos, np.int16(self._codigo_padrao))
+
+    def codigos_categoria(self, valores):
+        """
+        Retorna o código da categoria de cada valor (-1 = NaN)
+
+        Args:
+            valores: Série/array com os códigos de origem (numéricos ou texto numérico)
+
+        Returns:
+            np.ndarray: Códigos int16 nas categorias de self.categorias
+        """
+        numeros = _para_float(valores)
+        validos = np.isfinite(numeros) & (numeros == np.floor(numeros))
+
+        if self._denso:
+            validos &= (numeros >= 0) & (numeros < len(self._tabela))
+            resultado = np.full(len(numeros), self._codigo_padrao, dtype=np.int16)
+            resultado[validos] = self._tabela[numeros[validos].astype(np.int64)]
+            return resultado
+
+        posicoes = np.full(len(numeros), -1, dtype=np.int64)
+        posicoes[validos] = self._indice.get_indexer(numeros[validos].astype(np.int64))
+        return self._rotulos[posicoes]
+
+    def aplicar(self, valores):
+        """
+        Aplica o mapa em um único gather vetorizado
+
+        Args:
+            valores: Série/array com os códigos de origem
+
+        Returns:
+            pd.Categorical: Rótulos mapeados
+        """
+        return pd.Categorical.from_codes(self.codigos_categoria(valores), dtype=self.dtype)
+
+
+class MapaCodigosPar:
+    """Mapa compilado de pares de códigos inteiros (ex: COD_CLI, COD_CAR) para rótulos"""
+
+    def __init__(self, regras, padrao=None):
+        """
+        Args:
+            regras (dict): (código_a, código_b) -> rótulo
+            padrao (str, optional): Rótulo para pares não mapeados. None -> NaN
+        """
+        # Chave combinada a * fator + b, com b sempre em [0, fator)
+        self._fator = max(b for _, b in regras) + 1 if regras else 1
+        self._mapa = MapaCodigos(
+            {a * self._fator + b: rotulo for (a, b), rotulo in regras.items()},
+            padrao=padrao
+        )
+        self.categorias = self._mapa.categorias
+        self.dtype = self._mapa.dtype
+
+    def aplicar(self, valores_a, valores_b):
+        """
+        Args:
+            valores_a: Série/array com o primeiro código do par
+            valores_b: Série/array com o segundo código do par
+
+        Returns:
+            pd.Categorical: Rótulos mapeados
+        """
+        a = _para_float(valores_a)
+        b = _para_float(valores_b)
+        fora_da_faixa = ~((b >= 0) & (b < self._fator) & (b == np.floor(b)))
+        chave = a * self._fator + b
+        chave[fora_da_faixa] = np.nan
+        return pd.Categorical.from_codes(self._mapa.codigos_categoria(chave), dtype=self.dtype)
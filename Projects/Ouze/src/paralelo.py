@@ -0,0 +1,446 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.instrumentacao import MedicaoEtapa, aplicar_medicoes, coletar_medicoes
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+MAX_PROCESSOS_PADRAO = int(os.getenv('OUZE_MAX_PROCESSOS', os.cpu_count() or 1))
+
+# ============================================
+# DATAFRAMES EM MEMÓRIA COMPARTILHADA (ARROW IPC)
+# ============================================
+# O processo principal grava as partições de entrada em blocos de memória
+# compartilhada, no formato Arrow IPC, só algumas de cada vez (as dos dias em
+# execução ou na fila do pool). Os processos do pool recebem o nome do bloco e
+# leem a tabela direto dele, sem cópia intermediária; o resultado volta pelo mesmo
+# caminho, em um bloco criado pelo processo do pool. Nenhum DataFrame é
+# serializado com pickle.
+
+
+def _ipc(tabela, destino):
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+
+
+def _publicar_tabela(tabela):
+    medidor = pa.MockOutputStream()
+    _ipc(tabela, medidor)
+    tamanho = medidor.size()
+    memoria = shared_memory.SharedMemory(create=True, size=max(tamanho, 1))
+    _ipc(tabela, pa.FixedSizeBufferWriter(pa.py_buffer(memoria.buf)))
+    return memoria, tamanho
+
+
+def publicar(df):
+    """
+    Grava um DataFrame em memória compartilhada
+
+    Args:
+        df (pd.DataFrame): DataFrame a publicar
+
+    Returns:
+        tuple: (SharedMemory, tamanho). Quem publica é responsável por close() e unlink()
+    """
+    return _publicar_tabela(pa.Table.from_pandas(df, preserve_index=False))
+
+
+def _anexar(nome, rastrear=False):
+    """
+    Abre um bloco criado por outro processo
+
+    Args:
+        nome (str): Nome do bloco
+        rastrear (bool): True quando este processo vai dar unlink() no bloco
+    """
+    if rastrear:
+        return shared_memory.SharedMemory(name=nome)
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)  # Python 3.13+
+    except TypeError:
+        # Os processos do pool usam o mesmo resource_tracker do principal: registrar de novo não duplica
+        return shared_memory.SharedMemory(name=nome)
+
+
+def _fechar(memoria):
+    try:
+        memoria.close()
+    except BufferError:
+        # Alguma coluna ainda aponta para o bloco: o mapeamento é desfeito com o processo
+        pass
+
+
+def _ler_tabela(memoria, tamanho):
+    """Tabela Arrow sobre o próprio bloco (sem cópia): só vale enquanto o bloco estiver aberto"""
+    return pa.ipc.open_stream(pa.py_buffer(memoria.buf)[:tamanho]).read_all()
+
+
+def _para_pandas(tabela):
+    """
+    DataFrame que não depende do bloco (pode ser fechado em seguida)
+
+    to_pandas reaproveita os índices dos dicionários nos códigos dos categóricos:
+    só esses códigos (int8/int16) são copiados
+    """
+    df = tabela.to_pandas()
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].copy()
+    return df
+
+
+def ler_publicado(nome, tamanho, liberar=False):
+    """
+    Lê um DataFrame publicado com publicar()
+
+    Args:
+        nome (str): Nome do bloco de memória compartilhada
+        tamanho (int): Bytes válidos no bloco
+        liberar (bool): Se True, remove o bloco (unlink) depois da leitura
+
+    Returns:
+        pd.DataFrame: DataFrame local (o bloco pode ser liberado em seguida)
+    """
+    memoria = _anexar(nome, rastrear=liberar)
+    try:
+        df = _para_pandas(_ler_tabela(memoria, tamanho))
+    finally:
+        _fechar(memoria)
+        if liberar:
+            memoria.unlink()
+    return df
+
+
+def _descartar_publicado(nome):
+    """Remove um bloco de resultado que não vai mais ser lido"""
+    try:
+        memoria = _anexar(nome, rastrear=True)
+    except FileNotFoundError:
+        return
+    _fechar(memoria)
+    memoria.unlink()
+
+
+# ============================================
+# EXECUÇÃO NOS PROCESSOS DO POOL
+# ============================================
+
+# Entradas compartilhadas entre partições (ex: CAD_DEVF), lidas uma vez por processo
+_cache_compartilhados = {}
+
+
+def _ler_compartilhado(bloco, tamanho):
+    if bloco not in _cache_compartilhados:
+        _cache_compartilhados.clear()
+        _cache_compartilhados[bloco] = ler_publicado(bloco, tamanho)
+    return _cache_compartilhados[bloco]
+
+
+def _devolver_df(df):
+    """Publica um DataFrame de resultado; o processo principal lê e remove o bloco"""
+    memoria, tamanho = publicar(df)
+    _fechar(memoria)
+    return memoria.name, tamanho
+
+
+def _devolver(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return 'df', _devolver_df(resultado)
+    if isinstance(resultado, tuple) and all(isinstance(item, pd.DataFrame) for item in resultado):
+        blocos = []
+        try:
+            for item in resultado:
+                blocos.append(_devolver_df(item))
+        except BaseException:
+            for nome, _ in blocos:
+                _descartar_publicado(nome)
+            raise
+        return 'tupla', blocos
+    return 'objeto', resultado
+
+
+def _devolver_colunas(resultado, tabela_entrada):
+    """
+    Resultado de uma função que preserva as linhas: só as colunas novas ou alteradas
+    em relação à entrada voltam para o processo principal
+    """
+    if not isinstance(resultado, pd.DataFrame):
+        raise TypeError("preserva_linhas=True exige uma função que devolva um DataFrame")
+    if len(resultado) != tabela_entrada.num_rows:
+        raise ValueError(f"preserva_linhas=True, mas a função devolveu {len(resultado):,} linhas "
+                         f"para {tabela_entrada.num_rows:,} de entrada")
+
+    alteradas = []
+    for coluna in resultado.columns:
+        if coluna not in tabela_entrada.column_names:
+            alteradas.append(coluna)
+            continue
+        try:
+            igual = pa.chunked_array([pa.Array.from_pandas(resultado[coluna])]).equals(tabela_entrada.column(coluna))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            igual = False
+        if not igual:
+            alteradas.append(coluna)
+    return 'colunas', (list(resultado.columns), _devolver_df(resultado[alteradas]))
+
+
+def _executar(funcao, tabelas, compartilhados, kwargs, preserva_linhas):
+    args = [_para_pandas(tabela) for tabela in tabelas]
+    for nome, (bloco, tamanho) in compartilhados.items():
+        kwargs = {**kwargs, nome: _ler_compartilhado(bloco, tamanho)}
+    resultado = funcao(*args, **kwargs)
+    if preserva_linhas:
+        return _devolver_colunas(resultado, tabelas[0])
+    return _devolver(resultado)
+
+
+def _executar_particao(funcao, entradas, compartilhados, kwargs, preserva_linhas=False):
+    """Executa um dia no processo filho; devolve (resultado publicado, registros das etapas medidas)"""
+    memorias = [_anexar(nome) for nome, _ in entradas]
+    try:
+        tabelas = [_ler_tabela(memoria, tamanho) for memoria, (_, tamanho) in zip(memorias, entradas)]
+        with coletar_medicoes() as medicoes:
+            retorno = _executar(funcao, tabelas, compartilhados, kwargs, preserva_linhas)
+        return retorno, medicoes
+    finally:
+        tabelas = None
+        for memoria in memorias:
+            _fechar(memoria)
+
+
+def _dias(df, coluna_data):
+    return pd.to_datetime(df[coluna_data]).to_numpy(dtype='datetime64[D]')
+
+
+# ============================================
+# EXECUTOR POR DIA
+# ============================================
+
+def executar_por_dia(funcao, *dfs, coluna_data='DATA', max_processos=MAX_PROCESSOS_PADRAO, preserva_linhas=False,
+                     **kwargs):
+    """
+    Executa uma função tratar_* separadamente para cada DATA em um pool de processos
+
+    As entradas posicionais são divididas por dia (o dia N de cada entrada vai
+    junto para a mesma chamada). Argumentos nomeados que forem DataFrames (ex:
+    df_cad_devf) são publicados uma única vez e chegam inteiros a todas as chamadas.
+    Só os dias em execução ou na fila do pool (2 por processo) ficam publicados ao
+    mesmo tempo
+
+    Junção dos resultados, na ordem das datas:
+        - preserva_linhas=True (ex: tratar_base_discagens, que só adiciona colunas):
+          cada dia devolve só as colunas novas ou alteradas, que são encaixadas em
+          uma cópia rasa da primeira entrada (mesma ordem e índice; as colunas que
+          não mudaram não são copiadas nem transferidas)
+        - DataFrame/tupla de DataFrames agregados (ex: tratar_discagens_trestto):
+          concatenados dia após dia
+        - Outros objetos: lista com o resultado de cada dia
+
+    Só vale para funções em que cada dia é independente (mapeamentos, faixas,
+    consolidação por DATA + CPF). Agregações têm só as combinações presentes em cada
+    dia. A função precisa ser importável (nível de módulo)
+
+    Uso:
+        df_esforco, df_unique = executar_por_dia(tratar_discagens_trestto, df_discagens_trestto, df_maling_hist)
+        df_discagens = executar_por_dia(tratar_base_discagens, df_discagens, preserva_linhas=True)
+        df_mailing = executar_por_dia(tratar_base_mailing_hist, df_maling_hist, df_cad_devf=df_cad_devf,
+                                      preserva_linhas=True)
+
+    Args:
+        funcao (callable): Função aplicada a cada dia
+        *dfs (pd.DataFrame): Entradas divididas por dia
+        coluna_data (str): Coluna com a data em todas as entradas
+        max_processos (int): Tamanho do pool
+        preserva_linhas (bool): Se a função devolve uma linha por linha da primeira
+            entrada, na mesma ordem (ex: só adiciona ou altera colunas)
+        **kwargs: Demais argumentos da função (DataFrames são compartilhados)
+
+    Returns:
+        Mesmo tipo de retorno da função
+    """
+    nome_etapa = f"paralelo.{getattr(funcao, '__name__', 'funcao')}"
+    with MedicaoEtapa(nome_etapa) as medicao:
+        medicao.registrar_entrada(*dfs)
+
+        # Posições de cada dia em cada entrada (NaT fica em um grupo próprio, no fim)
+        dias_por_entrada = [_dias(df, coluna_data) for df in dfs]
+        todos_dias = np.unique(np.concatenate([dias[~np.isnat(dias)] for dias in dias_por_entrada]))
+        grupos = list(todos_dias) + ([np.datetime64('NaT')] if any(np.isnat(d).any() for d in dias_por_entrada) else [])
+
+        if len(grupos) <= 1 or max_processos <= 1:
+            resultado = funcao(*dfs, **kwargs)
+            medicao.registrar_saida(resultado)
+            return resultado
+
+        posicoes = []
+        for dias in dias_por_entrada:
+            codigos = np.searchsorted(todos_dias, dias)
+            codigos[np.isnat(dias)] = len(todos_dias)
+            ordem = np.argsort(codigos, kind='stable')
+            limites = np.searchsorted(codigos[ordem], np.arange(len(grupos) + 1))
+            posicoes.append([ordem[limites[i]:limites[i + 1]] for i in range(len(grupos))])
+
+        blocos_compartilhados = []
+        em_execucao = {}  # futuro -> (índice do dia, blocos de entrada publicados)
+        resultados = {}
+        try:
+            compartilhados, parametros = {}, {}
+            for nome, valor in kwargs.items():
+                if isinstance(valor, pd.DataFrame):
+                    memoria, tamanho = publicar(valor)
+                    blocos_compartilhados.append(memoria)
+                    compartilhados[nome] = (memoria.name, tamanho)
+                else:
+                    parametros[nome] = valor
+
+            processos = min(max_processos, len(grupos))
+            # spawn: o processo principal tem threads (amostrador de RSS) e fork com threads não é seguro
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+                try:
+                    proximo = 0
+                    while proximo < len(grupos) or em_execucao:
+                        # Só os dias em execução e na fila (2 por processo) ficam publicados
+                        while proximo < len(grupos) and len(em_execucao) < 2 * processos:
+                            blocos = []
+                            try:
+                                for df, posicoes_entrada in zip(dfs, posicoes):
+                                    blocos.append(publicar(df.iloc[posicoes_entrada[proximo]]))
+                                futuro = executor.submit(
+                                    _executar_particao, funcao, [(memoria.name, tamanho) for memoria, tamanho in blocos],
+                                    compartilhados, parametros, preserva_linhas
+                                )
+                            except BaseException:
+                                _liberar([memoria for memoria, _ in blocos])
+                                raise
+                            em_execucao[futuro] = (proximo, [memoria for memoria, _ in blocos])
+                            proximo += 1
+
+                        concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                        for futuro in concluidos:
+                            indice, blocos = em_execucao.pop(futuro)
+                            _liberar(blocos)
+                            retorno, medicoes = futuro.result()
+                            resultados[indice] = _receber(retorno)
+                            # Métricas das etapas instrumentadas que rodaram no processo filho
+                            aplicar_medicoes(medicoes)
+                except BaseException:
+                    # Ao sair do with o pool ainda espera os dias já iniciados
+                    for futuro in em_execucao:
+                        futuro.cancel()
+                    raise
+        finally:
+            for futuro, (_, blocos) in em_execucao.items():
+                _liberar(blocos)
+                if futuro.done() and not futuro.cancelled() and futuro.exception() is None:
+                    _descartar_resultado(futuro.result()[0])
+            _liberar(blocos_compartilhados)
+
+        resultado = _juntar([resultados[indice] for indice in range(len(grupos))], dfs[0], posicoes[0])
+        medicao.registrar_saida(resultado)
+        return resultado
+
+
+def _liberar(blocos):
+    for memoria in blocos:
+        _fechar(memoria)
+        memoria.unlink()
+
+
+def _receber(retorno):
+    """Lê (e remove) os blocos de resultado de um dia assim que ele termina"""
+    tipo, valor = retorno
+    if tipo == 'df':
+        return tipo, ler_publicado(*valor, liberar=True)
+    if tipo == 'tupla':
+        partes = []
+        try:
+            for bloco in valor:
+                partes.append(ler_publicado(*bloco, liberar=True))
+        except BaseException:
+            for nome, _ in valor[len(partes) + 1:]:
+                _descartar_publicado(nome)
+            raise
+        return tipo, partes
+    if tipo == 'colunas':
+        colunas, bloco = valor
+        return tipo, (colunas, ler_publicado(*bloco, liberar=True))
+    return tipo, valor
+
+
+def _descartar_resultado(retorno):
+    tipo, valor = retorno
+    if tipo == 'df':
+        _descartar_publicado(valor[0])
+    elif tipo == 'tupla':
+        for nome, _ in valor:
+            _descartar_publicado(nome)
+    elif tipo == 'colunas':
+        _descartar_publicado(valor[1][0])
+
+
+def _concatenar(partes):
+    # Dias sem linhas não entram (só definiriam tipos); se todos forem vazios fica o primeiro
+    partes = [parte for parte in partes if len(parte)] or partes[:1]
+    df = pd.concat(partes, ignore_index=True)
+    # Categóricos com categorias diferentes entre dias viram object no concat: refaz a união
+    for coluna in df.columns:
+        tipos = [parte[coluna].dtype for parte in partes if coluna in parte.columns]
+        if df[coluna].dtype == object and all(isinstance(tipo, pd.CategoricalDtype) for tipo in tipos):
+            categorias = pd.api.types.union_categoricals([parte[coluna] for parte in partes]).categories
+            df[coluna] = pd.Categorical(df[coluna], categories=categorias, ordered=tipos[0].ordered)
+    return df
+
+
+def _encaixar_colunas(resultados, primeira_entrada, posicoes_por_dia):
+    """
+    Monta o resultado de uma função que preserva as linhas: cópia rasa da primeira
+    entrada com as colunas novas/alteradas de cada dia nas posições originais
+    """
+    colunas_resultado = resultados[0][1][0]
+    if any(colunas != colunas_resultado for _, (colunas, _) in resultados):
+        raise ValueError("preserva_linhas=True, mas os dias devolveram colunas diferentes")
+    alteradas = list(dict.fromkeys(coluna for _, (_, parte) in resultados for coluna in parte.columns))
+
+    partes = []
+    for (_, (_, parte)), posicoes in zip(resultados, posicoes_por_dia):
+        # Coluna que não mudou neste dia (mas mudou em outro): valores originais do dia
+        faltando = [coluna for coluna in alteradas if coluna not in parte.columns]
+        if faltando:
+            originais = primeira_entrada[faltando].iloc[posicoes].reset_index(drop=True)
+            parte = pd.concat([parte, originais], axis=1)[alteradas]
+        partes.append(parte)
+
+    df = primeira_entrada.copy(deep=False)
+    if alteradas:
+        ordem = np.argsort(np.concatenate(posicoes_por_dia), kind='stable')
+        valores = _concatenar(partes).take(ordem)
+        valores.index = df.index
+        for coluna in alteradas:
+            df[coluna] = valores[coluna]
+    if list(df.columns) != colunas_resultado:
+        df = df[colunas_resultado]
+    return df
+
+
+def _juntar(resultados, primeira_entrada, posicoes_por_dia):
+    tipo = resultados[0][0]
+    if tipo == 'objeto':
+        return [valor for _, valor in resultados]
+
+    if tipo == 'colunas':
+        return _encaixar_colunas(resultados, primeira_entrada, posicoes_por_dia)
+
+    if tipo == 'tupla':
+        quantidade = len(resultados[0][1])
+        return tuple(_concatenar([partes[i] for _, partes in resultados]) for i in range(quantidade))
+
+    return _concatenar([parte for _, parte in resultados])
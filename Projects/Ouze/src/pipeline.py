@@ -0,0 +1,444 @@
+import builtins
+import copy
+import hashlib
+import inspect
+import os
+import pickle
+import time
+import types
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+DIRETORIO_PIPELINE_PADRAO = os.getenv('OUZE_PIPELINE_DIR', '.cache_ouze/pipeline')
+MAX_ETAPAS_SIMULTANEAS = int(os.getenv('MAX_ETAPAS_SIMULTANEAS', 4))
+
+# Só o código de dentro do projeto entra na impressão digital (pandas/numpy não)
+_RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ============================================
+# IMPRESSÃO DIGITAL (FINGERPRINT) DO CÓDIGO
+# ============================================
+
+def _do_projeto(objeto):
+    """True se a função/classe/módulo foi definida em um arquivo do projeto"""
+    try:
+        arquivo = inspect.getsourcefile(objeto)
+    except TypeError:
+        return False
+    if arquivo is None:
+        return False
+    arquivo = os.path.abspath(arquivo)
+    return arquivo.startswith(_RAIZ_PROJETO + os.sep) and 'site-packages' not in arquivo
+
+
+def _nomes_referenciados(codigo):
+    """Nomes globais/atributos usados pelo code object, incluindo funções internas e lambdas"""
+    nomes = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            nomes |= _nomes_referenciados(constante)
+    return nomes
+
+
+def _hash_valor(valor):
+    """Hash estável de um parâmetro ou constante global"""
+    try:
+        conteudo = pickle.dumps(valor, protocol=4)
+    except Exception:
+        # Objetos não serializáveis (ex: pool de conexões): só o tipo, pois o repr inclui o endereço
+        conteudo = f"{type(valor).__module__}.{type(valor).__qualname__}".encode()
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _hash_codigo(objeto, visitados):
+    """
+    Hash do código-fonte de uma função/classe do projeto e, recursivamente, das
+    funções, classes e constantes globais que ela referencia
+
+    Args:
+        objeto: Função ou classe
+        visitados (dict): Cache id(objeto) -> hash já calculado (também evita ciclos)
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    # Funções decoradas (ex: @instrumentar): o que importa é o código da função original
+    objeto = inspect.unwrap(objeto) if inspect.isfunction(objeto) else objeto
+    chave = id(objeto)
+    if chave in visitados:
+        return visitados[chave]
+    visitados[chave] = 'ciclo'
+
+    hasher = hashlib.sha256()
+    try:
+        hasher.update(inspect.getsource(objeto).encode())
+    except (OSError, TypeError):
+        hasher.update(repr(objeto).encode())
+
+    if isinstance(objeto, type):
+        funcoes = [membro for membro in vars(objeto).values() if inspect.isfunction(membro)]
+    else:
+        funcoes = [objeto]
+
+    for funcao in funcoes:
+        escopo = getattr(funcao, '__globals__', {})
+        for nome in sorted(_nomes_referenciados(funcao.__code__)):
+            if nome not in escopo or hasattr(builtins, nome) and escopo[nome] is getattr(builtins, nome):
+                continue
+            referencia = escopo[nome]
+            if callable(referencia) and hasattr(referencia, '__wrapped__'):
+                # Decoradores como lru_cache: segue a função original
+                referencia = inspect.unwrap(referencia)
+            if isinstance(referencia, types.ModuleType):
+                # Módulo do projeto usado como `modulo.funcao`: segue os atributos usados
+                if _do_projeto(referencia):
+                    for atributo in sorted(_nomes_referenciados(funcao.__code__)):
+                        alvo = getattr(referencia, atributo, None)
+                        if inspect.isfunction(alvo) or inspect.isclass(alvo):
+                            hasher.update(f"{nome}.{atributo}:{_hash_codigo(alvo, visitados)}".encode())
+                continue
+            if inspect.isfunction(referencia) or inspect.isclass(referencia):
+                if _do_projeto(referencia):
+                    hasher.update(f"{nome}:{_hash_codigo(referencia, visitados)}".encode())
+                continue
+            if callable(referencia) and not _do_projeto(type(referencia)):
+                continue
+            # Constantes e objetos do projeto (ex: GRUPO_OPERACAO, MAPA_OPERACAO)
+            if _do_projeto(type(referencia)):
+                hasher.update(f"{nome}:{_hash_codigo(type(referencia), visitados)}".encode())
+            hasher.update(f"{nome}={_hash_valor(referencia)}".encode())
+
+    visitados[chave] = hasher.hexdigest()
+    return visitados[chave]
+
+
+def _hash_parametro(valor, visitados):
+    """
+    Hash de um parâmetro de etapa: funções e classes do projeto entram pelo código
+    (ex: o construtor de uma queries.ConsultaPeriodo), tuplas, listas e dicts item a item
+    """
+    if (inspect.isfunction(valor) or inspect.isclass(valor)) and _do_projeto(valor):
+        return _hash_codigo(valor, visitados)
+    if isinstance(valor, dict):
+        itens = [(str(chave), item) for chave, item in sorted(valor.items(), key=lambda par: str(par[0]))]
+    elif isinstance(valor, (tuple, list)):
+        itens = list(enumerate(valor))
+    else:
+        return _hash_valor(valor)
+    hasher = hashlib.sha256(type(valor).__qualname__.encode())
+    for chave, item in itens:
+        hasher.update(f"{chave}={_hash_parametro(item, visitados)}".encode())
+    return hasher.hexdigest()
+
+
+def impressao_digital_codigo(funcao):
+    """
+    Retorna o hash do código de uma função e de tudo do projeto que ela usa
+
+    Args:
+        funcao: Função da etapa
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    return _hash_codigo(funcao, {})
+
+
+def hash_conteudo(saida):
+    """
+    Hash do conteúdo de uma saída (DataFrames, também dentro de tuplas)
+
+    Usado nas etapas sem cache: a impressão digital delas só é conhecida depois de
+    executar, e as etapas seguintes só executam de novo se o conteúdo mudou
+
+    Args:
+        saida: Saída da etapa
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    if isinstance(saida, tuple):
+        return hashlib.sha256(''.join(hash_conteudo(item) for item in saida).encode()).hexdigest()
+    if isinstance(saida, pd.DataFrame):
+        try:
+            linhas = pd.util.hash_pandas_object(saida, index=True).values
+        except TypeError:
+            # Células não hasheáveis (ex: listas): serializa o DataFrame inteiro
+            return _hash_valor(saida)
+        hasher = hashlib.sha256()
+        hasher.update(repr([(str(coluna), str(tipo)) for coluna, tipo in saida.dtypes.items()]).encode())
+        hasher.update(linhas.tobytes())
+        return hasher.hexdigest()
+    return _hash_valor(saida)
+
+
+# ============================================
+# PIPELINE EM DAG
+# ============================================
+
+class Etapa:
+    """Uma etapa do pipeline: função, dependências (nomes de etapas) e parâmetros fixos"""
+
+    def __init__(self, nome, funcao, dependencias=(), parametros=None, usar_cache=True, altera_entradas=False):
+        """
+        Args:
+            nome (str): Nome único da etapa
+            funcao: Chamada como funcao(*saidas_das_dependencias, **parametros)
+            dependencias (tuple): Nomes das etapas cujas saídas são os argumentos posicionais
+            parametros (dict, optional): Parâmetros nomeados (entram na impressão digital)
+            usar_cache (bool): Se False, a etapa sempre executa (ex: extração que inclui o dia de hoje)
+                e a impressão digital dela inclui o conteúdo da saída
+            altera_entradas (bool): Se True, a função altera as entradas no lugar (ex:
+                adicionar_valor_principal) e recebe cópias profundas delas
+        """
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = tuple(dependencias)
+        self.parametros = parametros or {}
+        self.usar_cache = usar_cache
+        self.altera_entradas = altera_entradas
+
+
+class Pipeline:
+    """
+    Executa etapas declaradas como DAG, em paralelo, pulando as que não mudaram
+
+    A impressão digital de cada etapa combina o código da função (e das funções,
+    classes e constantes do projeto que ela usa), os parâmetros e as impressões
+    digitais das etapas anteriores. Se já existe uma saída salva com a mesma
+    impressão digital a etapa não executa: a saída é lida do disco, e só se
+    alguma etapa seguinte precisar dela. Alterar uma função de tratamento faz
+    executar apenas aquela etapa e as que dependem dela.
+
+    Etapas com usar_cache=False sempre executam e a impressão digital delas inclui
+    o hash do conteúdo da saída (hash_conteudo): as etapas seguintes só são
+    decididas depois delas, e reaproveitam a saída salva se o conteúdo não mudou.
+
+    As etapas recebem uma cópia rasa dos DataFrames de entrada, então podem
+    adicionar/substituir colunas sem afetar outras etapas rodando ao mesmo tempo.
+    Etapas cuja função altera as entradas no lugar são declaradas com
+    altera_entradas=True e recebem cópias profundas (a saída da etapa anterior,
+    usada por outras etapas e gravada em disco, nunca é alterada)
+    """
+
+    def __init__(self, diretorio=DIRETORIO_PIPELINE_PADRAO, max_etapas_simultaneas=MAX_ETAPAS_SIMULTANEAS):
+        """
+        Args:
+            diretorio (str): Diretório das saídas salvas
+            max_etapas_simultaneas (int): Máximo de etapas executando ao mesmo tempo
+        """
+        self.diretorio = diretorio
+        self.max_etapas_simultaneas = max_etapas_simultaneas
+        self.etapas = {}
+
+    def adicionar(self, nome, funcao, dependencias=(), parametros=None, usar_cache=True, altera_entradas=False):
+        """
+        Declara uma etapa (argumentos como em Etapa)
+
+        Uso:
+            pipeline.adicionar('mailing_hist_tratado', tratar_base_mailing_hist, ['mailing_hist'])
+
+        Returns:
+            Pipeline: O próprio pipeline (permite encadear)
+        """
+        if nome in self.etapas:
+            raise ValueError(f"Etapa duplicada: {nome}")
+        self.etapas[nome] = Etapa(nome, funcao, dependencias, parametros, usar_cache, altera_entradas)
+        return self
+
+    # ---------- ordem e impressões digitais ----------
+
+    def _ordem_topologica(self):
+        ordem, estado = [], {}
+
+        def visitar(nome, caminho):
+            if estado.get(nome) == 'feito':
+                return
+            if estado.get(nome) == 'visitando':
+                raise ValueError(f"Ciclo no pipeline: {' -> '.join(caminho + [nome])}")
+            if nome not in self.etapas:
+                raise KeyError(f"Etapa não declarada: {nome}")
+            estado[nome] = 'visitando'
+            for dependencia in self.etapas[nome].dependencias:
+                visitar(dependencia, caminho + [nome])
+            estado[nome] = 'feito'
+            ordem.append(nome)
+
+        for nome in self.etapas:
+            visitar(nome, [])
+        return ordem
+
+    def _hashes_proprios(self):
+        """
+        Returns:
+            dict: nome da etapa -> hash do código e dos parâmetros (sem as dependências)
+        """
+        hashes, visitados = {}, {}
+        for nome, etapa in self.etapas.items():
+            hasher = hashlib.sha256()
+            hasher.update(_hash_codigo(etapa.funcao, visitados).encode())
+            for parametro in sorted(etapa.parametros):
+                hasher.update(f"{parametro}={_hash_parametro(etapa.parametros[parametro], visitados)}".encode())
+            hashes[nome] = hasher.hexdigest()
+        return hashes
+
+    def _impressao(self, nome, hashes, impressoes, saida=None):
+        """Impressão digital da etapa a partir das impressões das dependências (e da saída, se sem cache)"""
+        etapa = self.etapas[nome]
+        hasher = hashlib.sha256(hashes[nome].encode())
+        for dependencia in etapa.dependencias:
+            hasher.update(impressoes[dependencia].encode())
+        if not etapa.usar_cache:
+            hasher.update(hash_conteudo(saida).encode())
+        return hasher.hexdigest()[:32]
+
+    def impressoes_digitais(self, saidas=None):
+        """
+        Args:
+            saidas (dict, optional): nome -> saída das etapas sem cache já executadas
+
+        Returns:
+            dict: nome da etapa -> impressão digital (hash hexadecimal). Etapas sem
+                cache fora de `saidas`, e as que dependem delas, ficam de fora
+        """
+        saidas = saidas or {}
+        hashes, impressoes = self._hashes_proprios(), {}
+        for nome in self._ordem_topologica():
+            etapa = self.etapas[nome]
+            if any(dependencia not in impressoes for dependencia in etapa.dependencias):
+                continue
+            if not etapa.usar_cache and nome not in saidas:
+                continue
+            impressoes[nome] = self._impressao(nome, hashes, impressoes, saidas.get(nome))
+        return impressoes
+
+    # ---------- saídas salvas ----------
+
+    def _caminho(self, nome, impressao):
+        return os.path.join(self.diretorio, nome, f"{impressao}.pkl")
+
+    def _tem_saida(self, nome, impressao):
+        return self.etapas[nome].usar_cache and os.path.exists(self._caminho(nome, impressao))
+
+    def _ler_saida(self, nome, impressao):
+        with open(self._caminho(nome, impressao), 'rb') as f:
+            return pickle.load(f)
+
+    def _gravar_saida(self, nome, impressao, saida):
+        if not self.etapas[nome].usar_cache:
+            return
+        diretorio = os.path.join(self.diretorio, nome)
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = self._caminho(nome, impressao) + '.tmp'
+        with open(temporario, 'wb') as f:
+            pickle.dump(saida, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, self._caminho(nome, impressao))
+        # Mantém só a saída mais recente de cada etapa
+        for arquivo in os.listdir(diretorio):
+            if arquivo != f"{impressao}.pkl":
+                os.remove(os.path.join(diretorio, arquivo))
+
+    # ---------- execução ----------
+
+    def executar(self, alvos=None, forcar=()):
+        """
+        Executa o pipeline
+
+        Args:
+            alvos (list, optional): Etapas cujas saídas são pedidas. Default: todas
+            forcar (list): Etapas que executam mesmo com saída salva
+
+        Returns:
+            dict: nome -> saída, para as etapas em `alvos`
+        """
+        hashes = self._hashes_proprios()
+        impressoes = self.impressoes_digitais()
+        alvos = list(self.etapas) if alvos is None else list(alvos)
+        forcar = set(forcar)
+
+        # Do fim para o começo: uma etapa que vai executar precisa das saídas das
+        # dependências; uma etapa com saída salva não precisa de nada antes dela.
+        # Etapas sem impressão digital (dependem de etapa sem cache) também precisam
+        # das dependências: só são decididas quando elas terminarem
+        necessarias, executar = set(), set()
+        pendentes = list(alvos)
+        while pendentes:
+            nome = pendentes.pop()
+            if nome in necessarias:
+                continue
+            necessarias.add(nome)
+            if nome in forcar or nome not in impressoes or not self._tem_saida(nome, impressoes[nome]):
+                executar.add(nome)
+                pendentes.extend(self.etapas[nome].dependencias)
+
+        a_decidir = {nome for nome in executar - forcar if nome not in impressoes and self.etapas[nome].usar_cache}
+        print(f"🧩 Pipeline: {len(necessarias)} etapa(s) | executar: {len(executar) - len(a_decidir)} | "
+              f"do cache: {len(necessarias) - len(executar)} | após etapas sem cache: {len(a_decidir)}")
+
+        saidas = {}
+        for nome in necessarias - executar:
+            saidas[nome] = self._ler_saida(nome, impressoes[nome])
+            print(f"   ♻️  {nome}: saída salva")
+
+        restantes = {nome: set(self.etapas[nome].dependencias) for nome in executar}
+        em_execucao = {}
+
+        def rodar(nome):
+            etapa = self.etapas[nome]
+            inicio = time.perf_counter()
+            if nome in a_decidir:
+                # Dependências sem cache já executaram: se o conteúdo delas não mudou,
+                # a impressão digital é a mesma da última execução
+                impressoes[nome] = self._impressao(nome, hashes, impressoes)
+                if self._tem_saida(nome, impressoes[nome]):
+                    return self._ler_saida(nome, impressoes[nome]), None
+            copiar = _copia_profunda if etapa.altera_entradas else _copia_rasa
+            entradas = [copiar(saidas[dependencia]) for dependencia in etapa.dependencias]
+            saida = etapa.funcao(*entradas, **etapa.parametros)
+            if not etapa.usar_cache:
+                impressoes[nome] = self._impressao(nome, hashes, impressoes, saida)
+            elif nome not in impressoes:
+                impressoes[nome] = self._impressao(nome, hashes, impressoes)
+            self._gravar_saida(nome, impressoes[nome], saida)
+            return saida, time.perf_counter() - inicio
+
+        with ThreadPoolExecutor(max_workers=self.max_etapas_simultaneas) as executor:
+            while restantes or em_execucao:
+                prontas = [nome for nome, deps in restantes.items() if not deps - saidas.keys()]
+                for nome in prontas:
+                    del restantes[nome]
+                    em_execucao[executor.submit(rodar, nome)] = nome
+
+                concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidas:
+                    nome = em_execucao.pop(futuro)
+                    saidas[nome], duracao = futuro.result()
+                    if duracao is None:
+                        print(f"   ♻️  {nome}: saída salva (entradas sem cache não mudaram)")
+                    else:
+                        print(f"   ✅ {nome}: {duracao:.1f}s")
+
+        return {nome: saidas[nome] for nome in alvos}
+
+
+def _copia_rasa(valor):
+    """Cópia rasa de DataFrames (também dentro de tuplas), para isolar etapas concorrentes"""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy(deep=False)
+    if isinstance(valor, tuple):
+        itens = [_copia_rasa(item) for item in valor]
+        # namedtuple (ex: JoinTrestto) continua com o mesmo tipo
+        return type(valor)(*itens) if hasattr(valor, '_fields') else tuple(itens)
+    return valor
+
+
+def _copia_profunda(valor):
+    """Cópia profunda, para etapas que alteram as entradas no lugar"""
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy(deep=True)
+    return copy.deepcopy(valor)
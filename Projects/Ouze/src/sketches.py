@@ -0,0 +1,344 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.join_fora_memoria import chaves_inteiras, hash_chaves
+
+# ============================================
+# CONFIGURAÇÕES
+# ============================================
+
+ERRO_RELATIVO_PADRAO = float(os.getenv('OUZE_SKETCH_ERRO_RELATIVO', 0.02))
+PRECISAO_MINIMA = 4
+PRECISAO_MAXIMA = 18
+
+# ============================================
+# HYPERLOGLOG VETORIZADO
+# ============================================
+# Cada célula x métrica tem 2^p registradores uint8. O hash (splitmix64 do CPF, o
+# mesmo do join fora de memória) escolhe o registrador pelos p bits altos e guarda
+# a posição do primeiro bit 1 dos bits restantes. Mesclar é o máximo por registrador,
+# então qualquer rollup custa só um máximo sobre as células selecionadas.
+
+
+def precisao_para_erro(erro_relativo):
+    """
+    Precisão p cujo erro padrão (1,04 / sqrt(2^p)) fica abaixo de erro_relativo
+
+    Args:
+        erro_relativo (float): Erro padrão desejado (ex: 0.02 para 2%)
+
+    Returns:
+        int: Precisão entre PRECISAO_MINIMA e PRECISAO_MAXIMA
+    """
+    if not 0 < erro_relativo < 1:
+        raise ValueError(f"erro_relativo deve estar entre 0 e 1: {erro_relativo}")
+    precisao = math.ceil(math.log2((1.04 / erro_relativo) ** 2))
+    return min(max(precisao, PRECISAO_MINIMA), PRECISAO_MAXIMA)
+
+
+def _zeros_a_esquerda(valores):
+    """Quantidade de bits 0 antes do primeiro bit 1 (uint64; 64 para zero)"""
+    valores = valores.copy()
+    zeros = np.zeros(len(valores), dtype=np.uint8)
+    for bits in (32, 16, 8, 4, 2, 1):
+        sem_bits_altos = valores < np.uint64(1 << (64 - bits))
+        zeros[sem_bits_altos] += bits
+        valores[sem_bits_altos] <<= np.uint64(bits)
+    zeros[valores == 0] = 64
+    return zeros
+
+
+def _registrador_e_posto(hashes, precisao):
+    """Índice do registrador e posto (1 + zeros à esquerda dos bits restantes) de cada hash"""
+    registrador = (hashes >> np.uint64(64 - precisao)).astype(np.int64)
+    restante = hashes << np.uint64(precisao)
+    posto = np.minimum(_zeros_a_esquerda(restante), 64 - precisao) + 1
+    return registrador, posto.astype(np.uint8)
+
+
+def _sigma(x):
+    # sigma(x) = x + sum(x^(2^k) * 2^(k-1)), k >= 1; infinito para x = 1 (registradores todos zerados)
+    vazio = x >= 1
+    x = np.where(vazio, 0.0, x)
+    z, y = x.copy(), 1.0
+    for _ in range(64):
+        x = x * x
+        z += x * y
+        y *= 2
+    return np.where(vazio, np.inf, z)
+
+
+def _tau(x):
+    # tau(x) = (1 - x - sum((1 - x^(2^-k))^2 * 2^-k)) / 3, k >= 1; zero para x = 0 ou 1
+    extremo = (x <= 0) | (x >= 1)
+    z, y = 1 - x, 1.0
+    for _ in range(64):
+        x = np.sqrt(x)
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+    return np.where(extremo, 0.0, z / 3)
+
+
+def _estimar(registros, precisao):
+    """
+    Cardinalidade estimada de cada linha de registradores (n x 2^p)
+
+    Estimador de Ertl ("New cardinality estimation algorithms for HyperLogLog
+    sketches", 2017): usa só o histograma dos registradores e dispensa a troca
+    para contagem linear e as tabelas de correção de viés do HyperLogLog++
+    """
+    n, m = registros.shape
+    q = 64 - precisao
+    deslocamentos = np.arange(n, dtype=np.int32) * (q + 2)
+    histograma = np.bincount((registros + deslocamentos[:, None]).ravel(), minlength=n * (q + 2))
+    histograma = histograma.reshape(n, q + 2).astype(float)
+
+    z = m * _tau(1 - histograma[:, q + 1] / m)
+    for k in range(q, 0, -1):
+        z = 0.5 * (z + histograma[:, k])
+    z = z + m * _sigma(histograma[:, 0] / m)
+    with np.errstate(divide='ignore'):
+        estimativa = m * m / (2 * math.log(2)) / z
+    return np.rint(estimativa).astype(np.int64)
+
+
+# ============================================
+# SKETCHES POR CÉLULA
+# ============================================
+
+def _codificar_celulas(df_celulas, colunas):
+    """Código de cada linha e tabela das células distintas (linhas com chave nula ficam com -1)"""
+    grupos = df_celulas.groupby(colunas, observed=True, sort=True)
+    return grupos.ngroup().to_numpy(), grupos.size().index.to_frame(index=False)
+
+
+def _contar_distintos(grupos, chaves, n_grupos):
+    """Quantidade de chaves distintas por grupo (pares já sem grupo -1)"""
+    if not len(grupos):
+        return np.zeros(n_grupos, dtype=np.int64)
+    ordem = np.lexsort((chaves, grupos))
+    grupos, chaves = grupos[ordem], chaves[ordem]
+    novo = np.ones(len(grupos), dtype=bool)
+    novo[1:] = (grupos[1:] != grupos[:-1]) | (chaves[1:] != chaves[:-1])
+    return np.bincount(grupos[novo], minlength=n_grupos).astype(np.int64)
+
+
+class SketchesUnicos:
+    """
+    CPFs distintos por célula (ex: DATA/PRODUTO/FX_ATRASO) e métrica, em sketches mescláveis
+
+    Diferente das contagens de únicos, os sketches podem ser combinados: o rollup
+    devolve os CPFs distintos de qualquer janela de datas ou subconjunto de dimensões
+    sem reler nem refazer o join das bases
+
+    Modos:
+        - HyperLogLog (padrão): 2^p registradores uint8 por célula e métrica, erro
+          padrão 1,04/sqrt(2^p) em qualquer rollup e memória fixa por célula
+        - exato: chaves int64 dos CPFs de cada célula e métrica, rollup exato e
+          memória proporcional à quantidade de pares (célula, CPF)
+
+    Uso:
+        sketches = tratar_discagens_trestto_sketches(df_discagens_trestto, df_maling_hist)
+        sketches.rollup(['PRODUTO'], periodo='M')                       # únicos do mês por produto
+        sketches.rollup(dt_ini='2025-09-01', dt_fim='2025-09-07')       # únicos da semana
+        sketches.rollup(['DATA', 'PRODUTO', 'FX_ATRASO'])               # mesmo nível de df_unique
+    """
+
+    def __init__(self, celulas, metricas, precisao=None, registros=None, pares=None):
+        """
+        Use SketchesUnicos.construir (ou mesclar) em vez de instanciar diretamente
+
+        Args:
+            celulas (pd.DataFrame): Uma linha por célula (colunas = dimensões)
+            metricas (list): Nomes das métricas
+            precisao (int, optional): Precisão do HyperLogLog (None no modo exato)
+            registros (dict, optional): métrica -> np.ndarray (células x 2^p) uint8
+            pares (dict, optional): métrica -> (códigos de célula, chaves de CPF), ordenados e sem repetição
+        """
+        self.celulas = celulas
+        self.metricas = list(metricas)
+        self.precisao = precisao
+        self.registros = registros
+        self.pares = pares
+
+    def __len__(self):
+        return len(self.celulas)
+
+    @property
+    def exato(self):
+        return self.pares is not None
+
+    @property
+    def erro_padrao(self):
+        """Erro relativo padrão das estimativas (0 no modo exato)"""
+        return 0.0 if self.exato else 1.04 / math.sqrt(2 ** self.precisao)
+
+    @property
+    def dimensoes(self):
+        return list(self.celulas.columns)
+
+    @classmethod
+    def construir(cls, df_celulas, cpfs, presencas, metricas, erro_relativo=ERRO_RELATIVO_PADRAO, exato=False):
+        """
+        Monta os sketches a partir de linhas (célula, CPF, presença em cada métrica)
+
+        Args:
+            df_celulas (pd.DataFrame): Dimensões de cada linha (ex: DATA, PRODUTO, FX_ATRASO)
+            cpfs (pd.Series): CPF de cada linha (número ou texto)
+            presencas (np.ndarray): Booleano (linhas x métricas): o CPF entra no único da métrica
+            metricas (list): Nomes das métricas (colunas de presencas)
+            erro_relativo (float): Erro padrão desejado no modo HyperLogLog
+            exato (bool): Se True, guarda os CPFs (contagem exata)
+
+        Returns:
+            SketchesUnicos: Sketches das células presentes nas linhas
+        """
+        codigos, celulas = _codificar_celulas(df_celulas, list(df_celulas.columns))
+        validos = codigos >= 0
+
+        if exato:
+            chaves = chaves_inteiras(cpfs)
+            pares = {}
+            for indice, metrica in enumerate(metricas):
+                selecao = validos & presencas[:, indice]
+                combinados = pd.DataFrame({'c': codigos[selecao], 'k': chaves[selecao]}).drop_duplicates()
+                combinados = combinados.sort_values(['c', 'k'])
+                pares[metrica] = (combinados['c'].to_numpy(), combinados['k'].to_numpy())
+            return cls(celulas, metricas, pares=pares)
+
+        precisao = precisao_para_erro(erro_relativo)
+        m = 2 ** precisao
+        registrador, posto = _registrador_e_posto(hash_chaves(cpfs), precisao)
+        registros = {}
+        for indice, metrica in enumerate(metricas):
+            selecao = validos & presencas[:, indice]
+            planos = np.zeros(len(celulas) * m, dtype=np.uint8)
+            np.maximum.at(planos, codigos[selecao] * m + registrador[selecao], posto[selecao])
+            registros[metrica] = planos.reshape(len(celulas), m)
+        return cls(celulas, metricas, precisao=precisao, registros=registros)
+
+    # ============================================
+    # ROLLUP
+    # ============================================
+
+    def _selecionar(self, dt_ini, dt_fim, filtros, coluna_data):
+        selecao = np.ones(len(self.celulas), dtype=bool)
+        if dt_ini is not None:
+            selecao &= (self.celulas[coluna_data] >= pd.Timestamp(dt_ini)).to_numpy()
+        if dt_fim is not None:
+            selecao &= (self.celulas[coluna_data] <= pd.Timestamp(dt_fim)).to_numpy()
+        for coluna, valores in (filtros or {}).items():
+            if np.isscalar(valores):
+                valores = [valores]
+            selecao &= self.celulas[coluna].isin(valores).to_numpy()
+        return np.flatnonzero(selecao)
+
+    def rollup(self, dimensoes=(), periodo=None, dt_ini=None, dt_fim=None, filtros=None, metricas=None,
+               coluna_data='DATA'):
+        """
+        CPFs distintos por combinação das dimensões pedidas, mesclando as células
+
+        Args:
+            dimensoes (list): Dimensões mantidas no resultado (as demais são mescladas)
+            periodo (str, optional): Agrupa as datas por período do pandas ('W', 'M', ...);
+                a coluna de data entra no resultado com o início de cada período
+            dt_ini (str, optional): Primeira data incluída ('YYYY-MM-DD')
+            dt_fim (str, optional): Última data incluída ('YYYY-MM-DD')
+            filtros (dict, optional): dimensão -> valor ou lista de valores aceitos
+            metricas (list, optional): Métricas do resultado. Default: todas
+            coluna_data (str): Dimensão com a data
+
+        Returns:
+            pd.DataFrame: Dimensões + uma coluna por métrica com os CPFs distintos (int64)
+        """
+        dimensoes = list(dimensoes)
+        if periodo and coluna_data not in dimensoes:
+            dimensoes.insert(0, coluna_data)
+        metricas = list(metricas or self.metricas)
+
+        selecionadas = self._selecionar(dt_ini, dt_fim, filtros, coluna_data)
+        chaves = self.celulas.iloc[selecionadas][dimensoes].reset_index(drop=True)
+        if periodo:
+            chaves[coluna_data] = chaves[coluna_data].dt.to_period(periodo).dt.start_time
+
+        if dimensoes:
+            grupos, resultado = _codificar_celulas(chaves, dimensoes)
+        else:
+            grupos, resultado = np.zeros(len(chaves), dtype=np.int64), pd.DataFrame(index=range(1))
+        validos = grupos >= 0
+        n_grupos = len(resultado)
+
+        if self.exato:
+            grupo_da_celula = np.full(len(self.celulas), -1, dtype=np.int64)
+            grupo_da_celula[selecionadas[validos]] = grupos[validos]
+            for metrica in metricas:
+                celulas_pares, chaves_pares = self.pares[metrica]
+                grupo_par = grupo_da_celula[celulas_pares]
+                no_rollup = grupo_par >= 0
+                resultado[metrica] = _contar_distintos(grupo_par[no_rollup], chaves_pares[no_rollup], n_grupos)
+            return resultado
+
+        ordem = np.argsort(grupos[validos], kind='stable')
+        linhas = selecionadas[validos][ordem]
+        limites = np.searchsorted(grupos[validos][ordem], np.arange(n_grupos + 1))
+        unitarios = np.flatnonzero(np.diff(limites) == 1)
+        for metrica in metricas:
+            registros = self.registros[metrica]
+            # Grupos de uma célula só copiam os registradores; os demais tiram o máximo por registrador
+            mesclados = np.zeros((n_grupos, registros.shape[1]), dtype=np.uint8)
+            mesclados[unitarios] = registros[linhas[limites[unitarios]]]
+            for grupo in np.flatnonzero(np.diff(limites) > 1):
+                mesclados[grupo] = registros[linhas[limites[grupo]:limites[grupo + 1]]].max(axis=0)
+            resultado[metrica] = _estimar(mesclados, self.precisao)
+        return resultado
+
+    # ============================================
+    # MESCLA
+    # ============================================
+
+    def mesclar(self, *outros):
+        """
+        Une sketches de outros períodos/execuções (células iguais são mescladas)
+
+        Uso:
+            sketches = SketchesUnicos.mesclar(*executar_por_dia(tratar_discagens_trestto_sketches, df, df_mailing))
+
+        Args:
+            *outros (SketchesUnicos): Sketches com as mesmas dimensões, métricas e modo/precisão
+
+        Returns:
+            SketchesUnicos: Novo objeto com a união das células
+        """
+        todos = [self, *outros]
+        for outro in todos[1:]:
+            if (outro.dimensoes != self.dimensoes or outro.metricas != self.metricas
+                    or outro.exato != self.exato or outro.precisao != self.precisao):
+                raise ValueError("Sketches com dimensões, métricas ou precisão diferentes não podem ser mesclados")
+
+        celulas_todas = pd.concat([sketch.celulas for sketch in todos], ignore_index=True)
+        codigos, celulas = _codificar_celulas(celulas_todas, self.dimensoes)
+        deslocamentos = np.cumsum([0] + [len(sketch.celulas) for sketch in todos])
+
+        if self.exato:
+            pares = {}
+            for metrica in self.metricas:
+                celulas_pares = np.concatenate([
+                    codigos[inicio + sketch.pares[metrica][0]] for sketch, inicio in zip(todos, deslocamentos)
+                ])
+                chaves_pares = np.concatenate([sketch.pares[metrica][1] for sketch in todos])
+                combinados = pd.DataFrame({'c': celulas_pares, 'k': chaves_pares}).drop_duplicates()
+                combinados = combinados.sort_values(['c', 'k'])
+                pares[metrica] = (combinados['c'].to_numpy(), combinados['k'].to_numpy())
+            return SketchesUnicos(celulas, self.metricas, pares=pares)
+
+        registros = {}
+        for metrica in self.metricas:
+            mesclados = np.zeros((len(celulas), 2 ** self.precisao), dtype=np.uint8)
+            for sketch, inicio in zip(todos, deslocamentos):
+                destino = codigos[inicio:inicio + len(sketch.celulas)]
+                np.maximum.at(mesclados, destino, sketch.registros[metrica])
+            registros[metrica] = mesclados
+        return SketchesUnicos(celulas, self.metricas, precisao=self.precisao, registros=registros)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agregadores import AgregadorDistintos
+
+
+def _blocos(df, tamanho):
+    return [df.iloc[inicio:inicio + tamanho] for inicio in range(0, len(df), tamanho)]
+
+
+@pytest.fixture
+def discagens():
+    rng = np.random.default_rng(0)
+    n = 60_000
+    return pd.DataFrame({
+        'ESTADO': rng.choice(['RS', 'SC', 'PR'], n),
+        'CPF': pd.Series(rng.integers(0, 20_000, n)).map('{:011d}'.format).where(rng.random(n) > 0.01),
+    })
+
+
+def _esperado(df):
+    return df.groupby('ESTADO')['CPF'].nunique().to_numpy()
+
+
+def test_distintos_exato_igual_ao_nunique(discagens):
+    agregador = AgregadorDistintos(['ESTADO'], 'CPF', exato=True)
+    for bloco in _blocos(discagens, 7_000):
+        agregador.atualizar(bloco)
+
+    resultado = agregador.resultado()
+    assert list(resultado.columns) == ['ESTADO', 'QTD_CPF_DISTINTOS']
+    assert resultado['QTD_CPF_DISTINTOS'].tolist() == _esperado(discagens).tolist()
+
+
+def test_distintos_hyperloglog_dentro_do_erro(discagens):
+    agregador = AgregadorDistintos(['ESTADO'], 'CPF', erro_relativo=0.02)
+    for bloco in _blocos(discagens, 7_000):
+        agregador.atualizar(bloco)
+
+    resultado = agregador.resultado()
+    erro = np.abs(resultado['QTD_CPF_DISTINTOS'].to_numpy() / _esperado(discagens) - 1)
+    assert (erro < 3 * 0.02).all()
+    # Memória fixa por grupo: 2^p registradores, não um par por CPF
+    assert agregador._sketches.registros['QTD_CPF_DISTINTOS'].shape == (3, 4096)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from src.compactacao import CHAVE_NULA, chave_int64, compactar_tipos
+from src.data_wrangling_discagens_trestto import _codificar_chaves
+
+
+def test_chave_sempre_int64_independente_do_lote():
+    limpo = compactar_tipos(pd.DataFrame({'CPF': ['00123', '456']}), 'mailing_hist')
+    sujo = compactar_tipos(pd.DataFrame({'CPF': ['00123', 'ABC', None]}), 'discagens_trestto')
+
+    assert limpo['CPF'].dtype == np.int64 and sujo['CPF'].dtype == np.int64
+    assert limpo['CPF'].iloc[0] == sujo['CPF'].iloc[0] == 123
+    assert sujo['CPF'].iloc[2] == CHAVE_NULA
+
+
+def test_valores_fora_do_formato_nao_colidem_com_numeros():
+    chaves, fora = chave_int64(pd.Series(['ABC', ' ABC ', 'XYZ', '', '1' * 19, '7']))
+
+    assert fora == 5
+    assert chaves.iloc[0] == chaves.iloc[1]
+    assert chaves.iloc[0] != chaves.iloc[2]
+    assert (chaves.iloc[:5] < CHAVE_NULA).all() and chaves.iloc[5] == 7
+
+
+def test_chave_de_inteiros_e_floats():
+    assert chave_int64(pd.Series([1, None], dtype='Int64'))[0].tolist() == [1, CHAVE_NULA]
+    chaves, fora = chave_int64(pd.Series([12.0, np.nan, 2.5]))
+    assert chaves.iloc[:2].tolist() == [12, CHAVE_NULA] and chaves.iloc[2] < CHAVE_NULA and fora == 1
+
+
+def test_join_com_so_um_lado_compactado_mantem_as_chaves():
+    datas = pd.to_datetime(['2024-01-01'] * 3)
+    trestto = compactar_tipos(pd.DataFrame({'DATA': datas, 'CPF': ['00123', 'ABC', '9']}), 'discagens_trestto')
+    mailing = pd.DataFrame({'DATA': datas, 'CPF': ['00123', 'ABC', '8']})
+
+    chave_trestto, chave_mailing, _, _ = _codificar_chaves(trestto, mailing)
+
+    assert chave_trestto[0] == chave_mailing[0]
+    assert chave_trestto[1] == chave_mailing[1]
+    assert chave_trestto[2] == -1
@@ -0,0 +1,109 @@
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+from src.compactacao import compactar_tipos
+from src.data_wrangling_discagens_trestto import tratar_discagens_trestto
+from src.incremental_trestto import ArmazemTrestto, atualizar_trestto_incremental, preparar_mailing_trestto
+
+DIAS = ['2024-01-01', '2024-01-02', '2024-01-03']
+
+
+def _checksum(*valores):
+    return int(hashlib.md5(repr(valores).encode()).hexdigest()[:8], 16)
+
+
+class _ChecksumAgg:
+    def __init__(self):
+        self.total = 0
+
+    def step(self, valor):
+        self.total ^= valor
+
+    def finalize(self):
+        return self.total
+
+
+class PoolSqlite:
+    """Pool com a mesma interface de src.db_connection.PoolConexoes, sobre um sqlite em memória"""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.conn.create_function('CHECKSUM', -1, _checksum)
+        self.conn.create_aggregate('CHECKSUM_AGG', 1, _ChecksumAgg)
+        self.conn.execute('CREATE TABLE DISCAGENS_TRESTTO (DATA TEXT, CPF TEXT, SUBSTATUSURA TEXT, '
+                          'DISCAGEM INT, ALO INT, CPC INT, CPCA INT, PROMESSA INT)')
+        self.conn.execute('CREATE TABLE MAILING_HIST (DATA TEXT, CONTRATO TEXT, CPF TEXT, ATRASO INT, '
+                          'COD_CLI INT, COD_CAR INT)')
+
+    @contextmanager
+    def conexao(self, server_var, database_var):
+        yield self.conn
+
+
+@pytest.fixture
+def pool():
+    pool = PoolSqlite()
+    # API (228, 2) só aparece no segundo dia: os outros dias não podem ganhar linhas zeradas de API
+    mailing = [
+        (dia, f'C{cpf}', f'{cpf:011d}', atraso, cli, car)
+        for dia in DIAS
+        for cpf, atraso, cli, car in [(1, 10, 196, 1), (2, 45, 198, 2), (3, 100, 196, 3)]
+    ] + [('2024-01-02', 'C4', f'{4:011d}', 5, 228, 2)]
+    trestto = [
+        (dia, f'{cpf:011d}', 'X', 2, 1, cpf % 2, 0, 0)
+        for dia in DIAS
+        for cpf in (1, 2, 3, 4)
+    ]
+    pool.conn.executemany('INSERT INTO MAILING_HIST VALUES (?, ?, ?, ?, ?, ?)', mailing)
+    pool.conn.executemany('INSERT INTO DISCAGENS_TRESTTO VALUES (?, ?, ?, ?, ?, ?, ?, ?)', trestto)
+    return pool
+
+
+def _processar_dia_sozinho(pool, dia):
+    trestto = pd.read_sql('SELECT DATA, CPF, SUM(DISCAGEM) DISCAGEM, SUM(ALO) ALO, SUM(CPC) CPC, SUM(CPCA) CPCA, '
+                          'SUM(PROMESSA) PROMESSA FROM DISCAGENS_TRESTTO WHERE DATA = ? GROUP BY DATA, CPF',
+                          pool.conn, params=(dia,))
+    mailing = pd.read_sql('SELECT DATA, CONTRATO, CPF, ATRASO, COD_CLI, COD_CAR FROM MAILING_HIST WHERE DATA = ?',
+                          pool.conn, params=(dia,))
+    compactar_tipos(trestto, 'discagens_trestto')
+    compactar_tipos(mailing, 'mailing_hist')
+    return tratar_discagens_trestto(trestto, preparar_mailing_trestto(mailing))
+
+
+def _comparar(df, esperado):
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), esperado.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_particao_igual_ao_dia_processado_sozinho(pool, tmp_path):
+    armazem = ArmazemTrestto(str(tmp_path))
+    atualizar_trestto_incremental(armazem, DIAS[0], DIAS[-1], pool=pool)
+
+    for dia in DIAS:
+        esforco_dia, unique_dia = _processar_dia_sozinho(pool, dia)
+        esforco, unique = armazem.ler(dia, dia)
+        _comparar(esforco, esforco_dia)
+        _comparar(unique, unique_dia)
+
+    esforco, _ = armazem.ler(DIAS[0], DIAS[-1])
+    assert set(esforco.loc[esforco['PRODUTO'] == 'API', 'DATA'].dt.strftime('%Y-%m-%d')) == {'2024-01-02'}
+
+
+def test_so_dias_alterados_sao_reprocessados(pool, tmp_path, capsys):
+    armazem = ArmazemTrestto(str(tmp_path))
+    atualizar_trestto_incremental(armazem, DIAS[0], DIAS[-1], pool=pool)
+    manifesto = armazem.ler_manifesto()
+
+    pool.conn.execute("UPDATE DISCAGENS_TRESTTO SET CPC = 1 WHERE DATA = '2024-01-03'")
+    capsys.readouterr()
+    atualizar_trestto_incremental(armazem, DIAS[0], DIAS[-1], pool=pool)
+
+    assert '2 dia(s) em disco | 1 dia(s) a processar' in capsys.readouterr().out
+    alterados = {dia for dia, impressao in armazem.ler_manifesto().items() if manifesto[dia] != impressao}
+    assert alterados == {'2024-01-03'}
+    esforco, _ = armazem.ler(DIAS[-1], DIAS[-1])
+    _comparar(esforco, _processar_dia_sozinho(pool, DIAS[-1])[0])
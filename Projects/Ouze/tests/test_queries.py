@@ -0,0 +1,42 @@
+import inspect
+
+import pytest
+
+import queries
+from queries import ConsultaSQL, get_consultas_ouze
+
+
+def _construtores():
+    for nome, funcao in inspect.getmembers(queries, inspect.isfunction):
+        if nome.startswith('get_query_'):
+            yield nome, funcao
+
+
+@pytest.mark.parametrize('nome,construtor', list(_construtores()))
+def test_get_query_devolve_consulta_sql(nome, construtor):
+    parametros = inspect.signature(construtor).parameters
+    argumentos = ['2024-01-30', '2024-02-02'] if 'dt_ini' in parametros else []
+    consulta = construtor(*argumentos)
+
+    assert isinstance(consulta, ConsultaSQL), nome
+    assert isinstance(consulta.sql, str) and isinstance(consulta.params, tuple)
+    assert consulta.sql.count('?') == len(consulta.params)
+
+
+def test_consultas_sem_periodo_tem_params_vazios():
+    assert queries.get_query_cad_devf().params == ()
+    assert queries.get_query_tabulacao_aciona().params == ()
+
+
+def test_get_consultas_ouze_so_tem_consulta_sql():
+    for nome, (_, _, consulta) in get_consultas_ouze('2024-01-01', '2024-01-03').items():
+        assert isinstance(consulta, ConsultaSQL), nome
+
+
+def test_get_consultas_ouze_por_periodo_monta_a_mesma_consulta():
+    prontas = get_consultas_ouze('2024-01-01', '2024-01-03', agregar_trestto=True)
+    por_periodo = get_consultas_ouze('2024-01-01', '2024-01-03', agregar_trestto=True, por_periodo=True)
+    for nome, (_, _, consulta) in por_periodo.items():
+        if isinstance(consulta, queries.ConsultaPeriodo):
+            consulta = consulta.construtor(consulta.dt_ini, consulta.dt_fim, **consulta.parametros)
+        assert consulta == prontas[nome][2], nome
@@ -0,0 +1,235 @@
+import csv
+import datetime
+import os
+import threading
+
+# ============================================
+# CSV EM STREAMING, COM TROCA ATÔMICA
+# ============================================
+# As linhas vão do cursor (fetchmany) direto para um arquivo temporário oculto na
+# mesma pasta do destino; só um lote fica em memória. Ao final o temporário é
+# gravado em disco (fsync) e renomeado para o nome definitivo (os.replace): um CSV
+# com o nome final está sempre completo, mesmo se o processo cair no meio. O
+# temporário (".NOME.csv.<pid>.<thread>.tmp") não termina em .csv e não conta como
+# data processada.
+#
+# O texto de cada valor segue o tipo da coluna (cursor.description) e reproduz o
+# antigo pd.DataFrame.from_records(...).to_csv(...). Duas regras do pandas dependem
+# da coluna inteira e só são aplicadas no fim, em uma segunda passada pelo
+# temporário (só nos arquivos que precisam):
+# - coluna inteira com NULL vira float64: 3 -> '3.0'
+# - datetime sai na menor precisão que representa todos os valores: só a data se
+#   todos forem meia-noite, senão até segundos, milissegundos ou microssegundos
+
+SEPARADOR = ';'
+ENCODING = 'utf-8-sig'
+TAMANHO_LOTE_PADRAO = 50_000
+
+
+# Precisão de datetime -> caracteres de 'YYYY-MM-DD HH:MM:SS.ffffff' mantidos
+_TAMANHO_PRECISAO = {'dia': 10, 's': 19, 'ms': 23, 'us': 26}
+_ORDEM_PRECISAO = ('dia', 's', 'ms', 'us')
+
+
+def _formatar(valor):
+    """Texto de um valor de tipo genérico (None e NaN -> vazio; o csv faz str() do resto)"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        return '' if valor != valor else repr(valor)
+    return valor
+
+
+def _formatar_data_hora(valor):
+    """datetime com microssegundos; a precisão final é cortada no fim (_ajustar_data_hora)"""
+    if valor is None:
+        return ''
+    return valor.isoformat(sep=' ', timespec='microseconds')
+
+
+def _precisao(valor):
+    """Menor precisão que representa o datetime (mesma regra do pandas)"""
+    if valor.microsecond:
+        return 'us' if valor.microsecond % 1000 else 'ms'
+    if valor.hour or valor.minute or valor.second:
+        return 's'
+    return 'dia'
+
+
+def _inteiro_como_float(texto):
+    """Inteiro de uma coluna com NULL, como o pandas escreve (float64)"""
+    return texto and repr(float(int(texto)))
+
+
+def _ajustar_data_hora(tamanho):
+    return lambda texto: texto[:tamanho]
+
+
+class EscritorCSVAtomico:
+    """
+    Arquivo CSV escrito em um temporário e publicado com os.replace
+
+    Uso:
+        escritor = EscritorCSVAtomico(caminho, colunas, tipos)
+        escritor.escrever(linhas)
+        escritor.concluir()      # ou escritor.descartar()
+    """
+
+    def __init__(self, caminho, colunas, tipos=None):
+        """
+        Args:
+            caminho: Caminho final do CSV
+            colunas: Nomes das colunas (cabeçalho)
+            tipos: Tipo Python de cada coluna (type_code do cursor.description).
+                Default: todas genéricas
+        """
+        self.caminho = caminho
+        self.registros = 0
+        tipos = list(tipos) if tipos else [None] * len(colunas)
+        self._formatadores = [_formatar_data_hora if tipo is datetime.datetime else _formatar for tipo in tipos]
+        self._inteiras = [i for i, tipo in enumerate(tipos) if tipo is int]
+        self._inteiras_com_nulo = set()
+        self._datas_hora = [i for i, tipo in enumerate(tipos) if tipo is datetime.datetime]
+        self._precisoes = {}  # coluna datetime -> índice em _ORDEM_PRECISAO (só colunas com valor)
+        pasta, nome = os.path.split(caminho)
+        self.caminho_temporario = os.path.join(pasta, f".{nome}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._arquivo = open(self.caminho_temporario, 'w', encoding=ENCODING, newline='')
+        self._escritor = csv.writer(self._arquivo, delimiter=SEPARADOR, lineterminator=os.linesep)
+        self._escritor.writerow(colunas)
+
+    def escrever(self, linhas):
+        formatadores = self._formatadores
+        for linha in linhas:
+            self._escritor.writerow([formatar(valor) for formatar, valor in zip(formatadores, linha)])
+            self.registros += 1
+
+        for i in self._inteiras:
+            if i not in self._inteiras_com_nulo and any(linha[i] is None for linha in linhas):
+                self._inteiras_com_nulo.add(i)
+        for i in self._datas_hora:
+            precisoes = {_precisao(linha[i]) for linha in linhas if linha[i] is not None}
+            if precisoes:
+                maior = max(_ORDEM_PRECISAO.index(precisao) for precisao in precisoes)
+                self._precisoes[i] = max(maior, self._precisoes.get(i, 0))
+
+    def _ajustes(self):
+        """Colunas cujo texto muda depois de ver a coluna inteira: índice -> função texto -> texto"""
+        ajustes = {i: _inteiro_como_float for i in self._inteiras_com_nulo}
+        for i, ordem in self._precisoes.items():
+            tamanho = _TAMANHO_PRECISAO[_ORDEM_PRECISAO[ordem]]
+            if tamanho < _TAMANHO_PRECISAO['us']:
+                ajustes[i] = _ajustar_data_hora(tamanho)
+        return ajustes
+
+    def _reescrever(self, ajustes):
+        """Segunda passada pelo temporário aplicando os ajustes (linha a linha, sem carregar o arquivo)"""
+        ajustado = f"{self.caminho_temporario}.ajuste"
+        with open(self.caminho_temporario, 'r', encoding=ENCODING, newline='') as origem, \
+                open(ajustado, 'w', encoding=ENCODING, newline='') as destino:
+            leitor = csv.reader(origem, delimiter=SEPARADOR)
+            escritor = csv.writer(destino, delimiter=SEPARADOR, lineterminator=os.linesep)
+            escritor.writerow(next(leitor))
+            for linha in leitor:
+                for i, ajustar in ajustes.items():
+                    linha[i] = ajustar(linha[i])
+                escritor.writerow(linha)
+            destino.flush()
+            os.fsync(destino.fileno())
+        os.replace(ajustado, self.caminho_temporario)
+
+    def concluir(self):
+        """Grava em disco e troca o temporário pelo arquivo final (substitui se existir)"""
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._arquivo.close()
+        ajustes = self._ajustes()
+        if ajustes:
+            self._reescrever(ajustes)
+        os.replace(self.caminho_temporario, self.caminho)
+        return self.caminho
+
+    def descartar(self):
+        """Apaga o temporário sem tocar no arquivo final"""
+        if not self._arquivo.closed:
+            self._arquivo.close()
+        for caminho in (self.caminho_temporario, f"{self.caminho_temporario}.ajuste"):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def escrever_result_set(cursor, caminho_do_grupo, coluna_grupo=None, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """
+    Grava o result set atual do cursor, em lotes, em um CSV por grupo
+
+    Cada arquivo só é criado quando recebe a primeira linha (result set vazio não
+    gera arquivo). Os arquivos ficam pendentes: use concluir_todos/descartar_todos
+
+    Args:
+        cursor: Cursor DB-API executado (cursor.description preenchido)
+        caminho_do_grupo: Função valor do grupo -> caminho final do CSV (None ignora a linha)
+        coluna_grupo: Coluna que separa as linhas em arquivos (não vai para o CSV).
+            Default: um arquivo só (caminho_do_grupo(None))
+        tamanho_lote: Linhas por fetchmany
+
+    Returns:
+        dict: valor do grupo -> EscritorCSVAtomico pendente
+    """
+    colunas = [descricao[0] for descricao in cursor.description]
+    tipos = [descricao[1] for descricao in cursor.description]
+    if coluna_grupo and coluna_grupo not in colunas:
+        raise ValueError(f"Coluna {coluna_grupo} não está no resultado da consulta")
+    indice_grupo = colunas.index(coluna_grupo) if coluna_grupo else None
+    if indice_grupo is not None:
+        colunas = colunas[:indice_grupo] + colunas[indice_grupo + 1:]
+        tipos = tipos[:indice_grupo] + tipos[indice_grupo + 1:]
+
+    escritores = {}
+    try:
+        while True:
+            lote = cursor.fetchmany(tamanho_lote)
+            if not lote:
+                break
+
+            if indice_grupo is None:
+                grupos = {None: lote}
+            else:
+                grupos = {}
+                for linha in lote:
+                    linha = tuple(linha)
+                    grupos.setdefault(linha[indice_grupo], []).append(linha[:indice_grupo] + linha[indice_grupo + 1:])
+
+            for grupo, linhas in grupos.items():
+                if grupo not in escritores:
+                    caminho = caminho_do_grupo(grupo)
+                    if caminho is None:
+                        continue
+                    escritores[grupo] = EscritorCSVAtomico(caminho, colunas, tipos)
+                escritores[grupo].escrever(linhas)
+            del lote, grupos
+    except BaseException:
+        descartar_todos(escritores)
+        raise
+    return escritores
+
+
+def concluir_todos(escritores):
+    """
+    Publica os arquivos pendentes
+
+    Returns:
+        dict: valor do grupo -> (caminho, registros)
+    """
+    publicados = {}
+    try:
+        for grupo, escritor in escritores.items():
+            publicados[grupo] = (escritor.concluir(), escritor.registros)
+    except BaseException:
+        descartar_todos(escritores)
+        raise
+    return publicados
+
+
+def descartar_todos(escritores):
+    """Apaga os temporários pendentes"""
+    for escritor in escritores.values():
+        escritor.descartar()
@@ -0,0 +1,168 @@
+import re
+import threading
+import time
+
+import pyodbc
+
+# ============================================
+# SESSÕES REAPROVEITADAS ENTRE DATAS
+# ============================================
+# Em vez de um pyodbc.connect (handshake Trusted_Connection + contexto do linked
+# server EXPERT) por data, cada thread mantém uma conexão aberta durante toda a
+# execução. Entre uma data e outra a sessão é limpa (transação aberta e tabelas
+# temporárias da query). Falhas de rede derrubam a conexão: ela é descartada e a
+# consulta é repetida em uma conexão nova, com espera exponencial.
+
+TENTATIVAS_PADRAO = 4
+ESPERA_INICIAL_PADRAO = 2.0  # segundos (2, 4, 8...)
+ESPERA_MAXIMA_PADRAO = 60.0
+
+# SQLSTATEs de falhas transitórias: conexão perdida/recusada, timeout e deadlock
+SQLSTATES_TRANSITORIOS = {'08S01', '08001', '08003', '08004', '08007', 'HYT00', 'HYT01', '40001'}
+
+_PADRAO_TABELA_TEMPORARIA = re.compile(r"(?<![\w#@])(##?[A-Za-z_]\w*)")
+
+
+def sqlstate(erro):
+    """SQLSTATE de um erro do pyodbc (primeiro argumento), ou None"""
+    if erro.args and isinstance(erro.args[0], str) and len(erro.args[0]) == 5:
+        return erro.args[0]
+    return None
+
+
+def eh_transitorio(erro):
+    """Se o erro é de rede/timeout (vale repetir em uma conexão nova)"""
+    return isinstance(erro, pyodbc.Error) and sqlstate(erro) in SQLSTATES_TRANSITORIOS
+
+
+def tabelas_temporarias(query):
+    """Tabelas temporárias (#local e ##global) citadas na query"""
+    return sorted(set(_PADRAO_TABELA_TEMPORARIA.findall(query)))
+
+
+class GerenciadorSessoes:
+    """
+    Uma conexão por thread, reaproveitada entre datas, com reconexão automática
+
+    Uso:
+        sessoes = GerenciadorSessoes(CONNECTION_STRING)
+        df = sessoes.executar(ler_resultado, query, params)   # ler_resultado(cursor) -> df
+        sessoes.fechar()
+    """
+
+    def __init__(self, connection_string, tentativas=TENTATIVAS_PADRAO, espera_inicial=ESPERA_INICIAL_PADRAO,
+                 espera_maxima=ESPERA_MAXIMA_PADRAO):
+        self.connection_string = connection_string
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self._local = threading.local()
+        self._conexoes = []
+        self._lock = threading.Lock()
+
+    def _conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = pyodbc.connect(self.connection_string)
+            self._local.conn = conn
+            with self._lock:
+                self._conexoes.append(conn)
+        return conn
+
+    def _descartar(self):
+        """Fecha a conexão da thread (quebrada ou em estado desconhecido)"""
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._conexoes:
+                self._conexoes.remove(conn)
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def _resetar(self, conn, query):
+        """Desfaz a transação aberta e apaga as tabelas temporárias da query (próxima data começa limpa)"""
+        comandos = ["IF @@TRANCOUNT > 0 ROLLBACK;"]
+        for tabela in tabelas_temporarias(query):
+            comandos.append(f"IF OBJECT_ID('tempdb..{tabela}') IS NOT NULL DROP TABLE {tabela};")
+        try:
+            cursor = conn.cursor()
+            cursor.execute('\n'.join(comandos))
+            cursor.close()
+        except pyodbc.Error:
+            # A sessão não volta a um estado conhecido: a próxima data abre outra
+            self._descartar()
+
+    def executar(self, leitor, query, params=()):
+        """
+        Executa a query na conexão da thread e devolve leitor(cursor)
+
+        Erros transitórios (SQLSTATES_TRANSITORIOS) descartam a conexão e repetem a
+        query em uma conexão nova, esperando espera_inicial * 2^n segundos (até
+        espera_maxima). Os demais erros, ou o último transitório, são propagados
+
+        Args:
+            leitor: Função que recebe o cursor executado e devolve o resultado
+            query: Texto SQL
+            params: Parâmetros da query (?)
+        """
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                conn = self._conexao()
+                cursor = conn.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                resultado = leitor(cursor)
+                cursor.close()
+            except pyodbc.Error as erro:
+                self._descartar()
+                if not eh_transitorio(erro) or tentativa == self.tentativas:
+                    raise
+                espera = min(self.espera_inicial * 2 ** (tentativa - 1), self.espera_maxima)
+                print(f"  🔁 Falha transitória ({sqlstate(erro)}), reconectando em {espera:.0f}s "
+                      f"(tentativa {tentativa + 1}/{self.tentativas})")
+                time.sleep(espera)
+                continue
+            except Exception:
+                # Result set lido pela metade: a conexão não serve para a próxima data
+                self._descartar()
+                raise
+
+            self._resetar(conn, query)
+            return resultado
+
+    def fechar(self):
+        """Fecha todas as conexões abertas (de todas as threads)"""
+        with self._lock:
+            conexoes, self._conexoes = self._conexoes, []
+        for conn in conexoes:
+            try:
+                conn.close()
+            except pyodbc.Error:
+                pass
+
+
+_gerenciadores = {}
+_lock_gerenciadores = threading.Lock()
+
+
+def obter_sessoes(connection_string):
+    """GerenciadorSessoes da string de conexão (um por execução do script)"""
+    with _lock_gerenciadores:
+        if connection_string not in _gerenciadores:
+            _gerenciadores[connection_string] = GerenciadorSessoes(connection_string)
+        return _gerenciadores[connection_string]
+
+
+def fechar_sessoes():
+    """Fecha as conexões de todos os gerenciadores (fim da execução)"""
+    with _lock_gerenciadores:
+        gerenciadores = list(_gerenciadores.values())
+        _gerenciadores.clear()
+    for gerenciador in gerenciadores:
+        gerenciador.fechar()
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import re
+import threading
+
+# ============================================
+# TEMPLATES SQL COMPILADOS
+# ============================================
+# O .sql fica em um compartilhamento de rede (SMB) e é o mesmo para todas as datas.
+# Cada arquivo é lido e compilado uma única vez: as datas dos DECLARE @DT_INI/@DT_FIM/
+# @DT/@DT2 viram "slots" e cada data só junta os trechos fixos com os valores do slot.
+# A cada uso só o os.stat() vai à rede; o arquivo é relido quando mtime/tamanho mudam
+# (e só recompilado se o conteúdo, pelo hash, mudou de fato).
+#
+# O ganho é só no cliente (leitura e compilação do arquivo). As datas continuam no
+# texto do lote: a query concatena @DT/@DT2 no OPENQUERY do EXPERT, que não aceita
+# parâmetros, então o servidor não reaproveita o plano entre datas.
+
+SLOTS_DATA = ('DT_INI', 'DT_FIM', 'DT', 'DT2')
+
+_PADRAO_SLOT = re.compile(
+    r"(DECLARE\s+@(?P<slot>" + '|'.join(sorted(SLOTS_DATA, key=len, reverse=True)) + r")\s+AS\s+DATE\s*=\s*)"
+    r"'\d{4}-\d{2}-\d{2}'",
+    re.IGNORECASE,
+)
+
+
+class TemplateSQL:
+    """
+    Query com os valores dos DECLARE de data separados do texto fixo
+
+    Uso:
+        template = TemplateSQL(texto)
+        query = template.renderizar({'DT': '2025-10-08', 'DT2': '2025-10-08', ...})
+    """
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.partes = []
+        self.slots = []
+        inicio = 0
+        for match in _PADRAO_SLOT.finditer(texto):
+            self.partes.append(texto[inicio:match.end(1)])
+            self.slots.append(match.group('slot').upper())
+            inicio = match.end()
+        self.partes.append(texto[inicio:])
+
+    def _valores(self, valores):
+        faltando = [slot for slot in self.slots if slot not in valores]
+        if faltando:
+            raise KeyError(f"Valores ausentes para os slots: {', '.join(faltando)}")
+        return [valores[slot] for slot in self.slots]
+
+    def renderizar(self, valores):
+        """
+        Query com as datas escritas no texto (mesmo resultado do antigo re.sub)
+
+        Args:
+            valores: dict slot -> data 'YYYY-MM-DD' (slots que o arquivo não tem são ignorados)
+
+        Returns:
+            str: Query pronta para executar
+        """
+        trechos = [self.partes[0]]
+        for valor, parte in zip(self._valores(valores), self.partes[1:]):
+            trechos.append(f"'{valor}'")
+            trechos.append(parte)
+        return ''.join(trechos)
+
+
+_cache = {}  # caminho -> (mtime_ns, tamanho, hash, TemplateSQL)
+_lock_cache = threading.Lock()
+
+
+def carregar_template(caminho_sql):
+    """
+    TemplateSQL do arquivo, lido da rede só na primeira vez ou quando o arquivo mudar
+
+    Args:
+        caminho_sql: Caminho do arquivo .sql
+
+    Returns:
+        TemplateSQL: Template compilado
+    """
+    estado = os.stat(caminho_sql)
+    with _lock_cache:
+        entrada = _cache.get(caminho_sql)
+    if entrada and entrada[:2] == (estado.st_mtime_ns, estado.st_size):
+        return entrada[3]
+
+    with open(caminho_sql, 'rb') as f:
+        conteudo = f.read()
+    assinatura = hashlib.sha256(conteudo).hexdigest()
+
+    if entrada and entrada[2] == assinatura:
+        template = entrada[3]  # Só o mtime mudou (ex: arquivo salvo sem alteração)
+    else:
+        template = TemplateSQL(conteudo.decode('utf-8').replace('\r\n', '\n'))
+        if entrada:
+            print(f"  🔁 Query alterada, recarregada: {os.path.basename(caminho_sql)}")
+
+    with _lock_cache:
+        _cache[caminho_sql] = (estado.st_mtime_ns, estado.st_size, assinatura, template)
+    return template
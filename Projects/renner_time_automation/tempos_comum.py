@@ -0,0 +1,654 @@
+import pyodbc
+from datetime import datetime, timedelta
+import calendar
+import io
+import os
+import re
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from escrita_csv import concluir_todos, descartar_todos, escrever_result_set
+from sessao_sql import fechar_sessoes, obter_sessoes
+from template_sql import carregar_template
+
+# ============================================================================
+# CÓDIGO COMUM DAS EXTRAÇÕES DE TEMPOS OPERACIONAIS
+# ============================================================================
+# Usado por script.py (TRC) e script_wo.py (TRCWO), que só trazem as configurações
+# (query, pasta de destino, sufixo dos arquivos) e chamam executar_incremental.
+
+# Coluna com o dia de cada linha na query por período (não vai para o CSV)
+COLUNA_DATA_PERIODO = 'DATA_REFERENCIA'
+
+# ============================================================================
+# CLASSE PARA GERENCIAR RELATÓRIO DE EXECUÇÃO
+# ============================================================================
+
+class RelatorioExecucao:
+    """Gerencia o relatório de execução do script"""
+    
+    def __init__(self):
+        self.registros = []
+        self.inicio_execucao = datetime.now()
+        self._lock = threading.Lock()
+    
+    def adicionar(self, data, status, registros=0, arquivo=None, mensagem=None):
+        """
+        Adiciona um registro ao relatório
+        
+        Args:
+            data: Data processada
+            status: 'SUCESSO', 'SEM_DADOS', 'ERRO'
+            registros: Número de registros processados
+            arquivo: Nome do arquivo gerado
+            mensagem: Mensagem adicional
+        """
+        with self._lock:
+            self.registros.append({
+                'data': data,
+                'status': status,
+                'registros': registros,
+                'arquivo': arquivo,
+                'mensagem': mensagem
+            })
+    
+    def exibir(self):
+        """Exibe o relatório formatado"""
+        fim_execucao = datetime.now()
+        duracao = (fim_execucao - self.inicio_execucao).total_seconds()
+        
+        print("\n" + "="*100)
+        print("📋 RELATÓRIO DE EXECUÇÃO")
+        print("="*100)
+        print(f"Início: {self.inicio_execucao.strftime('%d/%m/%Y %H:%M:%S')}")
+        print(f"Fim: {fim_execucao.strftime('%d/%m/%Y %H:%M:%S')}")
+        print(f"Duração: {duracao:.2f} segundos")
+        print("="*100)
+        
+        if not self.registros:
+            print("\n❌ Nenhuma data foi processada")
+            return
+        
+        # Cabeçalho da tabela
+        print(f"\n{'DATA':<15} {'STATUS':<15} {'REGISTROS':<12} {'ARQUIVO':<40} {'OBSERVAÇÃO'}")
+        print("-"*100)
+        
+        # Linhas do relatório
+        sucesso_total = 0
+        sem_dados_total = 0
+        erro_total = 0
+        registros_total = 0
+        
+        # Datas processadas em paralelo terminam fora de ordem: o relatório segue a ordem das datas
+        for reg in sorted(self.registros, key=lambda r: r['data']):
+            data_str = reg['data'].strftime('%d/%m/%Y')
+            status = reg['status']
+            registros = reg['registros']
+            arquivo = reg['arquivo'] if reg['arquivo'] else '-'
+            mensagem = reg['mensagem'] if reg['mensagem'] else ''
+            
+            # Emoji e cor baseado no status
+            if status == 'SUCESSO':
+                status_display = '✅ SUCESSO'
+                sucesso_total += 1
+                registros_total += registros
+            elif status == 'SEM_DADOS':
+                status_display = '⚠️  SEM DADOS'
+                sem_dados_total += 1
+            else:
+                status_display = '❌ ERRO'
+                erro_total += 1
+            
+            # Exibe apenas o nome do arquivo, não o caminho completo
+            if arquivo != '-':
+                arquivo = os.path.basename(arquivo)
+            
+            print(f"{data_str:<15} {status_display:<20} {registros:<12} {arquivo:<40} {mensagem}")
+        
+        # Resumo
+        print("="*100)
+        print(f"\n📊 RESUMO:")
+        print(f"   ✅ Arquivos gerados com sucesso: {sucesso_total}")
+        if registros_total > 0:
+            print(f"      Total de registros: {registros_total:,}")
+        if sem_dados_total > 0:
+            print(f"   ⚠️  Datas sem dados (arquivo não criado): {sem_dados_total}")
+        if erro_total > 0:
+            print(f"   ❌ Erros: {erro_total}")
+        print(f"   📁 Total de datas processadas: {len(self.registros)}")
+        
+        print("\n" + "="*100)
+
+# ============================================================================
+# FUNÇÕES AUXILIARES
+# ============================================================================
+
+def get_data_ontem():
+    """Retorna a data de ontem (data alvo máxima para processamento)"""
+    return datetime.now().date() - timedelta(days=1)
+
+def extrair_data_do_arquivo(nome_arquivo, sufixo_arquivo):
+    """
+    Extrai a data do nome do arquivo no formato TEMPOS_OPERACIONAIS_YYYYMMDD_<sufixo>.csv
+    
+    Args:
+        nome_arquivo: Nome do arquivo
+        sufixo_arquivo: Sufixo dos arquivos da extração (ex: 'TRC', 'TRCWO')
+    
+    Returns:
+        datetime.date ou None se não conseguir extrair
+    """
+    padrao = rf'TEMPOS_OPERACIONAIS_(\d{{8}})_{re.escape(sufixo_arquivo)}\.csv'
+    match = re.search(padrao, nome_arquivo)
+    
+    if match:
+        data_str = match.group(1)
+        try:
+            return datetime.strptime(data_str, '%Y%m%d').date()
+        except ValueError:
+            return None
+    return None
+
+def obter_ultima_data_processada(caminho_destino, sufixo_arquivo):
+    """
+    Verifica o diretório e retorna a última data processada com base nos arquivos existentes
+    
+    Args:
+        caminho_destino: Caminho do diretório onde estão os arquivos
+        sufixo_arquivo: Sufixo dos arquivos da extração (ex: 'TRC', 'TRCWO')
+    
+    Returns:
+        datetime.date ou None se não houver arquivos
+    """
+    try:
+        if not os.path.exists(caminho_destino):
+            print(f"⚠️  Diretório não existe: {caminho_destino}")
+            return None
+        
+        arquivos = [f for f in os.listdir(caminho_destino) if f.endswith('.csv')]
+        
+        if not arquivos:
+            print("ℹ️  Nenhum arquivo CSV encontrado no diretório")
+            return None
+        
+        datas_encontradas = []
+        for arquivo in arquivos:
+            data = extrair_data_do_arquivo(arquivo, sufixo_arquivo)
+            if data:
+                datas_encontradas.append(data)
+        
+        if not datas_encontradas:
+            print("⚠️  Nenhum arquivo com padrão de data válido encontrado")
+            return None
+        
+        ultima_data = max(datas_encontradas)
+        print(f"📅 Última data processada encontrada: {ultima_data.strftime('%d/%m/%Y')}")
+        print(f"   Total de arquivos no diretório: {len(arquivos)}")
+        print(f"   Arquivos com padrão válido: {len(datas_encontradas)}")
+        
+        return ultima_data
+        
+    except Exception as e:
+        print(f"✗ Erro ao verificar diretório: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def gerar_lista_datas_pendentes(ultima_data_processada, data_ontem):
+    """
+    Gera lista de datas que precisam ser processadas (incluindo finais de semana para verificação)
+    
+    Args:
+        ultima_data_processada: Última data já processada
+        data_ontem: Data alvo (ontem)
+    
+    Returns:
+        list: Lista de datas (datetime.date) a processar
+    """
+    datas_pendentes = []
+    
+    # Se não há data processada, processa apenas ontem
+    if ultima_data_processada is None:
+        datas_pendentes.append(data_ontem)
+        return datas_pendentes
+    
+    # Começa do dia seguinte à última data processada
+    data_atual = ultima_data_processada + timedelta(days=1)
+    
+    while data_atual <= data_ontem:
+        # Adiciona TODAS as datas (incluindo finais de semana)
+        # A verificação de dados será feita na consulta
+        datas_pendentes.append(data_atual)
+        data_atual += timedelta(days=1)
+    
+    return datas_pendentes
+
+def get_primeiro_ultimo_dia_mes(data):
+    """Retorna o primeiro e último dia do mês da data informada"""
+    # Garante que estamos trabalhando com datetime
+    if isinstance(data, datetime):
+        data_dt = data
+    else:
+        data_dt = datetime.combine(data, datetime.min.time())
+    
+    primeiro_dia = data_dt.replace(day=1)
+    ultimo_dia = data_dt.replace(day=calendar.monthrange(data_dt.year, data_dt.month)[1])
+    return primeiro_dia, ultimo_dia
+
+def datas_da_query(data_exec, data_fim=None):
+    """
+    Valores dos DECLARE de data da query para uma data (ou período)
+    
+    Args:
+        data_exec: Data processada (@DT; também define @DT_INI/@DT_FIM e @TableName do mês)
+        data_fim: Última data do período (@DT2). Default: data_exec (um dia só)
+    
+    Returns:
+        dict: slot -> data 'YYYY-MM-DD'
+    """
+    # Converte date para datetime se necessário
+    if isinstance(data_exec, datetime):
+        data_exec_dt = data_exec
+    else:
+        data_exec_dt = datetime.combine(data_exec, datetime.min.time())
+    
+    data_fim = data_fim or data_exec_dt
+    primeiro_dia, ultimo_dia = get_primeiro_ultimo_dia_mes(data_exec_dt)
+    
+    return {
+        'DT_INI': primeiro_dia.strftime('%Y-%m-%d'),
+        'DT_FIM': ultimo_dia.strftime('%Y-%m-%d'),
+        'DT': data_exec_dt.strftime('%Y-%m-%d'),
+        'DT2': data_fim.strftime('%Y-%m-%d'),
+    }
+
+def carregar_e_atualizar_query(caminho_sql, data_exec, data_fim=None):
+    """
+    Carrega o arquivo SQL e escreve as datas nos DECLARE @DT_INI/@DT_FIM/@DT/@DT2
+    
+    O arquivo é lido e compilado uma vez (template_sql); as chamadas seguintes só
+    conferem se ele mudou e trocam as datas. As datas ficam no texto: a query monta
+    o OPENQUERY do EXPERT com elas, então não há parâmetros nem reaproveitamento de
+    plano entre datas
+    """
+    return carregar_template(caminho_sql).renderizar(datas_da_query(data_exec, data_fim))
+
+def nome_arquivo_csv(data_exec, sufixo_arquivo):
+    """Nome do CSV da data (formato TEMPOS_OPERACIONAIS_YYYYMMDD_<sufixo>.csv)"""
+    return f"TEMPOS_OPERACIONAIS_{data_exec.strftime('%Y%m%d')}_{sufixo_arquivo}.csv"
+
+def gravar_resultado_csv(cursor, caminho_do_grupo, coluna_grupo=None):
+    """
+    Grava o último result set do lote direto em CSV, sem montar DataFrame (escrita_csv)
+    
+    Os arquivos só aparecem com o nome final depois que o lote inteiro foi lido;
+    se algo falhar no meio, nenhum arquivo é criado ou alterado
+    
+    Returns:
+        dict: valor do grupo -> (caminho, registros); vazio se não vieram linhas
+    """
+    escritores = {}
+    try:
+        while True:
+            if cursor.description:
+                # Um result set anterior não é o SELECT final do lote
+                descartar_todos(escritores)
+                escritores = escrever_result_set(cursor, caminho_do_grupo, coluna_grupo)
+            
+            try:
+                if not cursor.nextset():
+                    break
+            except pyodbc.ProgrammingError:
+                break
+    except BaseException:
+        descartar_todos(escritores)
+        raise
+    
+    return concluir_todos(escritores)
+
+def executar_consulta_para_csv(connection_string, query, caminho_do_grupo, coluna_grupo=None, saida=None):
+    """
+    Executa a consulta gravando as linhas em CSV à medida que chegam (fetchmany)
+    
+    A memória não cresce com a quantidade de linhas: só um lote fica em memória
+    
+    Args:
+        caminho_do_grupo: Função valor de coluna_grupo -> caminho do CSV (None ignora a linha)
+        coluna_grupo: Coluna que separa as linhas em arquivos (não vai para o CSV).
+            Default: um arquivo só (caminho_do_grupo(None))
+        saida: Arquivo para o log (print e traceback). Default: sys.stdout/sys.stderr
+    
+    Returns:
+        dict: valor do grupo -> (caminho, registros), vazio se a consulta não trouxe
+              linhas, ou None em caso de erro
+    """
+    try:
+        return obter_sessoes(connection_string).executar(
+            lambda cursor: gravar_resultado_csv(cursor, caminho_do_grupo, coluna_grupo), query
+        )
+    
+    except Exception as e:
+        print(f"  ✗ Erro ao executar consulta: {e}", file=saida)
+        traceback.print_exc(file=saida)
+        return None
+    
+def isolar_tabelas_globais(query, sufixo):
+    """
+    Renomeia as tabelas temporárias globais (##DISCAGENS, ##DISCAGENS_TWO...) da query
+    
+    Tabelas ## são visíveis para todas as sessões do servidor: consultas simultâneas
+    (outras datas do backlog ou outra execução do script) apagariam a tabela uma da outra
+    
+    Args:
+        query: Texto SQL
+        sufixo: Sufixo único da execução (ex: PID + data)
+    
+    Returns:
+        str: Query com ##NOME trocado por ##NOME_<sufixo>
+    """
+    return re.sub(r'##(\w+)', lambda m: f"##{m.group(1)}_{sufixo}", query)
+
+def processar_data(data_exec, caminho_sql, connection_string, caminho_destino, sufixo_arquivo, relatorio, saida=None):
+    """
+    Processa uma data específica: carrega query, executa e salva CSV apenas se houver dados
+    
+    Args:
+        sufixo_arquivo: Sufixo dos arquivos da extração (nome_arquivo_csv)
+        saida: Arquivo para o log da data (print e traceback). Default: sys.stdout/sys.stderr
+    """
+    try:
+        print(f"\n{'─'*80}", file=saida)
+        print(f"📊 Processando: {data_exec.strftime('%d/%m/%Y (%A)')}", file=saida)
+        print(f"{'─'*80}", file=saida)
+        
+        # Converte date para datetime
+        if isinstance(data_exec, datetime):
+            data_exec_dt = data_exec
+        else:
+            data_exec_dt = datetime.combine(data_exec, datetime.min.time())
+        
+        # DEBUG: Mostra as datas que serão usadas na query
+        primeiro_dia, ultimo_dia = get_primeiro_ultimo_dia_mes(data_exec_dt)
+        print(f"  📅 DEBUG - Datas na query:", file=saida)
+        print(f"     @DT_INI = {primeiro_dia.strftime('%Y-%m-%d')}", file=saida)
+        print(f"     @DT_FIM = {ultimo_dia.strftime('%Y-%m-%d')}", file=saida)
+        print(f"     @DT     = {data_exec_dt.strftime('%Y-%m-%d')}", file=saida)
+        print(f"     @DT2    = {data_exec_dt.strftime('%Y-%m-%d')}", file=saida)
+        
+        # Carrega e atualiza a query (com tabelas ## exclusivas desta data)
+        query_atualizada = carregar_e_atualizar_query(caminho_sql, data_exec_dt)
+        query_atualizada = isolar_tabelas_globais(query_atualizada, f"{os.getpid()}_{data_exec_dt.strftime('%Y%m%d')}")
+        
+        # DEBUG: Mostra um trecho da query atualizada
+        linhas_query = query_atualizada.split('\n')[:10]
+        print(f"\n  🔍 DEBUG - Primeiras linhas da query:", file=saida)
+        for linha in linhas_query:
+            if 'DECLARE @DT' in linha:
+                print(f"     {linha.strip()}", file=saida)
+        
+        # Executa a consulta gravando o CSV direto do cursor
+        caminho_completo = os.path.join(caminho_destino, nome_arquivo_csv(data_exec_dt, sufixo_arquivo))
+        print(f"\n  🔄 Executando consulta...", file=saida)
+        print(f"  💾 DEBUG - Gravando arquivo: {os.path.basename(caminho_completo)}", file=saida)
+        arquivos = executar_consulta_para_csv(connection_string, query_atualizada,
+                                              lambda grupo: caminho_completo, saida=saida)
+        
+        # Verifica se houve erro na consulta (nenhum arquivo é criado)
+        if arquivos is None:
+            mensagem = "Erro na execução da consulta"
+            print(f"  ❌ {mensagem}", file=saida)
+            relatorio.adicionar(data_exec, 'ERRO', 0, None, mensagem)
+            return False
+        
+        # Verifica se há dados
+        if not arquivos:
+            mensagem = f"Sem dados para {data_exec_dt.strftime('%A')} - Arquivo não criado"
+            print(f"  ⚠️  {mensagem}", file=saida)
+            relatorio.adicionar(data_exec, 'SEM_DADOS', 0, None, mensagem)
+            return True
+        
+        arquivo_salvo, registros = arquivos[None]
+        print(f"  ✅ Arquivo salvo com sucesso!", file=saida)
+        print(f"     Registros: {registros:,}", file=saida)
+        relatorio.adicionar(data_exec, 'SUCESSO', registros, arquivo_salvo, 
+                          f"Arquivo salvo em {caminho_destino}")
+        return True
+            
+    except Exception as e:
+        mensagem = f"Exceção: {str(e)}"
+        print(f"  ❌ Erro ao processar data {data_exec}: {e}", file=saida)
+        traceback.print_exc(file=saida)
+        relatorio.adicionar(data_exec, 'ERRO', 0, None, mensagem)
+        return False
+
+def agrupar_datas_por_mes(datas):
+    """
+    Agrupa as datas pendentes por mês (a tabela totalinfo_YYYY_MM do EXPERT é mensal)
+    
+    Returns:
+        list: Listas de datas (ordenadas), uma por mês
+    """
+    meses = {}
+    for data in sorted(datas):
+        meses.setdefault((data.year, data.month), []).append(data)
+    return list(meses.values())
+
+def processar_periodo(datas, caminho_sql_periodo, connection_string, caminho_destino, sufixo_arquivo, relatorio,
+                      saida=None):
+    """
+    Processa várias datas do mesmo mês com uma única consulta (@DT = primeira, @DT2 = última)
+    
+    A query por período devolve a coluna COLUNA_DATA_PERIODO; cada linha vai, direto
+    do cursor, para o CSV do seu dia (o mesmo do processamento diário, sem essa coluna)
+    
+    Args:
+        datas: Datas (datetime.date) de um mesmo mês, em ordem
+        caminho_sql_periodo: Query por período (ex: Retorno_tempos_renner - PERIODO.sql)
+        sufixo_arquivo: Sufixo dos arquivos da extração (nome_arquivo_csv)
+        saida: Arquivo para o log do período (print e traceback). Default: sys.stdout/sys.stderr
+    """
+    data_ini, data_fim = datas[0], datas[-1]
+    try:
+        print(f"\n{'─'*80}", file=saida)
+        print(f"📊 Processando período: {data_ini.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')} "
+              f"({len(datas)} datas, 1 consulta)", file=saida)
+        print(f"{'─'*80}", file=saida)
+        
+        query_atualizada = carregar_e_atualizar_query(caminho_sql_periodo, data_ini, data_fim)
+        query_atualizada = isolar_tabelas_globais(
+            query_atualizada, f"{os.getpid()}_{data_ini.strftime('%Y%m%d')}_{data_fim.strftime('%Y%m%d')}"
+        )
+        
+        # Cada linha vai para o CSV do seu dia (DATA_REFERENCIA), direto do cursor
+        datas_por_texto = {data.strftime('%Y-%m-%d'): data for data in datas}
+        
+        def caminho_do_dia(valor):
+            data = datas_por_texto.get(str(valor)[:10])
+            return os.path.join(caminho_destino, nome_arquivo_csv(data, sufixo_arquivo)) if data else None
+        
+        print(f"\n  🔄 Executando consulta...", file=saida)
+        arquivos = executar_consulta_para_csv(connection_string, query_atualizada, caminho_do_dia,
+                                              COLUNA_DATA_PERIODO, saida)
+        
+        if arquivos is None:
+            mensagem = "Erro na execução da consulta do período"
+            print(f"  ❌ {mensagem}", file=saida)
+            for data_exec in datas:
+                relatorio.adicionar(data_exec, 'ERRO', 0, None, mensagem)
+            return False
+        
+        arquivos_por_data = {datas_por_texto[str(valor)[:10]]: arquivo for valor, arquivo in arquivos.items()}
+        print(f"  📥 {sum(registros for _, registros in arquivos.values()):,} registros no período", file=saida)
+        
+        for data_exec in datas:
+            if data_exec not in arquivos_por_data:
+                mensagem = f"Sem dados para {data_exec.strftime('%A')} - Arquivo não criado"
+                print(f"  ⚠️  {data_exec.strftime('%d/%m/%Y')}: {mensagem}", file=saida)
+                relatorio.adicionar(data_exec, 'SEM_DADOS', 0, None, mensagem)
+                continue
+            
+            arquivo_salvo, registros = arquivos_por_data[data_exec]
+            print(f"  ✅ {os.path.basename(arquivo_salvo)}: {registros:,} registros", file=saida)
+            relatorio.adicionar(data_exec, 'SUCESSO', registros, arquivo_salvo,
+                              f"Arquivo salvo em {caminho_destino}")
+        return True
+    
+    except Exception as e:
+        mensagem = f"Exceção: {str(e)}"
+        print(f"  ❌ Erro ao processar período {data_ini} a {data_fim}: {e}", file=saida)
+        traceback.print_exc(file=saida)
+        for data_exec in datas:
+            relatorio.adicionar(data_exec, 'ERRO', 0, None, mensagem)
+        return False
+
+# ============================================================================
+# PROCESSAMENTO PARALELO DO BACKLOG
+# ============================================================================
+
+def _executar_capturando(funcao, args):
+    """
+    Executa uma tarefa em uma thread do pool com o log (print, traceback) em um buffer próprio
+    
+    A tarefa recebe o buffer no argumento saida; sys.stdout/sys.stderr não são trocados
+    
+    Returns:
+        str: Log da tarefa
+    """
+    buffer = io.StringIO()
+    try:
+        funcao(*args, saida=buffer)
+    except Exception:
+        traceback.print_exc(file=buffer)
+    return buffer.getvalue()
+
+def executar_tarefas(tarefas, max_consultas):
+    """
+    Executa as tarefas (funcao, args) com até max_consultas simultâneas
+    
+    O log de cada tarefa é exibido inteiro, na ordem das tarefas
+    
+    Args:
+        tarefas: Lista de (funcao, args); funcao aceita o argumento saida (arquivo do log)
+        max_consultas: Tamanho do pool (1 = uma tarefa por vez)
+    """
+    total = len(tarefas)
+    
+    if max_consultas <= 1 or total <= 1:
+        for i, (funcao, args) in enumerate(tarefas, 1):
+            print(f"\n[{i}/{total}]", end=" ")
+            funcao(*args)
+        return
+    
+    n_threads = min(max_consultas, total)
+    print(f"\n🧵 {n_threads} consultas simultâneas")
+    
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        futuros = [executor.submit(_executar_capturando, funcao, args) for funcao, args in tarefas]
+        for i, futuro in enumerate(futuros, 1):
+            log = futuro.result()
+            print(f"\n[{i}/{total}]", end=" ")
+            print(log, end="")
+
+def processar_datas(datas_pendentes, caminho_sql, connection_string, caminho_destino, sufixo_arquivo, relatorio,
+                    max_consultas):
+    """
+    Processa as datas pendentes, uma consulta por data, com até max_consultas simultâneas
+    
+    Cada data usa a própria conexão e tabelas ## exclusivas (isolar_tabelas_globais)
+    """
+    tarefas = [
+        (processar_data, (data_exec, caminho_sql, connection_string, caminho_destino, sufixo_arquivo, relatorio))
+        for data_exec in datas_pendentes
+    ]
+    executar_tarefas(tarefas, max_consultas)
+
+def processar_periodos(datas_pendentes, caminho_sql_periodo, connection_string, caminho_destino, sufixo_arquivo,
+                       relatorio, max_consultas):
+    """
+    Processa as datas pendentes com uma consulta por mês (query por período)
+    
+    Um backlog de 10 dias no mesmo mês vira uma consulta; um que cruza a virada
+    do mês vira duas (executadas em paralelo se max_consultas > 1)
+    """
+    tarefas = [
+        (processar_periodo, (datas_mes, caminho_sql_periodo, connection_string, caminho_destino, sufixo_arquivo,
+                             relatorio))
+        for datas_mes in agrupar_datas_por_mes(datas_pendentes)
+    ]
+    executar_tarefas(tarefas, max_consultas)
+
+# ============================================================================
+# EXECUÇÃO INCREMENTAL
+# ============================================================================
+
+def executar_incremental(caminho_sql, caminho_sql_periodo, connection_string, caminho_destino, sufixo_arquivo,
+                         max_consultas):
+    """
+    Processa as datas desde o último CSV da pasta até ontem e exibe o relatório
+    
+    Args:
+        caminho_sql: Query diária
+        caminho_sql_periodo: Query por período (uma consulta por mês do backlog).
+            None processa uma data por consulta; um caminho que não existe é erro
+        connection_string: Conexão ODBC do SQL Server
+        caminho_destino: Pasta dos CSVs
+        sufixo_arquivo: Sufixo dos arquivos da extração (ex: 'TRC', 'TRCWO')
+        max_consultas: Datas (ou meses) consultados ao mesmo tempo
+    """
+    # Inicia o relatório
+    relatorio = RelatorioExecucao()
+    
+    print("\n" + "="*100)
+    print("🚀 PROCESSAMENTO INCREMENTAL DE DADOS - TEMPOS OPERACIONAIS")
+    print("="*100)
+    
+    # 1. Determina data alvo (ontem)
+    data_ontem = get_data_ontem()
+    print(f"\n📅 Data alvo (ontem): {data_ontem.strftime('%d/%m/%Y (%A)')}")
+    
+    # 2. Verifica última data processada
+    print(f"\n📂 Verificando diretório: {caminho_destino}")
+    ultima_data_processada = obter_ultima_data_processada(caminho_destino, sufixo_arquivo)
+    
+    # 3. Gera lista de datas pendentes
+    datas_pendentes = gerar_lista_datas_pendentes(ultima_data_processada, data_ontem)
+    
+    # 4. Verifica se há algo a processar
+    if not datas_pendentes:
+        print("\n" + "="*100)
+        print("✅ SISTEMA ATUALIZADO!")
+        print("="*100)
+        if ultima_data_processada:
+            print(f"Última data processada: {ultima_data_processada.strftime('%d/%m/%Y')}")
+        print("Não há datas pendentes para processar.")
+        print("Todos os dados estão atualizados até ontem.")
+        print("="*100)
+    else:
+        print("\n" + "="*100)
+        print(f"📋 DATAS PENDENTES: {len(datas_pendentes)}")
+        print("="*100)
+        for data in datas_pendentes:
+            print(f"  • {data.strftime('%d/%m/%Y (%A)')}")
+        
+        # 5. Processa cada data pendente
+        print("\n" + "="*100)
+        print("⚙️  INICIANDO PROCESSAMENTO")
+        print("="*100)
+        
+        if caminho_sql_periodo and not os.path.exists(caminho_sql_periodo):
+            raise FileNotFoundError(f"Query por período não encontrada: {caminho_sql_periodo} "
+                                    f"(CAMINHO_SQL_PERIODO = None processa uma data por consulta)")
+        
+        try:
+            if caminho_sql_periodo and len(datas_pendentes) > 1:
+                processar_periodos(datas_pendentes, caminho_sql_periodo, connection_string, caminho_destino,
+                                   sufixo_arquivo, relatorio, max_consultas)
+            else:
+                processar_datas(datas_pendentes, caminho_sql, connection_string, caminho_destino, sufixo_arquivo,
+                                relatorio, max_consultas)
+        finally:
+            fechar_sessoes()
+    
+    # 6. Exibe relatório final
+    relatorio.exibir()
\ No newline at end of file
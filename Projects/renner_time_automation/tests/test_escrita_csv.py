@@ -0,0 +1,94 @@
+import datetime
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from escrita_csv import ENCODING, SEPARADOR, concluir_todos, escrever_result_set
+
+D = datetime.datetime
+
+# (coluna, type_code do pyodbc, valores): um NULL no fim força o ajuste depois do primeiro lote
+COLUNAS = [
+    ('INTEIRO', int, [1, 2, 3, 10 ** 17 + 1]),
+    ('INTEIRO_NULO', int, [1, 2, 3, None]),
+    ('REAL', float, [1.5, 0.1 + 0.2, 1e20, None]),
+    ('DECIMAL', Decimal, [Decimal('1.50'), Decimal('0'), None, Decimal('-2.125')]),
+    ('DATA_HORA_DIA', D, [D(2025, 10, 1), D(2025, 10, 2), None, D(2025, 10, 3)]),
+    ('DATA_HORA_SEGUNDOS', D, [D(2025, 10, 1), D(2025, 10, 1, 8, 30), None, D(2025, 10, 1, 23, 59, 59)]),
+    ('DATA_HORA_MS', D, [D(2025, 10, 1), D(2025, 10, 1, 8, 30, 1, 120000), None, D(2025, 10, 1, 9)]),
+    ('DATA_HORA_US', D, [D(2025, 10, 1, 8, 30, 1, 120000), D(2025, 10, 1), None, D(2025, 10, 1, 0, 0, 0, 5)]),
+    ('DATA', datetime.date, [datetime.date(2025, 10, 1), None, datetime.date(2025, 10, 2), None]),
+    ('BIT', bool, [True, False, True, False]),
+    ('BIT_NULO', bool, [True, None, False, True]),
+    ('TEXTO', str, ['a;b', 'aspas "x"', '', None]),
+    ('TUDO_NULO', int, [None, None, None, None]),
+]
+
+
+class CursorFalso:
+    """Cursor DB-API mínimo: description e fetchmany sobre linhas em memória"""
+
+    def __init__(self, colunas, tipos, linhas):
+        self.description = [(coluna, tipo, None, None, None, None, True) for coluna, tipo in zip(colunas, tipos)]
+        self._linhas = list(linhas)
+
+    def fetchmany(self, tamanho):
+        lote, self._linhas = self._linhas[:tamanho], self._linhas[tamanho:]
+        return lote
+
+
+def _ler(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+
+def _esperado(tmp_path, colunas, linhas, nome='esperado.csv'):
+    """Como o script antigo gravava: pd.DataFrame.from_records + to_csv"""
+    caminho = tmp_path / nome
+    pd.DataFrame.from_records(linhas, columns=colunas).to_csv(caminho, index=False, sep=SEPARADOR, encoding=ENCODING)
+    return _ler(caminho)
+
+
+@pytest.mark.parametrize('coluna, tipo, valores', COLUNAS, ids=[coluna for coluna, _, _ in COLUNAS])
+def test_coluna_igual_ao_to_csv(tmp_path, coluna, tipo, valores):
+    colunas = ['ID', coluna]
+    linhas = [(i, valor) for i, valor in enumerate(valores)]
+    cursor = CursorFalso(colunas, [int, tipo], linhas)
+
+    publicados = concluir_todos(escrever_result_set(cursor, lambda grupo: str(tmp_path / 'novo.csv'), tamanho_lote=3))
+
+    assert publicados[None][1] == len(linhas)
+    assert _ler(tmp_path / 'novo.csv') == _esperado(tmp_path, colunas, linhas)
+
+
+def test_todas_as_colunas_juntas(tmp_path):
+    colunas = [coluna for coluna, _, _ in COLUNAS]
+    linhas = list(zip(*(valores for _, _, valores in COLUNAS)))
+    cursor = CursorFalso(colunas, [tipo for _, tipo, _ in COLUNAS], linhas)
+
+    concluir_todos(escrever_result_set(cursor, lambda grupo: str(tmp_path / 'novo.csv'), tamanho_lote=1))
+
+    assert _ler(tmp_path / 'novo.csv') == _esperado(tmp_path, colunas, linhas)
+    assert [arquivo.name for arquivo in tmp_path.iterdir() if arquivo.name.startswith('.')] == []
+
+
+def test_regras_da_coluna_valem_por_arquivo(tmp_path):
+    # O NULL e a hora só aparecem no dia 2: o arquivo do dia 1 não muda por causa deles
+    colunas = ['DATA_REFERENCIA', 'USUARIO', 'PAUSAS', 'INICIO']
+    tipos = [str, str, int, D]
+    linhas = [
+        ('2025-10-01', 'a', 1, D(2025, 10, 1)),
+        ('2025-10-02', 'a', None, D(2025, 10, 2, 8)),
+        ('2025-10-01', 'b', 2, D(2025, 10, 1)),
+        ('2025-10-02', 'b', 3, D(2025, 10, 2)),
+    ]
+    cursor = CursorFalso(colunas, tipos, linhas)
+
+    publicados = concluir_todos(escrever_result_set(cursor, lambda dia: str(tmp_path / f"{dia}.csv"),
+                                                    'DATA_REFERENCIA', tamanho_lote=1))
+
+    assert sorted(publicados) == ['2025-10-01', '2025-10-02']
+    for dia in publicados:
+        linhas_dia = [linha[1:] for linha in linhas if linha[0] == dia]
+        assert _ler(tmp_path / f"{dia}.csv") == _esperado(tmp_path, colunas[1:], linhas_dia, f"esperado_{dia}.csv")